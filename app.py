@@ -1,434 +1,553 @@
-import streamlit as st
-from PIL import Image
-import pandas as pd
-import matplotlib.pyplot as plt
+import os
+import threading
+import time
+from contextlib import nullcontext
+
 import numpy as np
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
-def main():
-    st.set_page_config(
-        page_title="Virtual Machines and Memory Virtualization",
-        layout="wide",
-        initial_sidebar_state="expanded"
-    )
+from vm_tutorial.benchmarks import baseline_label
+from vm_tutorial.coherence import PROTOCOLS, CacheConfig, WORKLOAD_PRESETS as COHERENCE_WORKLOADS
+from vm_tutorial.content import (BOOK_RESOURCES, COURSE_RESOURCES, REFERENCES, SECTIONS, TABS, TERM_CATEGORIES,
+                                  TERMINOLOGY, VIDEO_RESOURCES, VISUALIZATION_TEXT, documents, stylesheet, term_category)
+from vm_tutorial.dedup import SCAN_RATES, find_images
+from vm_tutorial.figures import (BENCHMARK_DIR, IO_SIZES, SNAPSHOT_DIR, benchmark_data, coherence_data, comparison_markdown,
+                                 dedup_data, dedup_table, figure_bytes, hypervisor_diagram, io_data, io_rate_label, io_table,
+                                 isa_data, isa_table, migration_data, migration_table, numa_data, numa_table, overcommit_data,
+                                 overcommit_table, paging_data, paging_table, replacement_data, replacement_table, snapshot_data,
+                                 snapshot_table, translation_diagram, warm_up)
+from vm_tutorial.instrumentation import RECORDER
+from vm_tutorial.iovirt import POLL_NS, environment_io_performance, relative_iops
+from vm_tutorial.isa import WORKLOAD_PRESETS as GUEST_WORKLOADS, measured_performance
+from vm_tutorial.migration import ENCODINGS, WORKLOAD_PRESETS as MIGRATION_WORKLOADS
+from vm_tutorial.numa import CONTENDED as NUMA_CONTENDED, TOPOLOGIES as NUMA_TOPOLOGIES
+from vm_tutorial.quiz import QuizState, load_question_bank, next_question, record_answer, shuffled_options
+from vm_tutorial.replacement import REFERENCE_PATTERNS
+from vm_tutorial.scheduler import SCHEDULERS, WORKLOAD_PRESETS, HostSimulation, HostSpec, VMSpec
+from vm_tutorial.search import SearchIndex
+from vm_tutorial.sessions import SessionStore
+from vm_tutorial.traces import TEXT_FORMATS, iter_trace, summarize, translate_stream
+from vm_tutorial.translation import PAGING_MODES, TLB, AddressTranslator, synthetic_trace
+
+@st.cache_data(show_spinner=False)
+def render_hypervisor_diagram(theme_name="light", fmt="png"):
+    return figure_bytes(hypervisor_diagram(theme_name), fmt)
+
+@st.cache_data(show_spinner=False)
+def render_translation_diagram(theme_name="light", fmt="png"):
+    return figure_bytes(translation_diagram(theme_name), fmt)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_benchmark_comparison(directory):
+    return benchmark_data(directory)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def run_dedup_scan(directory):
+    return dedup_data(directory)
+
+@st.cache_data(show_spinner=False)
+def run_coherence_sweep(protocol, workload_name):
+    return coherence_data(protocol, workload_name)
+
+@st.cache_data(show_spinner=False)
+def run_paging_comparison(footprint, pte_updates_per_10k):
+    return paging_data(footprint, pte_updates_per_10k)
+
+@st.cache_data(show_spinner=False)
+def run_migration(workload_name, memory_gb, link_gbit, encoding_name):
+    return migration_data(workload_name, memory_gb, link_gbit, encoding_name)
+
+@st.cache_data(show_spinner=False)
+def run_overcommit(vm_count, overcommit):
+    return overcommit_data(vm_count, overcommit)
+
+@st.cache_data(show_spinner=False)
+def run_replacement(pattern_name, references):
+    return replacement_data(pattern_name, references)
+
+@st.cache_data(show_spinner=False)
+def run_snapshot_chain(dirty_percent, use_bitmap):
+    return snapshot_data(dirty_percent, use_bitmap)
+
+@st.cache_data(show_spinner=False)
+def run_io_paths(size_name, rate, batch):
+    return io_data(size_name, rate, batch)
+
+@st.cache_data(show_spinner=False)
+def run_io_performance():
+    return relative_iops()
+
+@st.cache_data(show_spinner=False)
+def run_environment_io_performance():
+    return environment_io_performance()
+
+@st.cache_data(show_spinner=False)
+def run_numa_placement(topology_name, vm_count):
+    return numa_data(topology_name, vm_count)
+
+@st.cache_data(show_spinner=False)
+def run_isa_comparison(workload_name):
+    return isa_data(workload_name)
+
+@st.cache_data(show_spinner=False)
+def run_isa_performance():
+    return measured_performance()
+
+# Chart specs are cached with the data they draw, so revisiting a setting sends the cached spec;
+# altair and pandas are only imported once a chart is first drawn
+@st.cache_data(ttl=60, show_spinner=False)
+def benchmark_chart_spec(directory):
+    from vm_tutorial import charts
+    comparison = load_benchmark_comparison(directory)
+    return charts.benchmark_chart(comparison, None if comparison else run_environment_io_performance())
+
+@st.cache_data(show_spinner=False)
+def paging_chart_spec(footprint, pte_updates_per_10k):
+    from vm_tutorial import charts
+    return charts.paging_chart(run_paging_comparison(footprint, pte_updates_per_10k))
+
+@st.cache_data(show_spinner=False)
+def coherence_chart_spec(protocol, workload_name):
+    from vm_tutorial import charts
+    return charts.coherence_chart(run_coherence_sweep(protocol, workload_name), protocol)
+
+@st.cache_data(show_spinner=False)
+def migration_chart_spec(workload_name, memory_gb, link_gbit, encoding_name):
+    from vm_tutorial import charts
+    return charts.migration_chart(run_migration(workload_name, memory_gb, link_gbit, encoding_name), workload_name, memory_gb, link_gbit)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def dedup_chart_spec(directory, pages_to_scan, sleep_ms):
+    from vm_tutorial import charts
+    return charts.dedup_chart(run_dedup_scan(directory), pages_to_scan, sleep_ms)
+
+@st.cache_data(show_spinner=False)
+def overcommit_chart_spec(vm_count, overcommit):
+    from vm_tutorial import charts
+    return charts.overcommit_chart(run_overcommit(vm_count, overcommit), vm_count, overcommit)
+
+@st.cache_data(show_spinner=False)
+def replacement_chart_spec(pattern_name, references):
+    from vm_tutorial import charts
+    return charts.replacement_chart(*run_replacement(pattern_name, references), pattern_name)
+
+@st.cache_data(show_spinner=False)
+def snapshot_chart_spec(dirty_percent, use_bitmap):
+    from vm_tutorial import charts
+    return charts.snapshot_chart(run_snapshot_chain(dirty_percent, use_bitmap), dirty_percent)
+
+@st.cache_data(show_spinner=False)
+def io_chart_spec(size_name, rate, batch):
+    from vm_tutorial import charts
+    return charts.io_chart(run_io_paths(size_name, rate, batch), size_name, rate, batch)
+
+@st.cache_data(show_spinner=False)
+def numa_chart_spec(topology_name, vm_count):
+    from vm_tutorial import charts
+    return charts.numa_chart(run_numa_placement(topology_name, vm_count), topology_name, vm_count)
 
-    # Custom CSS for better styling
-    st.markdown("""
-        <style>
-            .main-header {
-                font-size: 2.5rem;
-                font-weight: bold;
-                color: #1E3A8A;
-                margin-bottom: 1.5rem;
-                text-align: center;
-            }
-            .section-header {
-                font-size: 1.8rem;
-                font-weight: bold;
-                color: #2563EB;
-                margin-top: 2rem;
-                margin-bottom: 1rem;
-                border-bottom: 2px solid #BFDBFE;
-                padding-bottom: 0.5rem;
-            }
-            .subsection-header {
-                font-size: 1.4rem;
-                font-weight: bold;
-                color: #3B82F6;
-                margin-top: 1.5rem;
-                margin-bottom: 0.8rem;
-            }
-            .text-content {
-                font-size: 1.1rem;
-                line-height: 1.6;
-                text-align: justify;
-                margin-bottom: 1.2rem;
-            }
-            .highlight-term {
-                font-weight: bold;
-                color: #1D4ED8;
-                background-color: #EFF6FF;
-                padding: 0 0.3rem;
-                border-radius: 0.2rem;
-            }
-            .sidebar-content {
-                padding: 1rem;
-                background-color: #F3F4F6;
-                border-radius: 0.5rem;
-            }
-            .definition-box {
-                background-color: #DBEAFE;
-                padding: 1rem;
-                border-radius: 0.5rem;
-                border-left: 4px solid #2563EB;
-                margin-top: 0.5rem;
-            }
-            .references {
-                font-size: 0.9rem;
-                line-height: 1.4;
-            }
-        </style>
-    """, unsafe_allow_html=True)
-
-    # Terminology database
-    terminology = {
-        "Cache Coherence": "Ensures all CPU caches maintain a consistent view of memory.",
-        "Full Virtualization": "A method where the VMM completely emulates hardware so that an unmodified guest OS can run.",
-        "Hardware-Assisted Virtualization": "CPU features that provide direct support for virtualization, reducing the need for software-based emulation (e.g., Intel VT-x, AMD-V).",
-        "Host OS vs. Guest OS": "The host OS is the primary operating system running on the physical machine, while the guest OS runs within a virtual machine.",
-        "Live Migration": "The process of moving a running VM from one physical host to another without downtime.",
-        "Memory Management Unit (MMU)": "A hardware component that translates virtual addresses into physical addresses.",
-        "Page Fault": "Occurs when a requested page is not in physical memory, requiring the OS to fetch it from disk.",
-        "Page Table": "A data structure used by the OS to map virtual addresses to physical addresses.",
-        "Paging": "A memory management scheme that divides virtual memory into fixed-size units called pages.",
-        "Paravirtualization": "A virtualization method where the guest OS is modified to work efficiently with the hypervisor.",
-        "Resource Sharing": "Multiple VMs share hardware resources such as CPU, memory, and storage, improving utilization.",
-        "Snooping Protocol": "A cache coherence mechanism where caches monitor the bus for changes.",
-        "Trap-and-Emulate": "A method where the VMM intercepts privileged instructions executed by the guest OS and safely emulates them.",
-        "Translation Lookaside Buffer (TLB)": "A cache that stores recent virtual-to-physical address mappings to speed up address translation.",
-        "Type 1 Hypervisor (Bare Metal)": "Runs directly on the hardware without a host OS (e.g., VMware ESXi, Microsoft Hyper-V, Xen).",
-        "Type 2 Hypervisor (Hosted)": "Runs on a conventional operating system and manages VMs as applications (e.g., VMware Workstation, VirtualBox).",
-        "Virtual Machines (VMs)": "A software emulation of a physical computer system, allowing multiple operating systems to run on the same hardware.",
-        "Virtual Memory": "A system where the OS uses disk storage to extend RAM, allowing processes to use more memory than is physically available.",
-        "Virtual Machine Monitor (VMM) / Hypervisor": "A software layer that manages virtual machines by mapping virtual resources to physical resources.",
-        "VM Isolation": "The principle that each VM is independent and cannot directly interfere with others, improving security and reliability.",
-        "VM Snapshots": "A saved state of a virtual machine that can be restored later.",
-        "Write-Back Cache": "Writes data to memory only when the cache line is replaced.",
-        "Write-Through Cache": "Writes data to both cache and main memory simultaneously."
-    }
+def profiling_enabled():
+    # Opt-in: VM_TUTORIAL_PROFILE=1 times every session, ?profile=1 only this one
+    return os.environ.get("VM_TUTORIAL_PROFILE") == "1" or st.query_params.get("profile") == "1"
+
+def timed(kind, name):
+    return RECORDER.timer(kind, name) if st.session_state.get("profiling") else nullcontext()
+
+def show_chart(name, spec_function, *args):
+    # Drawn in the browser: zoom, hover and legend toggling need no rerun
+    with timed("figure", name):
+        st.vega_lite_chart(spec_function(*args), width="stretch")
+
+def show_table(name, table_function, *args):
+    with timed("table", name):
+        st.dataframe(table_function(*args), width="stretch")
+
+def show_diagram(name, render_function):
+    with timed("figure", name):
+        st.image(render_function(), width="stretch")
+
+def show_visualization_text(viz_type):
+    st.markdown(f"<p class='text-content'>{VISUALIZATION_TEXT[viz_type]}</p>", unsafe_allow_html=True)
+
+def warm_up_caches():
+    warm_up()
+    render_hypervisor_diagram()
+    render_translation_diagram()
+
+@st.cache_resource(show_spinner=False)
+def start_warm_up():
+    # Once per server process: load the plotting stack and draw the diagrams in the
+    # background, so the first sessions neither import nor draw them
+    thread = threading.Thread(target=warm_up_caches, name="warm-up", daemon=True)
+    add_script_run_ctx(thread, get_script_run_ctx())
+    thread.start()
+    return thread
+
+def show_section(key):
+    st.markdown(f"<p class='text-content'>{SECTIONS[key].html}</p>", unsafe_allow_html=True)
+
+@st.cache_resource(show_spinner=False)
+def get_search_index():
+    return SearchIndex(documents())
+
+@st.cache_resource(show_spinner=False)
+def get_session_store():
+    # Growing per-session objects live here, not in st.session_state, and go once a tab sits idle
+    return SessionStore(idle_seconds=float(os.environ.get("VM_TUTORIAL_IDLE_MINUTES", 30)) * 60,
+                        max_sessions=int(os.environ.get("VM_TUTORIAL_MAX_SESSIONS", 500)))
+
+def session_id():
+    return get_script_run_ctx().session_id
+
+def open_search_hit(document):
+    # Switch to the hit's tab; terms are also selected in the explorer
+    st.session_state.section_tab = document.tab
+    if document.kind == "term":
+        st.session_state.term_category = term_category(document.title)
+        st.session_state.term_name = document.title
+
+def show_translation_metrics(summary, elapsed):
+    hit_col, fault_col, walk_col, rate_col = st.columns(4)
+    hit_col.metric("TLB Hit Rate", f"{summary['hit_rate']:.2%}")
+    fault_col.metric("Page Faults", f"{summary['page_faults']:,}")
+    walk_col.metric("Page-Table Reads", f"{summary['walk_refs']:,}")
+    rate_col.metric("Translations/sec", f"{summary['accesses'] / max(elapsed, 1e-9) / 1e6:.1f}M")
+
+@st.fragment
+def show_learning_tools():
+    # Runs as a fragment so sidebar interactions do not rerun the main tabs
+    st.markdown("<h2 style='text-align: center;'>Learning Tools</h2>", unsafe_allow_html=True)
     
-    # Create categories for terminology
-    term_categories = {
-        "Basic Virtualization Concepts": ["Virtual Machines (VMs)", "Virtual Machine Monitor (VMM) / Hypervisor", 
-                                          "Type 1 Hypervisor (Bare Metal)", "Type 2 Hypervisor (Hosted)", 
-                                          "Host OS vs. Guest OS", "VM Isolation", "VM Snapshots"],
-        "Memory Virtualization": ["Virtual Memory", "Paging", "Page Table", "Page Fault", 
-                                 "Memory Management Unit (MMU)", "Translation Lookaside Buffer (TLB)"],
-        "CPU Virtualization": ["Hardware-Assisted Virtualization", "Trap-and-Emulate", 
-                              "Full Virtualization", "Paravirtualization"],
-        "Cache and Memory": ["Cache Coherence", "Snooping Protocol", "Write-Through Cache", 
-                            "Write-Back Cache", "Resource Sharing", "Live Migration"]
-    }
-
-    # Sidebar enhancements
-    with st.sidebar:
-        st.markdown("<h2 style='text-align: center;'>Learning Tools</h2>", unsafe_allow_html=True)
-        
-        # 1. Terminology explorer
-        st.markdown("<div class='sidebar-content'>", unsafe_allow_html=True)
-        st.markdown("<h3>Terminology Explorer</h3>", unsafe_allow_html=True)
-        
-        # Category selection first
-        category = st.selectbox("Select Category", list(term_categories.keys()))
-        
-        # Then filter terms by category
-        category_terms = term_categories[category]
-        selected_term = st.selectbox("Select a Term", category_terms)
-        
-        st.markdown(f"<div class='definition-box'><p><b>{selected_term}:</b> {terminology[selected_term]}</p></div>", 
-                  unsafe_allow_html=True)
-        st.markdown("</div>", unsafe_allow_html=True)
-        
-        # 2. Quick Quiz Tool
-        st.markdown("<div class='sidebar-content' style='margin-top: 2rem;'>", unsafe_allow_html=True)
-        st.markdown("<h3>Test Your Knowledge</h3>", unsafe_allow_html=True)
-        if st.button("Generate Quiz Question"):
-            questions = [
-                {"question": "Which hypervisor type runs directly on hardware?", 
-                 "options": ["Type 1 (Bare Metal)", "Type 2 (Hosted)", "Paravirtualization", "Full Virtualization"],
-                 "answer": "Type 1 (Bare Metal)"},
-                {"question": "What does TLB stand for?", 
-                 "options": ["Translation Language Buffer", "Translation Lookaside Buffer", "Transaction Lookaside Block", "Time Latency Bridge"],
-                 "answer": "Translation Lookaside Buffer"},
-                {"question": "Which of these is not a cache coherence mechanism?", 
-                 "options": ["Snooping Protocol", "Directory-Based Coherence", "Memory Migration", "MESI Protocol"],
-                 "answer": "Memory Migration"}
-            ]
-            random_q = np.random.choice(questions)
-            st.session_state.current_q = random_q
-            st.session_state.answered = False
-            st.session_state.selected_answer = None
-        
-        if 'current_q' in st.session_state:
-            st.write(st.session_state.current_q["question"])
-            for option in st.session_state.current_q["options"]:
-                if st.button(option, key=option):
-                    st.session_state.selected_answer = option
-                    st.session_state.answered = True
-            
-            if st.session_state.answered and st.session_state.selected_answer:
-                if st.session_state.selected_answer == st.session_state.current_q["answer"]:
-                    st.success("Correct! Well done.")
-                else:
-                    st.error(f"Incorrect. The right answer is: {st.session_state.current_q['answer']}")
-        st.markdown("</div>", unsafe_allow_html=True)
-
-    # Main content area
-    st.markdown("<h1 class='main-header'>Virtual Machines and Memory Virtualization</h1>", unsafe_allow_html=True)
+    # 1. Search over terms, sections and resources
+    query = st.text_input("Search the tutorial", placeholder="e.g. TLB, snooping, live migration", key="search_query")
+    if query:
+        index = get_search_index()
+        started = time.perf_counter()
+        hits = index.search(query)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        for rank, (score, document) in enumerate(hits):
+            if st.button(f"{document.title} · {document.tab}", key=f"search_hit_{rank}", width="stretch"):
+                open_search_hit(document)
+                # Switching tabs needs a full run, not just this fragment
+                st.rerun()
+        st.caption(f"{len(hits)} results in {elapsed_ms:.2f} ms" if hits else "No matches")
     
-    # Create tabs for different sections
-    tabs = st.tabs(["Overview", "Virtual Machine Concepts", "Memory Virtualization", "Visualizations", "Resources"])
+    # 2. Terminology explorer
+    st.markdown("<div class='sidebar-content'>", unsafe_allow_html=True)
+    st.markdown("<h3>Terminology Explorer</h3>", unsafe_allow_html=True)
     
-    with tabs[0]:
-        st.markdown("<h2 class='section-header'>Abstract</h2>", unsafe_allow_html=True)
-        st.markdown("<p class='text-content'>Virtualization is a powerful technology that enables multiple <span class='highlight-term'>Virtual Machines (VMs)</span> to run on a single physical system. This paper explores the fundamental concepts of virtual machines, memory virtualization, CPU instruction handling, and cache coherence. By leveraging <span class='highlight-term'>VM Isolation</span>, <span class='highlight-term'>Memory Virtualization</span>, <span class='highlight-term'>Cache Coherence</span>, and <span class='highlight-term'>Instruction Set Virtualization</span>, modern hypervisors optimize hardware utilization while ensuring robust performance.</p>", unsafe_allow_html=True)
-        
-        st.markdown("<h2 class='section-header'>Introduction</h2>", unsafe_allow_html=True)
-        st.markdown("<p class='text-content'><span class='highlight-term'>Virtualization</span> enhances efficiency, security, and scalability in modern computing environments. Multiple <span class='highlight-term'>Virtual Machines (VMs)</span> run on a single system using a <span class='highlight-term'>Virtual Machine Monitor (VMM) / Hypervisor</span>, enabling efficient resource sharing and isolation. This paper discusses the various aspects of virtualization, including <span class='highlight-term'>virtual memory management</span>, <span class='highlight-term'>instruction set virtualization</span>, and <span class='highlight-term'>cache coherence</span> in multiprocessor systems.</p>", unsafe_allow_html=True)
-        
-        # Create an overview diagram
-        st.markdown("<h3 class='subsection-header'>Virtualization Overview</h3>", unsafe_allow_html=True)
-        
-        # Display an overview image or diagram using Matplotlib
-        fig, ax = plt.subplots(figsize=(10, 6))
-        fig.patch.set_facecolor('#F0F2F6')
-        ax.set_facecolor('#F0F2F6')
+    # Category selection first
+    category = st.selectbox("Select Category", list(TERM_CATEGORIES.keys()), key="term_category")
+    
+    # Then filter terms by category
+    category_terms = TERM_CATEGORIES[category]
+    selected_term = st.selectbox("Select a Term", category_terms, key="term_name")
+    
+    st.markdown(f"<div class='definition-box'><p><b>{selected_term}:</b> {TERMINOLOGY[selected_term]}</p></div>", 
+              unsafe_allow_html=True)
+    st.markdown("</div>", unsafe_allow_html=True)
+    
+    # 3. Quick Quiz Tool
+    show_quiz()
+
+@st.fragment
+def show_quiz():
+    # Nested fragment: answering reruns only the quiz
+    bank = load_question_bank()
+    if "quiz" not in st.session_state:
+        st.session_state.quiz = QuizState.new(len(bank))
+    quiz = st.session_state.quiz
+    
+    st.markdown("<div class='sidebar-content' style='margin-top: 2rem;'>", unsafe_allow_html=True)
+    st.markdown("<h3>Test Your Knowledge</h3>", unsafe_allow_html=True)
+    if st.button("Generate Quiz Question"):
+        next_question(quiz, bank)
+    
+    if quiz.current >= 0:
+        question = bank[quiz.current]
+        st.write(question.prompt)
+        for position, option in enumerate(shuffled_options(quiz, bank)):
+            if st.button(option, key=f"quiz_option_{position}"):
+                record_answer(quiz, bank, option)
+        
+        if quiz.choice >= 0:
+            if question.options[quiz.choice] == question.answer:
+                st.success("Correct! Well done.")
+            else:
+                st.error(f"Incorrect. The right answer is: {question.answer}")
+        st.caption(f"Score: {quiz.correct}/{quiz.answered} · {quiz.mastered} of {len(bank)} questions mastered")
+    st.markdown("</div>", unsafe_allow_html=True)
+
+def show_overview_tab():
+    st.markdown("<h2 class='section-header'>Abstract</h2>", unsafe_allow_html=True)
+    show_section("abstract")
+    
+    st.markdown("<h2 class='section-header'>Introduction</h2>", unsafe_allow_html=True)
+    show_section("introduction")
+    
+    # Create an overview diagram
+    st.markdown("<h3 class='subsection-header'>Virtualization Overview</h3>", unsafe_allow_html=True)
+    
+    show_diagram("Hypervisor diagram", render_hypervisor_diagram)
+    
+    show_section("hypervisor_diagram")
+
+def show_concepts_tab():
+    st.markdown("<h2 class='section-header'>Virtual Machine Operations</h2>", unsafe_allow_html=True)
+    show_section("vm_operations")
+    
+    st.markdown("<h2 class='section-header'>CPU and Instruction Set Virtualization</h2>", unsafe_allow_html=True)
+    show_section("cpu_virtualization")
+    
+    # Add comparison table
+    st.markdown("<h3 class='subsection-header'>Comparison of Virtualization Approaches</h3>", unsafe_allow_html=True)
+    
+    # Performance comes from running the same guest under each technique
+    with timed("table", "Comparison of Virtualization Approaches"):
+        st.markdown(comparison_markdown(run_isa_performance(), run_io_performance()))
+    
+    st.markdown("<h3 class='subsection-header'>Trap-and-Emulate in Action</h3>", unsafe_allow_html=True)
+    
+    workload_name = st.selectbox("Guest Workload", list(GUEST_WORKLOADS))
+    with st.spinner("Running the guest under each technique..."):
+        rows = run_isa_comparison(workload_name)
+    show_table("Trap-and-Emulate in Action", isa_table, rows)
+    
+    with st.expander("Guest kernel and user program"):
+        st.code(GUEST_WORKLOADS[workload_name].source(), language="nasm")
+    
+    st.caption("A toy guest kernel and user program run on an interpreted CPU. Ordinary instructions take one cycle; system instructions, traps, hypercalls and VM exits use fixed cycle costs, so the exit counts are measured and the cycle totals are modeled. The comparison table uses the geometric mean over all four workloads.")
+
+def show_memory_tab():
+    st.markdown("<h2 class='section-header'>Memory Virtualization</h2>", unsafe_allow_html=True)
+    show_section("memory_virtualization")
+    
+    st.markdown("<h3 class='subsection-header'>Memory Address Translation Process</h3>", unsafe_allow_html=True)
+    
+    show_diagram("Translation diagram", render_translation_diagram)
+    
+    show_section("translation_diagram")
+    
+    st.markdown("<h2 class='section-header'>Cache Coherence in Multiprocessor Systems</h2>", unsafe_allow_html=True)
+    show_section("cache_coherence")
+    
+    show_section("cache_policies")
+    
+    st.markdown("<h2 class='section-header'>Page Replacement</h2>", unsafe_allow_html=True)
+    show_section("page_replacement")
+
+def show_visualizations_tab():
+    st.markdown("<h2 class='section-header'>Interactive Visualizations</h2>", unsafe_allow_html=True)
+    
+    viz_type = st.selectbox("Select Visualization", 
+                          ["VM Performance Comparison", "Memory Virtualization Overhead", "Cache Coherence Impact", "Live Migration", "Memory Deduplication", "VM Snapshots", "I/O Virtualization", "NUMA Placement", "Memory Overcommit", "Page Replacement"])
+    
+    if viz_type == "VM Performance Comparison":
+        comparison = load_benchmark_comparison(BENCHMARK_DIR)
+        show_chart(viz_type, benchmark_chart_spec, BENCHMARK_DIR)
+        if comparison:
+            st.markdown(f"<p class='text-content'>This chart compares microbenchmark results measured on different hosts, relative to <span class='highlight-term'>{baseline_label(comparison)}</span> (100%). Bars show the mean of the recorded samples, whiskers a 95% confidence interval and dots the individual runs. For latency, the ratio is inverted so that higher is always better.</p>", unsafe_allow_html=True)
+        else:
+            show_visualization_text(viz_type)
+            st.info("CPU and memory are illustrative values; I/O comes from the I/O Virtualization simulator. The Type 1 hypervisor serves a virtio device from a vhost kernel worker. The Type 2 hypervisor serves it from its user-space process, as VirtualBox, VMware Workstation and QEMU do with their paravirtual drivers; a fully emulated device would reach about a tenth of native IOPS. Run `python -m vm_tutorial bench --label <environment>` on bare-metal, VM and container hosts and place the result files in bench_results/ to plot measured numbers instead.")
+        
+    elif viz_type == "Memory Virtualization Overhead":
+        footprint_col, update_col = st.columns(2)
+        footprint = footprint_col.selectbox("Working Set", ["64 MB", "1 GB", "16 GB"], index=1)
+        pte_updates = update_col.slider("Guest Page-Table Writes per 10k Accesses", 0, 50, 10)
         
-        # Create a simple diagram
-        ax.add_patch(plt.Rectangle((0, 0), 10, 2, fc='#BFDBFE', ec='black', lw=2))
-        ax.text(5, 1, 'Hardware (CPU, Memory, I/O)', ha='center', va='center', fontsize=12, fontweight='bold')
+        rows = run_paging_comparison(footprint, pte_updates)
+        show_chart(viz_type, paging_chart_spec, footprint, pte_updates)
+        
+        show_table(viz_type, paging_table, rows)
+        
+        show_visualization_text(viz_type)
+        st.caption("Latencies are relative to native execution with 4 KB pages, estimated from 200,000 simulated accesses with a 1536-entry TLB, page-walk caches and a nested TLB.")
+        
+    elif viz_type == "Cache Coherence Impact":
+        protocol_col, workload_col = st.columns(2)
+        protocol = protocol_col.selectbox("Coherence Protocol", list(PROTOCOLS), index=1)
+        workload_name = workload_col.selectbox("Sharing Pattern", list(COHERENCE_WORKLOADS))
         
-        # Type 1
-        ax.add_patch(plt.Rectangle((0, 2.5), 4.5, 1.5, fc='#93C5FD', ec='black', lw=2))
-        ax.text(2.25, 3.25, 'Type 1 Hypervisor', ha='center', va='center', fontsize=11, fontweight='bold')
+        with st.spinner("Simulating 1-64 processors..."):
+            rows = run_coherence_sweep(protocol, workload_name)
+        
+        show_chart(viz_type, coherence_chart_spec, protocol, workload_name)
+        
+        cores = max(row["cores"] for row in rows)
+        largest = {row["interconnect"]: row for row in rows if row["cores"] == cores}
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Bus Transactions", f"{largest['Snooping bus']['transactions']:,}")
+        col2.metric("Directory Messages", f"{largest['Directory']['transactions']:,}")
+        col3.metric("Invalidations", f"{largest['Snooping bus']['invalidations']:,}")
+        col4.metric("Cache-to-Cache Transfers", f"{largest['Snooping bus']['cache_to_cache_rate']:.0%}")
+        st.caption(f"Traffic at {cores} processors. Each processor has a private {CacheConfig().size_bytes // 1024} KiB 4-way cache; cache-to-cache transfers are the share of misses served by another cache instead of memory.")
+        
+        show_visualization_text(viz_type)
         
-        ax.add_patch(plt.Rectangle((0.5, 4.5), 1, 1, fc='#DBEAFE', ec='black', lw=1))
-        ax.text(1, 5, 'VM 1', ha='center', va='center', fontsize=10)
+    elif viz_type == "Live Migration":
+        workload_col, memory_col, link_col, encoding_col = st.columns(4)
+        workload_name = workload_col.selectbox("Guest Workload", list(MIGRATION_WORKLOADS), index=2)
+        memory_gb = memory_col.selectbox("Guest Memory", [4, 16, 64], index=1, format_func=lambda gb: f"{gb} GB")
+        link_gbit = link_col.selectbox("Link", [1, 10, 25], index=1, format_func=lambda gbit: f"{gbit} Gbit/s")
+        encoding_name = encoding_col.selectbox("Page Encoding", list(ENCODINGS))
         
-        ax.add_patch(plt.Rectangle((2, 4.5), 1, 1, fc='#DBEAFE', ec='black', lw=1))
-        ax.text(2.5, 5, 'VM 2', ha='center', va='center', fontsize=10)
+        with st.spinner("Simulating migration..."):
+            results = run_migration(workload_name, memory_gb, link_gbit, encoding_name)
+        precopy = results[0]
+        
+        show_chart(viz_type, migration_chart_spec, workload_name, memory_gb, link_gbit, encoding_name)
+        
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Converges", "Yes" if precopy.converged else "No")
+        col2.metric("Pre-copy Downtime", f"{precopy.downtime * 1000:,.0f} ms")
+        col3.metric("Total Migration Time", f"{precopy.total_time:,.1f} s")
         
-        ax.add_patch(plt.Rectangle((3.5, 4.5), 1, 1, fc='#DBEAFE', ec='black', lw=1))
-        ax.text(4, 5, 'VM 3', ha='center', va='center', fontsize=10)
+        show_table(viz_type, migration_table, results)
         
-        # Type 2
-        ax.add_patch(plt.Rectangle((5.5, 2.5), 4.5, 1.5, fc='#60A5FA', ec='black', lw=2))
-        ax.text(7.75, 3.25, 'Host OS', ha='center', va='center', fontsize=11, fontweight='bold')
+        show_visualization_text(viz_type)
+        st.caption("Pages are 4 KB and tracked in dirty bitmaps. The downtime target is 300 ms with at most 30 pre-copy rounds; each remote fault stalls one vCPU for a 200 µs round trip.")
         
-        ax.add_patch(plt.Rectangle((5.5, 4.5), 4.5, 1, fc='#93C5FD', ec='black', lw=1))
-        ax.text(7.75, 5, 'Type 2 Hypervisor', ha='center', va='center', fontsize=10)
+    elif viz_type == "Memory Deduplication":
+        rate_col, sleep_col = st.columns(2)
+        pages_to_scan = rate_col.selectbox("Pages per Scan", list(SCAN_RATES))
+        sleep_ms = sleep_col.slider("Sleep Between Scans (ms)", 10, 200, 20, step=10)
         
-        ax.add_patch(plt.Rectangle((6, 6), 1, 1, fc='#DBEAFE', ec='black', lw=1))
-        ax.text(6.5, 6.5, 'VM 1', ha='center', va='center', fontsize=10)
+        with st.spinner("Scanning memory images..."):
+            report = run_dedup_scan(SNAPSHOT_DIR)
         
-        ax.add_patch(plt.Rectangle((7.5, 6), 1, 1, fc='#DBEAFE', ec='black', lw=1))
-        ax.text(8, 6.5, 'VM 2', ha='center', va='center', fontsize=10)
+        show_chart(viz_type, dedup_chart_spec, SNAPSHOT_DIR, pages_to_scan, sleep_ms)
         
-        # Add labels at the top
-        ax.text(2.25, 7.2, 'Type 1 (Bare Metal)', ha='center', va='center', fontsize=12, fontweight='bold')
-        ax.text(7.75, 7.2, 'Type 2 (Hosted)', ha='center', va='center', fontsize=12, fontweight='bold')
+        cost = report.scan_cost(pages_to_scan, sleep_ms)
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Sharing Ratio", f"{report.sharing_ratio:.2f}x")
+        col2.metric("Memory Saved", f"{report.saved_bytes / 2**20:,.0f} MB")
+        col3.metric("Zero Pages", f"{report.zero_pages / report.total_pages:.0%}")
+        col4.metric("Scanner CPU", f"{cost['cpu_fraction']:.1%}")
         
-        # Setting the limits and removing the axes
-        ax.set_xlim(-0.5, 11)
-        ax.set_ylim(-0.5, 8)
-        ax.axis('off')
+        show_table(viz_type, dedup_table, report, sleep_ms)
         
-        st.pyplot(fig)
+        show_visualization_text(viz_type)
+        has_snapshots = bool(find_images(SNAPSHOT_DIR))
+        source = f"{len(report.images)} images in {SNAPSHOT_DIR}" if has_snapshots else f"{len(report.images)} generated sample images"
+        st.caption(f"Scanned {report.total_pages:,} pages of {source} in {report.elapsed:.2f} s; {report.cross_vm_pages:,} pages have contents found in more than one VM. CPU cost uses the measured hashing time of this host, {report.seconds_per_page * 1e6:.1f} µs per page.")
+        if not has_snapshots:
+            st.info("Place raw guest memory dumps (.img, .raw or .mem) in snapshots/ or set VM_TUTORIAL_SNAPSHOT_DIR to measure real VMs; `python -m vm_tutorial dedup` scans them from the command line.")
         
-        st.markdown("<p class='text-content'>The diagram above illustrates the two primary hypervisor types. <span class='highlight-term'>Type 1 (Bare Metal)</span> hypervisors run directly on hardware, while <span class='highlight-term'>Type 2 (Hosted)</span> hypervisors run on a host operating system. Each approach has different performance characteristics and use cases.</p>", unsafe_allow_html=True)
+    elif viz_type == "VM Snapshots":
+        dirty_col, tracking_col = st.columns(2)
+        dirty_percent = dirty_col.selectbox("Blocks Written Between Checkpoints", [1, 5, 20], index=1, format_func=lambda percent: f"{percent}%")
+        use_bitmap = tracking_col.selectbox("Dirty Block Tracking", ["Dirty bitmap", "Fingerprint every block"]) == "Dirty bitmap"
         
-    with tabs[1]:
-        st.markdown("<h2 class='section-header'>Virtual Machine Operations</h2>", unsafe_allow_html=True)
-        st.markdown("<p class='text-content'>A <span class='highlight-term'>Host OS vs. Guest OS</span> setup allows multiple <span class='highlight-term'>VMs</span> to operate within a single system. There are two primary types of hypervisors: <span class='highlight-term'>Type 1 Hypervisor (Bare Metal)</span>, which runs directly on hardware, and <span class='highlight-term'>Type 2 Hypervisor (Hosted)</span>, which runs within an existing operating system. <span class='highlight-term'>VM Snapshots</span> can save the state of a <span class='highlight-term'>VM</span> for later restoration, and <span class='highlight-term'>Live Migration</span> enables seamless movement between physical hosts.</p>", unsafe_allow_html=True)
+        with st.spinner("Checkpointing and restoring a 32 MB disk image 16 times..."):
+            report = run_snapshot_chain(dirty_percent, use_bitmap)
         
-        st.markdown("<h2 class='section-header'>CPU and Instruction Set Virtualization</h2>", unsafe_allow_html=True)
-        st.markdown("<p class='text-content'><span class='highlight-term'>Trap-and-Emulate</span> is a technique used by the <span class='highlight-term'>VMM</span> to handle <span class='highlight-term'>Privileged Instructions</span> executed by a <span class='highlight-term'>Guest OS</span>. <span class='highlight-term'>Hardware-Assisted Virtualization</span> technologies, such as <span class='highlight-term'>Intel VT-x</span> and <span class='highlight-term'>AMD-V</span>, optimize performance and reduce emulation overhead. The <span class='highlight-term'>System Mode (Kernel Mode)</span> provides unrestricted hardware access, while <span class='highlight-term'>User Mode</span> restricts applications. <span class='highlight-term'>Trap Handling</span> ensures system security by switching execution to <span class='highlight-term'>System Mode</span> when needed.</p>", unsafe_allow_html=True)
+        show_chart(viz_type, snapshot_chart_spec, dirty_percent, use_bitmap)
         
-        # Add comparison table
-        st.markdown("<h3 class='subsection-header'>Comparison of Virtualization Approaches</h3>", unsafe_allow_html=True)
+        summary = report.summary()
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Space Amplification", f"{summary['space_amplification']:.2f}x", f"{summary['full_copy_amplification']:.1f}x as full copies", delta_color="off")
+        col2.metric("Incremental Checkpoint", f"{summary['mean_checkpoint_seconds'] * 1000:.0f} ms", f"{summary['base_checkpoint_seconds'] * 1000:.0f} ms for the base", delta_color="off")
+        col3.metric("Restore", f"{summary['restore_seconds'] * 1000:.0f} ms")
+        col4.metric("Deduplicated Writes", f"{summary['dedup_hits']:,}")
         
-        comparison_data = {
-            "Feature": ["Hardware Requirements", "Performance", "Isolation", "Guest OS Modification", "Common Use Cases"],
-            "Full Virtualization": ["High", "Moderate", "Complete", "None", "Cloud Infrastructure, Testing Environments"],
-            "Paravirtualization": ["Medium", "Good", "High", "Required", "Enterprise Servers, Cloud Hosting"],
-            "Hardware-Assisted": ["VT-x/AMD-V", "Excellent", "Complete", "None", "Enterprise Virtualization, Cloud Computing"]
-        }
+        show_table(viz_type, snapshot_table, report)
         
-        comparison_df = pd.DataFrame(comparison_data)
-        st.table(comparison_df.set_index("Feature"))
-    
-    with tabs[2]:
-        st.markdown("<h2 class='section-header'>Memory Virtualization</h2>", unsafe_allow_html=True)
-        st.markdown("<p class='text-content'><span class='highlight-term'>Virtual Memory</span> allows operating systems to extend <span class='highlight-term'>RAM</span> using disk storage. <span class='highlight-term'>Paging</span> divides <span class='highlight-term'>virtual memory</span> into fixed-size units, mapped by a <span class='highlight-term'>Page Table</span> and translated by the <span class='highlight-term'>Memory Management Unit (MMU)</span>. When a <span class='highlight-term'>Page Fault</span> occurs, the <span class='highlight-term'>OS</span> retrieves the missing page from disk. <span class='highlight-term'>Translation Lookaside Buffer (TLB)</span> caching optimizes memory access, reducing <span class='highlight-term'>TLB Miss</span> rates.</p>", unsafe_allow_html=True)
+        show_visualization_text(viz_type)
+        st.caption(f"Space amplification is the size of the whole chain, blocks and metadata, per byte of data in the newest snapshot. Every 64 KB block written is new data or a copy of another block; copies are stored once. The restored image {'matched' if summary['verified'] else 'did not match'} the disk byte for byte. `python -m vm_tutorial snapshot` checkpoints real disk images.")
         
-        st.markdown("<h3 class='subsection-header'>Memory Address Translation Process</h3>", unsafe_allow_html=True)
+    elif viz_type == "I/O Virtualization":
+        size_col, rate_col, batch_col = st.columns(3)
+        size_name = size_col.selectbox("Request Size", list(IO_SIZES))
+        rate = rate_col.selectbox("Offered Load", [20_000, 200_000, None], index=1, format_func=io_rate_label)
+        batch = batch_col.selectbox("Submission Batch", [1, 8], format_func=lambda size: "One request" if size == 1 else f"{size} requests")
         
-        # Create an interactive diagram for memory address translation
-        # Using Matplotlib for a diagram
-        fig, ax = plt.subplots(figsize=(10, 6))
-        fig.patch.set_facecolor('#F0F2F6')
-        ax.set_facecolor('#F0F2F6')
+        with st.spinner("Sending 100,000 requests down each I/O path..."):
+            results = run_io_paths(size_name, rate, batch)
         
-        # Virtual Address
-        ax.add_patch(plt.Rectangle((1, 5), 6, 1, fc='#BFDBFE', ec='black', lw=2))
-        ax.text(4, 5.5, 'Virtual Address', ha='center', va='center', fontsize=11, fontweight='bold')
+        show_chart(viz_type, io_chart_spec, size_name, rate, batch)
         
-        # Split into VPN and Offset
-        ax.add_patch(plt.Rectangle((1, 4), 3, 1, fc='#93C5FD', ec='black', lw=2))
-        ax.text(2.5, 4.5, 'Virtual Page Number', ha='center', va='center', fontsize=10)
+        by_path = {result.path: result.summary() for result in results}
+        native, emulated, virtio, passthrough = (by_path[name] for name in ("Native", "Emulated device", "virtio packed ring", "SR-IOV passthrough"))
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Native p99", f"{native['p99_us']:,.1f} µs", f"{native['iops'] / 1000:,.0f}k IOPS", delta_color="off")
+        col2.metric("Emulated p99", f"{emulated['p99_us']:,.1f} µs", f"{emulated['exits_per_request']:.1f} exits per request", delta_color="off")
+        col3.metric("virtio (packed) p99", f"{virtio['p99_us']:,.1f} µs", f"{virtio['exits_per_request']:.2f} exits per request", delta_color="off")
+        col4.metric("SR-IOV p99", f"{passthrough['p99_us']:,.1f} µs", f"{passthrough['exits_per_request']:.0f} exits per request", delta_color="off")
         
-        ax.add_patch(plt.Rectangle((4, 4), 3, 1, fc='#60A5FA', ec='black', lw=2))
-        ax.text(5.5, 4.5, 'Offset', ha='center', va='center', fontsize=10)
+        show_table(viz_type, io_table, results)
         
-        # Arrows
-        ax.arrow(2.5, 4, 0, -1, head_width=0.2, head_length=0.2, fc='black', ec='black')
-        ax.arrow(5.5, 4, 0, -1, head_width=0.2, head_length=0.2, fc='black', ec='black')
+        show_visualization_text(viz_type)
+        st.caption(f"Modeled, not measured: every path drives the same NVMe-class device (10 µs, 3.2 GB/s) with fixed CPU and exit costs, and latency runs from when a request gets a queue slot. QEMU's virtio backends poll an empty ring for {POLL_NS // 1000} µs before sleeping, so under load the guest rarely needs to kick them; vhost sleeps at once and is woken through the kernel. `python -m vm_tutorial io --requests 1000000` runs longer streams.")
         
-        # TLB and Page Table
-        ax.add_patch(plt.Rectangle((1, 2), 3, 1, fc='#DBEAFE', ec='black', lw=2))
-        ax.text(2.5, 2.5, 'TLB Lookup', ha='center', va='center', fontsize=10)
+    elif viz_type == "NUMA Placement":
+        topology_col, vms_col = st.columns(2)
+        topology_name = topology_col.selectbox("Host Topology", list(NUMA_TOPOLOGIES))
+        vm_count = vms_col.selectbox("Virtual Machines", [500, 2000, 8000], index=1, format_func=lambda count: f"{count:,}")
         
-        ax.add_patch(plt.Rectangle((5, 2), 3, 1, fc='#DBEAFE', ec='black', lw=2))
-        ax.text(6.5, 2.5, 'Page Table', ha='center', va='center', fontsize=10)
+        with st.spinner(f"Placing {vm_count:,} VMs with three strategies..."):
+            results = run_numa_placement(topology_name, vm_count)
         
-        # Arrows down
-        ax.arrow(2.5, 2, 0, -1, head_width=0.2, head_length=0.2, fc='black', ec='black')
-        ax.arrow(6.5, 2, 0, -1, head_width=0.2, head_length=0.2, fc='black', ec='black')
+        show_chart(viz_type, numa_chart_spec, topology_name, vm_count)
         
-        # Physical frame number + offset
-        ax.add_patch(plt.Rectangle((1, 0.5), 3, 1, fc='#93C5FD', ec='black', lw=2))
-        ax.text(2.5, 1, 'Physical Frame Number', ha='center', va='center', fontsize=10)
+        naive, affinity = results[0].summary(), results[-1].summary()
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Remote Accesses", f"{affinity['remote_access'] * 100:.1f}%", f"{(affinity['remote_access'] - naive['remote_access']) * 100:+.1f} pts vs first-fit", delta_color="inverse")
+        col2.metric("Relative Latency", f"{affinity['relative_latency']:.2f}x", f"{affinity['relative_latency'] - naive['relative_latency']:+.2f} vs first-fit", delta_color="inverse")
+        col3.metric("Cross-Host Group Traffic", f"{affinity['cross_host_traffic'] * 100:.0f}%", f"{(affinity['cross_host_traffic'] - naive['cross_host_traffic']) * 100:+.0f} pts vs first-fit", delta_color="inverse")
+        col4.metric("Placement Time", f"{affinity['seconds']:.1f} s", f"{affinity['hosts_used']} hosts", delta_color="off")
         
-        ax.add_patch(plt.Rectangle((4, 0.5), 3, 1, fc='#60A5FA', ec='black', lw=2))
-        ax.text(5.5, 1, 'Offset', ha='center', va='center', fontsize=10)
+        show_table(viz_type, numa_table, results)
         
-        # Final arrow to physical address
-        ax.arrow(4, 0.1, 0, -0.5, head_width=0.2, head_length=0.2, fc='black', ec='black')
+        show_visualization_text(viz_type)
+        st.caption(f"Metrics are for the affinity-aware placement, weighted by each VM's memory bandwidth. Latency is relative to an idle local node: the SLIT distance between a VM's vCPUs and its memory, stretched by the queueing delay of each memory controller. A node is contended above {NUMA_CONTENDED:.0%} of its bandwidth. `python -m vm_tutorial numa` places larger clusters from the command line.")
         
-        # Physical Address
-        ax.add_patch(plt.Rectangle((1, -1), 6, 1, fc='#BFDBFE', ec='black', lw=2))
-        ax.text(4, -0.5, 'Physical Address', ha='center', va='center', fontsize=11, fontweight='bold')
+    elif viz_type == "Memory Overcommit":
+        vms_col, ratio_col = st.columns(2)
+        vm_count = vms_col.selectbox("Virtual Machines", [50, 200, 1000], index=1)
+        overcommit = ratio_col.selectbox("Overcommit Ratio", [1.25, 1.5, 2.0], index=1, format_func=lambda ratio: f"{ratio:g}x")
         
-        # Connect TLB miss to page table
-        ax.arrow(3.5, 2.5, 1, 0, head_width=0.2, head_length=0.2, fc='red', ec='red')
-        ax.text(4, 2.8, 'TLB Miss', color='red', ha='center', va='center', fontsize=9)
+        with st.spinner(f"Simulating {vm_count} VMs for 24 hours..."):
+            results = run_overcommit(vm_count, overcommit)
         
-        # Setting the limits and removing the axes
-        ax.set_xlim(0, 10)
-        ax.set_ylim(-1.5, 6.5)
-        ax.axis('off')
+        show_chart(viz_type, overcommit_chart_spec, vm_count, overcommit)
         
-        st.pyplot(fig)
+        show_table(viz_type, overcommit_table, results)
         
-        st.markdown("<p class='text-content'>The diagram illustrates the memory address translation process in virtualized environments. When a program accesses memory using a virtual address, it first checks the <span class='highlight-term'>TLB</span> for a quick translation. If not found (TLB miss), the system consults the <span class='highlight-term'>Page Table</span> for the mapping between virtual pages and physical frames. The offset portion remains unchanged throughout the translation.</p>", unsafe_allow_html=True)
+        show_visualization_text(viz_type)
+        st.caption("Each VM has 1-16 GB, a daily working-set cycle and random load changes, simulated at one-second resolution. The host reclaims every 15 s up to 6% free memory; reclaim latency is how long free memory stays below 2% once it drops there.")
+
+    elif viz_type == "Page Replacement":
+        pattern_col, length_col = st.columns(2)
+        pattern_name = pattern_col.selectbox("Reference Pattern", list(REFERENCE_PATTERNS))
+        references = length_col.selectbox("References", [20_000, 100_000], format_func=lambda n: f"{n:,}")
         
-        st.markdown("<h2 class='section-header'>Cache Coherence in Multiprocessor Systems</h2>", unsafe_allow_html=True)
-        st.markdown("<p class='text-content'><span class='highlight-term'>Cache Coherence</span> ensures that multiple processors have a consistent view of <span class='highlight-term'>memory</span>. The <span class='highlight-term'>Snooping Protocol</span> monitors memory changes, while an <span class='highlight-term'>Invalidating Snooping Protocol</span> ensures consistency by removing outdated cache copies. <span class='highlight-term'>Directory-Based Coherence</span> scales better in large <span class='highlight-term'>multiprocessor</span> environments.</p>", unsafe_allow_html=True)
+        with st.spinner("Running the reference string through every policy..."):
+            curve, sizes, ratios = run_replacement(pattern_name, references)
         
-        st.markdown("<p class='text-content'><span class='highlight-term'>Write-Through Cache</span> writes data to both cache and main memory, while <span class='highlight-term'>Write-Back Cache</span> only writes to memory when necessary. <span class='highlight-term'>Cache Migration</span> moves frequently accessed data closer to the relevant <span class='highlight-term'>processor</span>. <span class='highlight-term'>Memory Consistency</span> defines rules for memory update visibility.</p>", unsafe_allow_html=True)
+        show_chart(viz_type, replacement_chart_spec, pattern_name, references)
         
-    with tabs[3]:
-        st.markdown("<h2 class='section-header'>Interactive Visualizations</h2>", unsafe_allow_html=True)
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Distinct Pages", f"{curve.distinct_pages:,}")
+        col2.metric("Compulsory Misses", f"{curve.cold_misses / curve.references:.1%}")
+        col3.metric("LRU Frames for 2x Compulsory Misses", f"{curve.frames_for(2 * curve.cold_misses / curve.references):,}")
         
-        viz_type = st.selectbox("Select Visualization", 
-                              ["VM Performance Comparison", "Memory Virtualization Overhead", "Cache Coherence Impact"])
+        show_table(viz_type, replacement_table, sizes, ratios)
         
-        if viz_type == "VM Performance Comparison":
-            # Sample data for VM performance
-            vm_types = ["Bare Metal", "Type 1 Hypervisor", "Type 2 Hypervisor", "Container"]
-            cpu_perf = [100, 95, 80, 98]
-            io_perf = [100, 92, 75, 95]
-            memory_perf = [100, 94, 85, 97]
-            
-            # Create bar chart
-            fig, ax = plt.subplots(figsize=(10, 6))
-            x = np.arange(len(vm_types))
-            width = 0.25
-            
-            ax.bar(x - width, cpu_perf, width, label='CPU Performance', color='#60A5FA')
-            ax.bar(x, io_perf, width, label='I/O Performance', color='#93C5FD')
-            ax.bar(x + width, memory_perf, width, label='Memory Performance', color='#BFDBFE')
-            
-            ax.set_title('Virtualization Performance Comparison (% of Bare Metal)', fontsize=14)
-            ax.set_ylabel('Performance (%)', fontsize=12)
-            ax.set_xticks(x)
-            ax.set_xticklabels(vm_types, fontsize=10)
-            ax.set_ylim(0, 110)
-            ax.legend()
-            ax.grid(axis='y', linestyle='--', alpha=0.7)
-            
-            st.pyplot(fig)
-            
-            st.markdown("<p class='text-content'>This chart compares the relative performance of different virtualization approaches. <span class='highlight-term'>Bare Metal</span> represents native hardware performance (100%). <span class='highlight-term'>Type 1 Hypervisors</span> achieve near-native performance, while <span class='highlight-term'>Type 2 Hypervisors</span> have more overhead due to the host OS layer. <span class='highlight-term'>Containers</span> offer lightweight virtualization with minimal performance impact.</p>", unsafe_allow_html=True)
-            
-        elif viz_type == "Memory Virtualization Overhead":
-            # Create line chart for memory access latency
-            page_sizes = [4, 8, 16, 32, 64, 128, 256]
-            native_latency = [1, 1, 1, 1, 1, 1, 1]
-            shadow_paging = [1.8, 1.65, 1.5, 1.4, 1.35, 1.3, 1.25]
-            nested_paging = [1.4, 1.35, 1.3, 1.25, 1.2, 1.15, 1.1]
-            
-            fig, ax = plt.subplots(figsize=(10, 6))
-            
-            ax.plot(page_sizes, native_latency, 'o-', label='Native', linewidth=2, color='#2563EB')
-            ax.plot(page_sizes, shadow_paging, 's-', label='Shadow Paging', linewidth=2, color='#60A5FA')
-            ax.plot(page_sizes, nested_paging, '^-', label='Nested Paging (EPT/NPT)', linewidth=2, color='#93C5FD')
-            
-            ax.set_title('Memory Access Latency by Page Size', fontsize=14)
-            ax.set_xlabel('Page Size (KB)', fontsize=12)
-            ax.set_ylabel('Relative Latency (lower is better)', fontsize=12)
-            ax.set_xscale('log', base=2)
-            ax.grid(True, linestyle='--', alpha=0.7)
-            ax.legend()
-            
-            st.pyplot(fig)
-            
-            st.markdown("<p class='text-content'>This chart illustrates how different memory virtualization techniques affect access latency. <span class='highlight-term'>Shadow Paging</span>, used in software virtualization, incurs higher overhead compared to hardware-assisted <span class='highlight-term'>Nested Paging</span> technologies like Intel EPT or AMD NPT. Larger page sizes generally reduce virtualization overhead by requiring fewer translations.</p>", unsafe_allow_html=True)
-            
-        elif viz_type == "Cache Coherence Impact":
-            # Create data for cache coherence impact
-            processors = [1, 2, 4, 8, 16, 32, 64]
-            bus_based = [1, 0.95, 0.85, 0.7, 0.5, 0.3, 0.2]
-            directory_based = [1, 0.98, 0.95, 0.9, 0.85, 0.8, 0.75]
-            
-            fig, ax = plt.subplots(figsize=(10, 6))
-            
-            ax.plot(processors, bus_based, 'o-', label='Bus-Based Snooping', linewidth=2, color='#60A5FA')
-            ax.plot(processors, directory_based, 's-', label='Directory-Based Protocol', linewidth=2, color='#93C5FD')
-            
-            ax.set_title('Cache Coherence Scalability', fontsize=14)
-            ax.set_xlabel('Number of Processors', fontsize=12)
-            ax.set_ylabel('Relative Performance', fontsize=12)
-            ax.set_xscale('log', base=2)
-            ax.grid(True, linestyle='--', alpha=0.7)
-            ax.legend()
-            
-            st.pyplot(fig)
-            
-            st.markdown("<p class='text-content'>This visualization demonstrates how different <span class='highlight-term'>Cache Coherence</span> protocols scale with increasing processor counts. <span class='highlight-term'>Bus-Based Snooping</span> protocols perform well with few processors but don't scale to large systems due to bus bandwidth limitations. <span class='highlight-term'>Directory-Based</span> protocols maintain better performance as the system size increases, making them suitable for large-scale multiprocessor systems.</p>", unsafe_allow_html=True)
+        show_visualization_text(viz_type)
+        st.caption("Miss ratios in percent. The LRU curve comes from one stack-distance pass over the reference string, which gives every memory size at once; the other policies are simulated at each marked size.")
 
-    with tabs[4]:
-        st.markdown("<h2 class='section-header'>Learning Resources</h2>", unsafe_allow_html=True)
-        
-        resource_tabs = st.tabs(["Videos", "Books & Papers", "Interactive Tools", "Courses"])
-        
-        with resource_tabs[0]:
+def show_resources_tab():
+    st.markdown("<h2 class='section-header'>Learning Resources</h2>", unsafe_allow_html=True)
+    
+    resource_tabs = st.tabs(["Videos", "Books & Papers", "Interactive Tools", "Courses"], key="resource_tab", on_change="rerun")
+    
+    with resource_tabs[0]:
+        if resource_tabs[0].open:
             st.markdown("<h3 class='subsection-header'>Video Tutorials</h3>", unsafe_allow_html=True)
             
-            video_resources = [
-                {
-                    "title": "Introduction to Virtual Machines",
-                    "creator": "TechWorld with Nana",
-                    "url": "https://www.youtube.com/watch?v=wX75Z-4MEoM",
-                    "description": "A beginner-friendly introduction to virtual machines and their benefits",
-                    "duration": "15:42"
-                },
-                {
-                    "title": "Memory Virtualization Explained",
-                    "creator": "Computer Science Center",
-                    "url": "https://www.youtube.com/watch?v=dZqOlaDaBhY",
-                    "description": "Technical explanation of how memory virtualization works in modern hypervisors",
-                    "duration": "48:23"
-                },
-                {
-                    "title": "Cache Coherence Protocols",
-                    "creator": "MIT OpenCourseWare",
-                    "url": "https://www.youtube.com/watch?v=rnGK12aQR6s",
-                    "description": "Detailed lecture on MESI and other cache coherence protocols",
-                    "duration": "52:10"
-                }
-            ]
-            
-            for video in video_resources:
+            for video in VIDEO_RESOURCES:
                 st.markdown(f"""
                 <div style="padding: 1rem; margin-bottom: 1rem; border: 1px solid #E5E7EB; border-radius: 0.5rem;">
                     <h4 style="margin: 0; font-size: 1.2rem; color: #2563EB;">{video['title']}</h4>
@@ -440,34 +559,11 @@ def main():
                 </div>
                 """, unsafe_allow_html=True)
         
-        with resource_tabs[1]:
+    with resource_tabs[1]:
+        if resource_tabs[1].open:
             st.markdown("<h3 class='subsection-header'>Books & Research Papers</h3>", unsafe_allow_html=True)
             
-            book_resources = [
-                {
-                    "title": "A Primer on Memory Consistency and Cache Coherence",
-                    "authors": "Daniel J. Sorin, Mark D. Hill, and David A. Wood",
-                    "year": "2011",
-                    "description": "Comprehensive reference on memory consistency models and cache coherence protocols",
-                    "type": "Book"
-                },
-                {
-                    "title": "Parallel Computer Architecture: A Hardware/Software Approach",
-                    "authors": "David Culler and Jaswinder Pal Singh",
-                    "year": "1999",
-                    "description": "Foundational text covering parallel computing, including cache coherence and memory systems",
-                    "type": "Book"
-                },
-                {
-                    "title": "Memory Resource Management in VMware ESXi",
-                    "authors": "Carl Waldspurger",
-                    "year": "2002",
-                    "description": "Classic paper describing memory management techniques in virtualized environments",
-                    "type": "Research Paper"
-                }
-            ]
-            
-            for resource in book_resources:
+            for resource in BOOK_RESOURCES:
                 st.markdown(f"""
                 <div style="padding: 1rem; margin-bottom: 1rem; border: 1px solid #E5E7EB; border-radius: 0.5rem;">
                     <h4 style="margin: 0; font-size: 1.2rem; color: #2563EB;">{resource['title']}</h4>
@@ -476,120 +572,132 @@ def main():
                 </div>
                 """, unsafe_allow_html=True)
         
-        with resource_tabs[2]:
+    with resource_tabs[2]:
+        if resource_tabs[2].open:
             st.markdown("<h3 class='subsection-header'>Interactive Learning Tools</h3>", unsafe_allow_html=True)
             
-            st.markdown("""
-            <div style="padding: 1.5rem; margin-bottom: 1.5rem; border: 1px solid #BFDBFE; border-radius: 0.5rem; background-color: #EFF6FF;">
-                <h4 style="margin: 0 0 1rem 0; font-size: 1.2rem; color: #2563EB;">Virtual Machine Simulator</h4>
-                <p>Try this interactive simulator to explore how virtual machines manage resources:</p>
+            # Virtual machine simulator backed by the discrete-event host model
+            with st.container(border=True):
+                st.markdown("<h4 style='margin: 0 0 1rem 0; font-size: 1.2rem; color: #2563EB;'>Virtual Machine Simulator</h4>", unsafe_allow_html=True)
+                st.markdown("<p>Try this interactive simulator to explore how virtual machines manage resources:</p>", unsafe_allow_html=True)
+            
+                memory_options = {"512 MB": 512, "1 GB": 1024, "2 GB": 2048, "4 GB": 4096}
+                vm_specs = []
+                for vm_number in (1, 2):
+                    label_col, memory_col, cpu_col, workload_col = st.columns([1, 2, 2, 2])
+                    label_col.markdown(f"**VM {vm_number}**")
+                    vm_memory = memory_col.selectbox("Memory", list(memory_options), index=2, key=f"sim_vm{vm_number}_memory")
+                    vm_cpus = cpu_col.selectbox("CPUs", [1, 2, 4], key=f"sim_vm{vm_number}_cpus")
+                    vm_workload = workload_col.selectbox("Workload", list(WORKLOAD_PRESETS), index=vm_number - 1, key=f"sim_vm{vm_number}_workload")
+                    vm_specs.append(VMSpec(vcpus=vm_cpus, memory_mb=memory_options[vm_memory], **WORKLOAD_PRESETS[vm_workload]))
+            
+                pcpu_col, host_memory_col, background_col, scheduler_col = st.columns(4)
+                host_pcpus = pcpu_col.selectbox("Host CPUs", [1, 2, 4, 8, 16], index=1)
+                host_memory = host_memory_col.selectbox("Host Memory", ["2 GB", "4 GB", "8 GB", "16 GB"], index=1)
+                background_vms = background_col.number_input("Background VMs", min_value=0, max_value=10000, value=0, step=10)
+                scheduler_name = scheduler_col.selectbox("CPU Scheduler", list(SCHEDULERS))
+            
+                if st.button("Run Simulation"):
+                    background_spec = VMSpec(vcpus=1, memory_mb=1024, **WORKLOAD_PRESETS["Interactive"])
+                    host = HostSpec(pcpus=host_pcpus, memory_mb=int(host_memory.split()[0]) * 1024)
+                    simulation = HostSimulation(host, vm_specs + [background_spec] * background_vms, SCHEDULERS[scheduler_name]())
+                    result = simulation.run(duration_ms=30_000, max_events=1_000_000)
                 
-                <div style="margin: 1rem 0; padding: 1rem; background-color: white; border-radius: 0.5rem; border: 1px solid #DBEAFE;">
-                    <div style="display: flex; justify-content: space-between; margin-bottom: 1rem;">
-                        <div style="font-weight: bold;">VM 1</div>
-                        <div>
-                            <label style="margin-right: 0.5rem;">Memory:</label>
-                            <select>
-                                <option>512 MB</option>
-                                <option>1 GB</option>
-                                <option>2 GB</option>
-                                <option>4 GB</option>
-                            </select>
-                        </div>
-                        <div>
-                            <label style="margin-right: 0.5rem;">CPUs:</label>
-                            <select>
-                                <option>1</option>
-                                <option>2</option>
-                                <option>4</option>
-                            </select>
-                        </div>
-                    </div>
-                    
-                    <div style="display: flex; justify-content: space-between; margin-bottom: 1rem;">
-                        <div style="font-weight: bold;">VM 2</div>
-                        <div>
-                            <label style="margin-right: 0.5rem;">Memory:</label>
-                            <select>
-                                <option>512 MB</option>
-                                <option>1 GB</option>
-                                <option>2 GB</option>
-                                <option>4 GB</option>
-                            </select>
-                        </div>
-                        <div>
-                            <label style="margin-right: 0.5rem;">CPUs:</label>
-                            <select>
-                                <option>1</option>
-                                <option>2</option>
-                                <option>4</option>
-                            </select>
-                        </div>
-                    </div>
-                    
-                    <div style="text-align: center; margin-top: 1rem;">
-                        <button style="background-color: #2563EB; color: white; border: none; padding: 0.5rem 1rem; border-radius: 0.25rem; cursor: pointer;">
-                            Run Simulation
-                        </button>
-                    </div>
-                </div>
+                    util_col, steal_col, events_col = st.columns(3)
+                    util_col.metric("Host CPU Utilization", f"{result.host_utilization:.0%}")
+                    steal_col.metric("Mean Steal Time", f"{result.steal_fraction.mean():.1%}")
+                    events_col.metric("Events Simulated", f"{result.events:,}", f"{result.events_per_second / 1e6:.2f}M events/s", delta_color="off")
                 
-                <p style="font-size: 0.9rem; margin-top: 1rem;">Note: This is a mock interface. In a real application, the simulator would show resource allocation and performance metrics.</p>
-            </div>
+                    rows = [("VM 1", 0), ("VM 2", 1)]
+                    if background_vms:
+                        rows.append((f"Background VMs (mean of {background_vms})", slice(2, None)))
+                    st.dataframe({
+                        "VM": [label for label, _ in rows],
+                        "Throughput (req/s)": [float(np.mean(result.throughput[index])) for _, index in rows],
+                        "Steal Time": [f"{np.mean(result.steal_fraction[index]):.1%}" for _, index in rows],
+                        "p50 Latency (ms)": [float(np.nanmean(result.latency_p50[index])) for _, index in rows],
+                        "p99 Latency (ms)": [float(np.nanmean(result.latency_p99[index])) for _, index in rows],
+                        "Ballooned (MB)": [float(np.mean(result.balloon_mb[index])) for _, index in rows],
+                        "Memory Pressure": [f"{np.mean(result.memory_pressure[index]):.0%}" for _, index in rows],
+                    }, hide_index=True)
+                    st.caption(f"{result.sim_ms / 1000:.1f} s of simulated time under the {result.scheduler} scheduler. Memory pressure is the share of time a VM's working set did not fit after ballooning.")
             
-            <div style="padding: 1.5rem; margin-bottom: 1.5rem; border: 1px solid #BFDBFE; border-radius: 0.5rem; background-color: #EFF6FF;">
-                <h4 style="margin: 0 0 1rem 0; font-size: 1.2rem; color: #2563EB;">Memory Address Translator</h4>
-                <p>Enter a virtual address to see how it translates to a physical address:</p>
-                
-                <div style="margin: 1rem 0; padding: 1rem; background-color: white; border-radius: 0.5rem; border: 1px solid #DBEAFE;">
-                    <div style="display: flex; align-items: center; margin-bottom: 1rem;">
-                        <label style="margin-right: 0.5rem; font-weight: bold;">Virtual Address (hex):</label>
-                        <input type="text" placeholder="0x12345678" style="padding: 0.5rem; border: 1px solid #D1D5DB; border-radius: 0.25rem;">
-                        <button style="background-color: #2563EB; color: white; border: none; padding: 0.5rem 1rem; border-radius: 0.25rem; margin-left: 0.5rem; cursor: pointer;">
-                            Translate
-                        </button>
-                    </div>
-                    
+            # Memory address translator backed by the translation engine
+            with st.container(border=True):
+                st.markdown("<h4 style='margin: 0 0 1rem 0; font-size: 1.2rem; color: #2563EB;'>Memory Address Translator</h4>", unsafe_allow_html=True)
+                st.markdown("<p>Enter a virtual address to see how it translates to a physical address:</p>", unsafe_allow_html=True)
+            
+                mode_col, policy_col = st.columns(2)
+                paging_mode = mode_col.selectbox("Paging Mode", list(PAGING_MODES))
+                tlb_policy = policy_col.selectbox("TLB Replacement", ["LRU", "FIFO", "Random"])
+                paging_config = PAGING_MODES[paging_mode]
+            
+                # Each session keeps its own MMU so repeated lookups warm the TLB; an idle session's MMU is evicted
+                translator = get_session_store().get(session_id(), "translator", (paging_mode, tlb_policy),
+                                                     lambda: AddressTranslator(paging_config, TLB(entries=64, ways=4, policy=tlb_policy.lower())))
+                if st.session_state.get("translator_settings") != (paging_mode, tlb_policy):
+                    st.session_state.translator_settings = (paging_mode, tlb_policy)
+                    st.session_state.last_translation = None
+            
+                address_text = st.text_input("Virtual Address (hex)", placeholder="0x12345678")
+                if st.button("Translate"):
+                    try:
+                        vaddr = int(address_text.strip(), 16)
+                    except ValueError:
+                        vaddr = -1
+                    if not 0 <= vaddr < (1 << paging_config.va_bits):
+                        st.error(f"Enter a hexadecimal address within the {paging_config.va_bits}-bit virtual address space.")
+                    else:
+                        result = translator.translate([vaddr])
+                        # Plain integers rather than the result arrays
+                        st.session_state.last_translation = (vaddr, int(result.paddrs[0]), bool(result.hits[0]),
+                                                             bool(result.faults[0]), int(result.walk_refs[0]))
+            
+                if st.session_state.last_translation:
+                    vaddr, paddr, hit, fault, walk_refs = st.session_state.last_translation
+                    vpn = vaddr >> paging_config.page_shift
+                    level_indices = ", ".join(f"L{paging_config.levels - level}: {index:#x}" for level, index in enumerate(paging_config.level_indices(vpn)))
+                    if fault:
+                        outcome = f"Page fault: page demand-mapped to a free frame after a {walk_refs}-entry walk"
+                    elif hit:
+                        outcome = "TLB hit: no page walk needed"
+                    else:
+                        outcome = f"TLB miss: page walk read {walk_refs} page-table entries"
+                    st.markdown(f"""
                     <div style="background-color: #F9FAFB; padding: 1rem; border-radius: 0.25rem;">
-                        <div style="margin-bottom: 0.5rem;"><strong>Page Number:</strong> <span>0x123</span></div>
-                        <div style="margin-bottom: 0.5rem;"><strong>Offset:</strong> <span>0x45678</span></div>
-                        <div style="margin-bottom: 0.5rem;"><strong>Physical Frame:</strong> <span>0xABC</span></div>
-                        <div><strong>Physical Address:</strong> <span>0xABC45678</span></div>
+                        <div style="margin-bottom: 0.5rem;"><strong>Page Number:</strong> <span>{vpn:#x}</span> ({level_indices})</div>
+                        <div style="margin-bottom: 0.5rem;"><strong>Offset:</strong> <span>{vaddr & (paging_config.page_size - 1):#x}</span></div>
+                        <div style="margin-bottom: 0.5rem;"><strong>Physical Frame:</strong> <span>{paddr >> paging_config.page_shift:#x}</span></div>
+                        <div style="margin-bottom: 0.5rem;"><strong>Physical Address:</strong> <span>{paddr:#x}</span></div>
+                        <div><strong>Result:</strong> <span>{outcome}</span></div>
                     </div>
-                </div>
-                
-                <p style="font-size: 0.9rem; margin-top: 1rem;">Note: This is a mock interface. In a real application, the translator would perform actual calculations.</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with resource_tabs[3]:
-            st.markdown("<h3 class='subsection-header'>Online Courses</h3>", unsafe_allow_html=True)
+                    """, unsafe_allow_html=True)
+            
+                # Batch mode: push a synthetic trace through a fresh MMU
+                trace_millions = st.slider("Synthetic trace length (millions of accesses)", 1, 10, 2)
+                if st.button("Translate Trace"):
+                    trace = synthetic_trace(trace_millions * 1_000_000, paging_config)
+                    batch_translator = AddressTranslator(paging_config, TLB(entries=64, ways=4, policy=tlb_policy.lower()))
+                    started = time.perf_counter()
+                    summary = batch_translator.translate(trace).summary()
+                    show_translation_metrics(summary, time.perf_counter() - started)
+                    st.caption("The synthetic trace is mostly a sequential sweep, whose runs of same-page accesses cost one TLB lookup each; traces of random pages translate at 2-4M/s.")
             
-            course_resources = [
-                {
-                    "title": "Cloud Computing Specialization",
-                    "provider": "Coursera (University of Illinois)",
-                    "url": "https://www.coursera.org/specializations/cloud-computing",
-                    "description": "Comprehensive course series covering virtualization, cloud infrastructure, and distributed systems",
-                    "level": "Intermediate"
-                },
-                {
-                    "title": "Advanced Operating Systems",
-                    "provider": "edX (Georgia Tech)",
-                    "url": "https://www.edx.org/course/advanced-operating-systems",
-                    "description": "Covers advanced OS concepts including memory management and virtualization technologies",
-                    "level": "Advanced"
-                },
-                {
-                    "title": "Virtualization for Beginners",
-                    "provider": "Udemy",
-                    "url": "https://www.udemy.com/course/virtualization-for-beginners",
-                    "description": "Practical introduction to setting up and managing virtual machines with hands-on exercises",
-                    "level": "Beginner"
-                }
-            ]
+                # Recorded workloads are streamed chunk by chunk into the same model
+                trace_file = st.file_uploader("Or upload a memory trace (Valgrind lackey, Pin pinatrace or binary trace)")
+                trace_format = st.radio("Text trace format", sorted(TEXT_FORMATS), horizontal=True)
+                if trace_file is not None and st.button("Translate Uploaded Trace"):
+                    trace_translator = AddressTranslator(paging_config, TLB(entries=64, ways=4, policy=tlb_policy.lower()))
+                    started = time.perf_counter()
+                    summary = summarize(translate_stream(trace_translator, iter_trace(trace_file.getvalue(), fmt=trace_format)))
+                    show_translation_metrics(summary, time.perf_counter() - started)
+                st.caption("Large traces translate faster from the binary format: python -m vm_tutorial convert-trace trace.txt trace.bin")
+        
+    with resource_tabs[3]:
+        if resource_tabs[3].open:
+            st.markdown("<h3 class='subsection-header'>Online Courses</h3>", unsafe_allow_html=True)
             
-            for course in course_resources:
+            for course in COURSE_RESOURCES:
                 st.markdown(f"""
                 <div style="padding: 1rem; margin-bottom: 1rem; border: 1px solid #E5E7EB; border-radius: 0.5rem;">
                     <h4 style="margin: 0; font-size: 1.2rem; color: #2563EB;">{course['title']}</h4>
@@ -601,18 +709,73 @@ def main():
                 </div>
                 """, unsafe_allow_html=True)
         
-        st.markdown("<h3 class='subsection-header'>References</h3>", unsafe_allow_html=True)
-        st.markdown("<div class='references'>", unsafe_allow_html=True)
-        st.markdown("""
-        <ul>
-            <li><strong>Intel VT-x and AMD-V documentation</strong> - <a href="https://www.intel.com/content/www/us/en/virtualization/virtualization-technology/intel-virtualization-technology.html" target="_blank">Intel</a></li>
-            <li><strong>VMware ESXi official documentation</strong> - <a href="https://docs.vmware.com/en/VMware-vSphere/index.html" target="_blank">VMware</a></li>
-            <li><strong>Microsoft Hyper-V documentation</strong> - <a href="https://learn.microsoft.com/en-us/windows-server/virtualization/hyper-v/hyper-v-technology-overview" target="_blank">Microsoft</a></li>
-            <li><strong>Research paper on memory virtualization</strong> - <a href="https://www.usenix.org/system/files/conference/osdi14/osdi14-paper-belay.pdf" target="_blank">USENIX</a></li>
-            <li><strong>Cache Coherence for Modern Multicore Processors</strong> - <a href="https://scholar.google.com/scholar?q=Cache+Coherence+for+Modern+Multicore+Processors" target="_blank">Google Scholar</a></li>
-        </ul>
-        """, unsafe_allow_html=True)
-        st.markdown("</div>", unsafe_allow_html=True)
+    st.markdown("<h3 class='subsection-header'>References</h3>", unsafe_allow_html=True)
+    st.markdown("<div class='references'>", unsafe_allow_html=True)
+    reference_items = "".join(f'<li><strong>{reference["title"]}</strong> - <a href="{reference["url"]}" target="_blank">{reference["source"]}</a></li>' for reference in REFERENCES)
+    st.markdown(f"<ul>{reference_items}</ul>", unsafe_allow_html=True)
+    st.markdown("</div>", unsafe_allow_html=True)
+
+def show_profiling_panel():
+    with st.expander("Profiling", expanded=True):
+        rows = RECORDER.rows()
+        st.dataframe({
+            "Kind": [row["kind"] for row in rows],
+            "Name": [row["name"] for row in rows],
+            "Count": [row["count"] for row in rows],
+            "Mean (ms)": [round(row["mean_ms"], 1) for row in rows],
+            "p50 (ms)": [round(row["p50_ms"], 1) for row in rows],
+            "p95 (ms)": [round(row["p95_ms"], 1) for row in rows],
+            "p99 (ms)": [round(row["p99_ms"], 1) for row in rows],
+        }, hide_index=True)
+        st.caption("All profiled sessions of this server process, up to the previous rerun. Percentiles are estimated from histogram buckets.")
+        st.download_button("Prometheus metrics", RECORDER.prometheus(), file_name="vm_tutorial.prom", mime="text/plain")
+
+@st.cache_resource(show_spinner=False)
+def start_metrics_endpoint(port):
+    return RECORDER.serve(port)
+
+def export_metrics():
+    if os.environ.get("VM_TUTORIAL_METRICS_PORT"):
+        start_metrics_endpoint(int(os.environ["VM_TUTORIAL_METRICS_PORT"]))
+    if os.environ.get("VM_TUTORIAL_METRICS_FILE"):
+        RECORDER.export(os.environ["VM_TUTORIAL_METRICS_FILE"])
+
+def main():
+    st.set_page_config(
+        page_title="Virtual Machines and Memory Virtualization",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+    start_warm_up()
+    get_session_store().touch(session_id())
+    st.session_state.profiling = profiling_enabled()
+
+    with timed("rerun", "main"):
+        # Custom CSS for better styling, shared with the static export
+        with timed("section", "css"):
+            st.markdown(f"<style>{stylesheet()}</style>", unsafe_allow_html=True)
+
+        # Sidebar enhancements
+        with st.sidebar, timed("section", "sidebar"):
+            show_learning_tools()
+
+        # Main content area
+        st.markdown("<h1 class='main-header'>Virtual Machines and Memory Virtualization</h1>", unsafe_allow_html=True)
+        
+        # Create tabs for different sections
+        tabs = st.tabs(TABS, key="section_tab", on_change="rerun")
+        
+        # Only the selected tab's section runs; the others stay empty until opened
+        for name, tab, show_tab in zip(TABS, tabs, (show_overview_tab, show_concepts_tab, show_memory_tab, show_visualizations_tab, show_resources_tab)):
+            with tab:
+                if tab.open:
+                    with timed("section", f"tab:{name}"):
+                        show_tab()
+
+    if st.session_state.profiling:
+        with st.sidebar:
+            show_profiling_panel()
+        export_metrics()
 
 # Run the application
 if __name__ == "__main__":
@@ -0,0 +1,101 @@
+"""Cold-start import time of the Streamlit app.
+
+Runs the module-level imports of ``app.py`` (read from its source, so the
+benchmark follows the app as it changes) in fresh interpreters under
+``python -X importtime`` and reports the median total and the packages
+that take the most time. Heavy libraries the app imports lazily do not
+show up here; ``--module`` measures any other module the same way.
+
+    python benchmarks/import_time.py --runs 7 --out import_time.json --budget-ms 1500
+
+With ``--budget-ms`` the exit status is 1 when the median exceeds the
+budget, so CI catches a heavy import creeping back into the start path.
+"""
+
+import argparse
+import ast
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+
+
+def app_imports(path=APP):
+    """Source of the module-level import statements of ``path``."""
+    with open(path, encoding="utf-8") as stream:
+        tree = ast.parse(stream.read())
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def measure(code):
+    """One cold run of ``code``: total microseconds and self microseconds per module."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    total = 0
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Entries without indentation were imported by the code itself; their sum is the total
+        if not name.startswith("  "):
+            total += int(cumulative_us)
+        modules[name.strip()] = int(self_us)
+    return total, modules
+
+
+def report(code, runs=5):
+    totals = []
+    self_times = defaultdict(list)
+    for _ in range(runs):
+        total, modules = measure(code)
+        totals.append(total)
+        for name, self_us in modules.items():
+            self_times[name].append(self_us)
+    packages = defaultdict(float)
+    for name, samples in self_times.items():
+        packages[name.split(".")[0]] += statistics.median(samples)
+    return {
+        "python": platform.python_version(),
+        "runs": runs,
+        "total_ms": statistics.median(totals) / 1000,
+        "samples_ms": [total / 1000 for total in totals],
+        "modules": len(self_times),
+        "packages_ms": {name: round(us / 1000, 1) for name, us in sorted(packages.items(), key=lambda item: -item[1])},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--module", help="module to import instead of the app's imports")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to start")
+    parser.add_argument("--top", type=int, default=12, help="packages to list")
+    parser.add_argument("--out", help="write the report to this JSON file")
+    parser.add_argument("--budget-ms", type=float, help="fail when the median total exceeds this")
+    args = parser.parse_args(argv)
+
+    code = f"import {args.module}" if args.module else app_imports()
+    result = report(code, args.runs)
+    result["measured"] = args.module or "app.py imports"
+    print(f"{result['measured']}: {result['total_ms']:.0f} ms median over {args.runs} runs "
+          f"({min(result['samples_ms']):.0f}-{max(result['samples_ms']):.0f} ms), {result['modules']} modules")
+    for name, ms in list(result["packages_ms"].items())[:args.top]:
+        print(f"  {name:<24} {ms:8.1f} ms")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as stream:
+            json.dump(result, stream, indent=2)
+    if args.budget_ms is not None and result["total_ms"] > args.budget_ms:
+        print(f"Import time {result['total_ms']:.0f} ms exceeds the budget of {args.budget_ms:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
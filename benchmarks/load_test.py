@@ -0,0 +1,287 @@
+"""Load test: many concurrent sessions against a running Streamlit server.
+
+Each virtual user opens its own websocket session on ``/_stcore/stream``,
+speaks Streamlit's protobuf protocol the way the browser does and scripts
+a realistic flow: switching tabs, browsing the Terminology Explorer,
+answering quiz questions and changing the visualization. Widget ids are
+read from the deltas of the previous run, and every rerun request carries
+the full widget state, as the frontend sends it. Rerun latency is measured
+from sending the request to the server's ``script_finished`` message.
+
+    python benchmarks/load_test.py --start-server --users 20 --duration 60
+    python benchmarks/load_test.py --url ws://localhost:8501 --server-pid 1234 --users 50
+
+The report gives throughput, p50/p95/p99 latency overall and per action,
+errors, and the server's resident memory. One warm-up session runs every
+action before the users connect, so imports and caches are loaded; what
+that costs is reported as cold-start growth, and the per-session figure
+is the growth from after the warm-up to after all users have run. With
+``--max-p95-ms`` or ``--max-errors`` the exit status is 1 when the run is
+over budget, so the test can gate CI against a local server.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from websockets.asyncio.client import connect
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+# Relative frequency of each scripted action
+ACTIONS = {"switch_tab": 4, "browse_terms": 3, "answer_quiz": 2, "change_visualization": 2}
+# Cheap enough to pick at random; the others run long simulations on a cold cache
+VISUALIZATIONS = ("VM Performance Comparison", "Memory Virtualization Overhead", "Cache Coherence Impact",
+                  "Memory Overcommit", "Page Replacement")
+_FINISHED_EARLY_FOR_RERUN = 2
+_WIDGETS = ("selectbox", "button", "text_input")
+
+
+class Session:
+    """One browser tab: a websocket, the widgets of the last run and their current values."""
+
+    def __init__(self, url, query_string=""):
+        self.url = url.rstrip("/") + "/_stcore/stream"
+        self.query_string = query_string
+        self.widgets = {}
+        self.states = {}
+        self.errors = 0
+
+    async def __aenter__(self):
+        self.socket = await connect(self.url, subprotocols=["streamlit"], max_size=None)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.socket.close()
+
+    async def rerun(self, changes=(), trigger=None):
+        """Rerun with ``changes`` applied to the widget state (and ``trigger`` pressed); returns seconds."""
+        for widget_id, field, value in changes:
+            self.states[widget_id] = (field, value)
+        message = BackMsg()
+        message.rerun_script.query_string = self.query_string
+        message.rerun_script.page_script_hash = ""
+        for widget_id, (field, value) in self.states.items():
+            state = message.rerun_script.widget_states.widgets.add(id=widget_id)
+            setattr(state, field, value)
+        if trigger:
+            message.rerun_script.widget_states.widgets.add(id=trigger, trigger_value=True)
+        started = time.perf_counter()
+        await self.socket.send(message.SerializeToString())
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(await self.socket.recv())
+            kind = forward.WhichOneof("type")
+            if kind == "delta":
+                self._read_delta(forward.delta)
+            elif kind == "script_finished" and forward.script_finished != _FINISHED_EARLY_FOR_RERUN:
+                return time.perf_counter() - started
+
+    def _read_delta(self, delta):
+        kind = delta.WhichOneof("type")
+        if kind == "new_element":
+            element = delta.new_element
+            widget = element.WhichOneof("type")
+            if widget in _WIDGETS:
+                proto = getattr(element, widget)
+                options = list(proto.options) if widget == "selectbox" else []
+                self.widgets[proto.label] = (widget, proto.id, options)
+            elif widget == "exception":
+                self.errors += 1
+        elif kind == "add_block" and delta.add_block.WhichOneof("type") == "tab_container":
+            self.widgets["tabs"] = ("tabs", delta.add_block.tab_container.id, [])
+
+    def widget(self, label):
+        return self.widgets.get(label, (None, None, []))
+
+    def select(self, label, value):
+        _, widget_id, _ = self.widget(label)
+        return [(widget_id, "string_value", value)] if widget_id else []
+
+
+class VirtualUser:
+    def __init__(self, session, rng, tabs):
+        self.session = session
+        self.rng = rng
+        self.tabs = tabs
+
+    async def switch_tab(self):
+        return await self.session.rerun(self.session.select("tabs", self.rng.choice(self.tabs)))
+
+    async def browse_terms(self):
+        _, _, categories = self.session.widget("Select Category")
+        elapsed = await self.session.rerun(self.session.select("Select Category", self.rng.choice(categories)))
+        _, _, terms = self.session.widget("Select a Term")
+        return elapsed + await self.session.rerun(self.session.select("Select a Term", self.rng.choice(terms)))
+
+    async def answer_quiz(self):
+        _, generate, _ = self.session.widget("Generate Quiz Question")
+        elapsed = await self.session.rerun(trigger=generate)
+        options = [widget_id for kind, widget_id, _ in self.session.widgets.values()
+                   if kind == "button" and "quiz_option_" in widget_id]
+        if options:
+            elapsed += await self.session.rerun(trigger=self.rng.choice(options))
+        return elapsed
+
+    async def change_visualization(self):
+        if self.session.states.get(self.session.widget("tabs")[1], (None, None))[1] != "Visualizations":
+            await self.session.rerun(self.session.select("tabs", "Visualizations"))
+        return await self.session.rerun(self.session.select("Select Visualization", self.rng.choice(VISUALIZATIONS)))
+
+
+def server_rss(pid):
+    """Resident set size of process ``pid`` in bytes, from /proc."""
+    with open(f"/proc/{pid}/status", encoding="ascii") as stream:
+        for line in stream:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+async def run_user(index, args, tabs, deadline, latencies, counts, ready):
+    rng = random.Random(args.seed + index)
+    async with Session(args.url, args.query) as session:
+        latencies["open"].append(await session.rerun())
+        ready.append(index)
+        user = VirtualUser(session, rng, tabs)
+        names, weights = zip(*ACTIONS.items())
+        while time.monotonic() < deadline:
+            await asyncio.sleep(rng.expovariate(1000 / args.think_ms) if args.think_ms else 0)
+            action = rng.choices(names, weights)[0]
+            latencies[action].append(await getattr(user, action)())
+            counts["actions"] += 1
+        counts["errors"] += session.errors
+
+
+async def warm_up(args, tabs):
+    """Run every action and visualization once in a session of its own; returns the errors it saw."""
+    async with Session(args.url, args.query) as session:
+        await session.rerun()
+        user = VirtualUser(session, random.Random(args.seed - 1), tabs)
+        for action in ACTIONS:
+            await getattr(user, action)()
+        for visualization in VISUALIZATIONS:
+            await session.rerun(session.select("Select Visualization", visualization))
+        return session.errors
+
+
+def _percentiles(samples):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    return {"count": len(ordered), "p50_ms": pick(0.5), "p95_ms": pick(0.95), "p99_ms": pick(0.99),
+            "mean_ms": statistics.fmean(ordered) * 1000}
+
+
+async def load_test(args, pid=None):
+    from vm_tutorial.content import TABS
+    latencies = defaultdict(list)
+    counts = defaultdict(int)
+    ready = []
+    rss_start = server_rss(pid) if pid else None
+    counts["errors"] += await warm_up(args, TABS)
+    rss_before = server_rss(pid) if pid else None
+    started = time.monotonic()
+    deadline = started + args.ramp + args.duration
+    tasks = []
+    for index in range(args.users):
+        tasks.append(asyncio.create_task(run_user(index, args, TABS, deadline, latencies, counts, ready)))
+        await asyncio.sleep(args.ramp / max(args.users, 1))
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    elapsed = time.monotonic() - started
+    failures = [repr(result) for result in results if isinstance(result, BaseException)]
+    rss_after = server_rss(pid) if pid else None
+    reruns = [seconds for action, samples in latencies.items() if action != "open" for seconds in samples]
+    report = {
+        "users": args.users,
+        "sessions_opened": len(ready),
+        "seconds": elapsed,
+        "actions": counts["actions"],
+        "throughput_actions_per_second": counts["actions"] / elapsed,
+        "errors": counts["errors"] + len(failures),
+        "failures": failures[:5],
+        "latency": _percentiles(reruns) if reruns else None,
+        "per_action": {action: _percentiles(samples) for action, samples in latencies.items()},
+    }
+    if pid:
+        report["server_rss_mb"] = {"start": rss_start / 2**20, "cold_start": (rss_before - rss_start) / 2**20,
+                                   "before": rss_before / 2**20, "after": rss_after / 2**20,
+                                   "per_session": (rss_after - rss_before) / 2**20 / max(len(ready), 1)}
+    return report
+
+
+def start_server(port):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    server = subprocess.Popen([sys.executable, "-m", "streamlit", "run", APP, "--server.headless", "true",
+                               "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(120):
+        try:
+            with urllib.request.urlopen(f"http://localhost:{port}/_stcore/health", timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError(f"Streamlit did not become healthy on port {port}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--url", default="ws://localhost:8501", help="server to test")
+    parser.add_argument("--start-server", action="store_true", help="start app.py on --port and stop it afterwards")
+    parser.add_argument("--port", type=int, default=8599, help="port for --start-server")
+    parser.add_argument("--server-pid", type=int, help="server process to measure memory of (set by --start-server)")
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds every user keeps acting once all are on")
+    parser.add_argument("--ramp", type=float, default=5, help="seconds over which users connect")
+    parser.add_argument("--think-ms", type=float, default=500, help="mean pause between a user's actions")
+    parser.add_argument("--query", default="", help="query string of every session, e.g. profile=1")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the report to this JSON file")
+    parser.add_argument("--max-p95-ms", type=float, help="fail when the p95 rerun latency exceeds this")
+    parser.add_argument("--max-errors", type=int, help="fail when more errors than this occur")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, ROOT)
+    server = None
+    pid = args.server_pid
+    if args.start_server:
+        server = start_server(args.port)
+        args.url = f"ws://localhost:{args.port}"
+        pid = server.pid
+    try:
+        report = asyncio.run(load_test(args, pid))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    latency = report["latency"] or {"p50_ms": 0, "p95_ms": 0, "p99_ms": 0}
+    print(f"{report['sessions_opened']}/{args.users} sessions, {report['actions']} actions in {report['seconds']:.1f}s: "
+          f"{report['throughput_actions_per_second']:.1f} actions/s, {report['errors']} errors")
+    print(f"rerun latency p50 {latency['p50_ms']:.0f} ms, p95 {latency['p95_ms']:.0f} ms, p99 {latency['p99_ms']:.0f} ms")
+    for action, stats in report["per_action"].items():
+        print(f"  {action:<22} {stats['count']:6d} x  p50 {stats['p50_ms']:7.0f} ms  p95 {stats['p95_ms']:7.0f} ms")
+    if "server_rss_mb" in report:
+        memory = report["server_rss_mb"]
+        print(f"server RSS {memory['start']:.0f} MB, +{memory['cold_start']:.0f} MB cold start, "
+              f"{memory['before']:.0f} -> {memory['after']:.0f} MB, {memory['per_session']:.2f} MB per session")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as stream:
+            json.dump(report, stream, indent=2)
+    over = ((args.max_p95_ms is not None and latency["p95_ms"] > args.max_p95_ms)
+            or (args.max_errors is not None and report["errors"] > args.max_errors))
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""Memory of the app's per-session state over many simulated sessions.
+
+Plays ``--sessions`` short visits through the same per-session code the
+app runs, in one process: each visit answers a few quiz questions into its
+``QuizState``, translates addresses on an MMU fetched from a
+``SessionStore`` and keeps the compact values the app keeps in
+``st.session_state``. At most ``--live`` visits are open at once; older
+ones end, dropping their session state as Streamlit does once a tab has
+disconnected, while the store evicts their MMUs once they are idle on a
+simulated clock. Every ``--figure-every`` visits draws a diagram through
+``figure_bytes`` to check that no figure outlives its rendering.
+
+    python benchmarks/session_memory.py --sessions 10000 --max-growth-mb 16
+
+Resident memory is sampled ten times; growth is measured from the first
+sample, taken after ``--live`` visits so that imports and caches are warm.
+The exit status is 1 when growth exceeds ``--max-growth-mb``, when figures
+are left open in pyplot or when the store holds more sessions than its
+bound, so CI catches per-session state that is never released.
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import uuid
+from collections import OrderedDict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from vm_tutorial.figures import figure_bytes, translation_diagram
+from vm_tutorial.quiz import QuizState, load_question_bank, next_question, record_answer, shuffled_options
+from vm_tutorial.sessions import SessionStore
+from vm_tutorial.translation import PAGING_MODES, TLB, AddressTranslator
+
+
+def rss_mb():
+    with open("/proc/self/status", encoding="ascii") as stream:
+        for line in stream:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def visit(session_id, state, store, bank, rng):
+    """One rerun burst of a session: a few quiz answers and address translations."""
+    if "quiz" not in state:
+        state["quiz"] = QuizState.new(len(bank))
+    quiz = state["quiz"]
+    for _ in range(rng.randint(1, 5)):
+        next_question(quiz, bank)
+        record_answer(quiz, bank, rng.choice(shuffled_options(quiz, bank)))
+    paging_mode = rng.choice(list(PAGING_MODES))
+    config = PAGING_MODES[paging_mode]
+    translator = store.get(session_id, "translator", (paging_mode, "LRU"),
+                           lambda: AddressTranslator(config, TLB(entries=64, ways=4, policy="lru")))
+    vaddr = rng.getrandbits(config.va_bits)
+    result = translator.translate([vaddr])
+    state["translator_settings"] = (paging_mode, "LRU")
+    state["last_translation"] = (vaddr, int(result.paddrs[0]), bool(result.hits[0]), bool(result.faults[0]),
+                                 int(result.walk_refs[0]))
+
+
+def simulate(sessions, live, idle_seconds, max_sessions, figure_every, seed=0):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    rng = random.Random(seed)
+    bank = load_question_bank()
+    clock = Clock()
+    store = SessionStore(idle_seconds=idle_seconds, max_sessions=max_sessions, clock=clock)
+    # Session states of the open tabs, oldest first
+    open_sessions = OrderedDict()
+    samples = []
+    checkpoints = {live + (sessions - live) * step // 9 for step in range(10)}
+    for index in range(1, sessions + 1):
+        clock.now += 1.0
+        session_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        open_sessions[session_id] = {}
+        # A few returning tabs rerun alongside the new one
+        for returning in [session_id, *rng.sample(list(open_sessions), min(2, len(open_sessions)))]:
+            visit(returning, open_sessions[returning], store, bank, rng)
+        while len(open_sessions) > live:
+            open_sessions.popitem(last=False)
+        if figure_every and index % figure_every == 0:
+            figure_bytes(translation_diagram(), "svg")
+        if index in checkpoints:
+            gc.collect()
+            samples.append({"sessions": index, "rss_mb": rss_mb(), "stored_sessions": len(store)})
+    return {
+        "sessions": sessions,
+        "live": live,
+        "samples": samples,
+        "growth_mb": samples[-1]["rss_mb"] - samples[0]["rss_mb"],
+        "evicted": store.evicted,
+        "stored_sessions": len(store),
+        "open_figures": len(plt.get_fignums()),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sessions", type=int, default=10_000, help="visits to simulate")
+    parser.add_argument("--live", type=int, default=200, help="tabs open at once")
+    parser.add_argument("--idle-seconds", type=float, default=300, help="store idle timeout; one visit is one second")
+    parser.add_argument("--max-sessions", type=int, default=500, help="store bound")
+    parser.add_argument("--figure-every", type=int, default=50, help="draw a diagram every this many visits (0: never)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the report to this JSON file")
+    parser.add_argument("--max-growth-mb", type=float, help="fail when RSS grows by more than this")
+    args = parser.parse_args(argv)
+
+    result = simulate(args.sessions, args.live, args.idle_seconds, args.max_sessions, args.figure_every, args.seed)
+    for sample in result["samples"]:
+        print(f"  {sample['sessions']:7d} sessions  {sample['rss_mb']:7.1f} MB  {sample['stored_sessions']:5d} in store")
+    print(f"RSS growth {result['growth_mb']:.1f} MB over {args.sessions} sessions, {result['evicted']} evicted, "
+          f"{result['open_figures']} figures open")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as stream:
+            json.dump(result, stream, indent=2)
+    failed = result["open_figures"] or result["stored_sessions"] > args.max_sessions
+    if args.max_growth_mb is not None and result["growth_mb"] > args.max_growth_mb:
+        print(f"RSS grew by {result['growth_mb']:.1f} MB, more than the budget of {args.max_growth_mb:.0f} MB")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,13 @@
+import pytest
+
+from vm_tutorial.isa import TECHNIQUES, TICKS, WORKLOAD_PRESETS, run_workload
+
+
+@pytest.mark.parametrize("technique", TECHNIQUES)
+@pytest.mark.parametrize("workload", WORKLOAD_PRESETS)
+def test_every_timer_tick_is_delivered(workload, technique):
+    timer_interval = 10_000
+    machine = run_workload(WORKLOAD_PRESETS[workload], technique, instructions=2_000_000, timer_interval=timer_interval)
+    expected = machine.instructions // timer_interval
+    # A tick due at the end of the run may still be pending
+    assert expected - 1 <= machine.mem[TICKS] <= expected
@@ -0,0 +1 @@
+"""Simulation engines behind the Virtual Machines and Memory Virtualization tutorial."""
@@ -0,0 +1,279 @@
+"""Command-line entry point: ``python -m vm_tutorial <command>``."""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from vm_tutorial import benchmarks, dedup, figures, iovirt, migration, numa, render, replacement, snapshots, traces
+
+
+def _convert_trace(args):
+    started = time.perf_counter()
+    count = traces.convert_to_binary(args.source, args.destination, fmt=args.format)
+    print(f"Wrote {count:,} records to {args.destination} in {time.perf_counter() - started:.1f}s")
+
+
+def _bench(args):
+    def progress(name, done, total):
+        print(f"  {name}: {done}/{total}", end="\r" if done < total else "\n", flush=True)
+
+    document = benchmarks.run_suite(label=args.label, repeats=args.repeats, size=args.size,
+                                    names=args.only, directory=args.scratch, progress=progress)
+    output = args.out or os.path.join(
+        "bench_results", f"{document['label'].replace(' ', '-')}-{document['host']['hostname']}.json")
+    benchmarks.save_results(document, output)
+    for name, result in document["results"].items():
+        samples = result["samples"]
+        print(f"{benchmarks.BENCHMARKS[name].label:<28} {sum(samples) / len(samples):10.2f} {result['unit']}")
+    print(f"Saved {output}")
+
+
+def _migrate(args):
+    if args.trace:
+        # Each chunk is reduced to its stores' page numbers before the next is read; the model keeps one per store
+        model = migration.TraceDirtying.from_chunks(traces.iter_trace(args.trace, fmt=args.format), args.writes_per_second)
+    else:
+        model = migration.WORKLOAD_PRESETS[args.workload]
+    config = migration.MigrationConfig(memory_bytes=int(args.memory_gb * (1 << 30)), bandwidth=args.link_gbit * 1e9 / 8,
+                                       downtime_target=args.downtime_ms / 1000, auto_converge=args.auto_converge)
+    print(f"{'strategy':<10} {'total s':>9} {'downtime ms':>12} {'sent GiB':>9} {'rounds':>6} {'faults':>10}")
+    for row in migration.compare_strategies(model, config, migration.ENCODINGS[args.encoding]):
+        note = "" if row["converged"] else "  (did not converge)"
+        print(f"{row['strategy']:<10} {row['total_time']:9.1f} {row['downtime'] * 1000:12.0f} "
+              f"{row['wire_bytes'] / 2**30:9.1f} {row['precopy_rounds']:6d} {row['faults']:10,d}{note}")
+
+
+def _dedup(args):
+    report = dedup.scan_images(args.images, page_size=args.page_size, processes=args.processes)
+    print(f"Scanned {report.total_pages:,} pages of {len(report.images)} images in {report.elapsed:.1f}s")
+    print(f"  distinct pages  {report.distinct_pages:12,}  (sharing ratio {report.sharing_ratio:.2f})")
+    print(f"  zero pages      {report.zero_pages:12,}")
+    print(f"  shared pages    {report.shared_pages:12,}  ({report.cross_vm_pages:,} with content in several VMs)")
+    print(f"  memory saved    {report.saved_bytes / 2**20:12,.0f} MiB")
+    for pages_to_scan in args.pages_to_scan:
+        cost = report.scan_cost(pages_to_scan, args.sleep_ms)
+        seconds, saved = report.savings_over_time(pages_to_scan, args.sleep_ms)
+        half = seconds[np.searchsorted(saved, saved[-1] / 2)]
+        print(f"  {pages_to_scan:>6} pages / {args.sleep_ms:g} ms: {cost['cpu_fraction']:6.1%} CPU, "
+              f"full pass {cost['full_scan_seconds']:8.1f}s, half the savings after {half:.1f}s "
+              f"({saved[-1] / 2**21:,.0f} MiB)")
+
+
+def _replacement(args):
+    started = time.perf_counter()
+    if args.trace:
+        pages = [replacement.page_references(chunk, args.page_size) for chunk in traces.iter_trace(args.trace, fmt=args.format)]
+        keys = np.concatenate(pages) if pages else np.zeros(0, dtype=np.int64)
+    else:
+        keys = replacement.REFERENCE_PATTERNS[args.pattern](args.references)
+    curve = replacement.lru_curve(keys)
+    print(f"{len(keys):,} references to {curve.distinct_pages:,} pages; LRU curve in {time.perf_counter() - started:.1f}s")
+    sizes = np.array(args.frames) if args.frames else replacement.curve_sizes(curve.distinct_pages, args.points)
+    upcoming = replacement.next_occurrence(keys) if "OPT" in args.policies else None
+    print(f"{'frames':>10} {'MiB':>9}" + "".join(f" {policy:>7}" for policy in args.policies))
+    for frames in sizes:
+        row = []
+        for policy in args.policies:
+            if policy == "LRU":
+                ratio = curve.miss_ratio(frames)
+            else:
+                ratio = 1 - replacement.simulate(policy, keys, int(frames), upcoming=upcoming).mean()
+            row.append(f" {ratio:7.2%}")
+        print(f"{frames:10,d} {frames * args.page_size / 2**20:9.1f}" + "".join(row))
+
+
+def _snapshot(args):
+    store = snapshots.SnapshotStore(args.store, block_size=args.block_size)
+    info = store.checkpoint(args.image, name=args.name, parent=args.parent)
+    print(f"Snapshot {info.name} of {args.image}: {info.dirty_blocks:,} dirty blocks, {info.new_blocks:,} new "
+          f"in {info.seconds:.2f}s")
+    print(f"{len(store)} snapshots, {store.stored_bytes / 2**20:,.1f} MiB stored; chain {' <- '.join(store.chain(info.name))}")
+
+
+def _restore(args):
+    store = snapshots.SnapshotStore(args.store)
+    seconds = store.restore(args.name, args.destination)
+    print(f"Restored {args.name} ({store.info(args.name).image_bytes / 2**20:,.1f} MiB) to {args.destination} in {seconds:.2f}s")
+
+
+def _snapshot_chain(args):
+    report = snapshots.chain_growth(depth=args.depth, blocks=args.blocks, dirty_fraction=args.dirty_percent / 100,
+                                    block_size=args.block_size, use_bitmap=not args.fingerprint, directory=args.scratch)
+    print(f"{'depth':>5} {'dirty':>7} {'new':>7} {'checkpoint ms':>14} {'restore ms':>11} {'index ns':>9} "
+          f"{'chain ns':>9} {'stored MiB':>11} {'amplification':>14}")
+    for row in zip(report.depth, report.dirty_blocks, report.new_blocks, report.checkpoint_seconds * 1000,
+                   report.restore_seconds * 1000, report.index_lookup_ns, report.chain_lookup_ns,
+                   report.stored_bytes / 2**20, report.space_amplification):
+        print("{:5d} {:7,d} {:7,d} {:14.1f} {:11.1f} {:9.0f} {:9.0f} {:11.1f} {:14.2f}".format(*row))
+    summary = report.summary()
+    print(f"Full copies would amplify {summary['full_copy_amplification']:.1f}x; "
+          f"restored image {'verified' if summary['verified'] else 'DIFFERS'}")
+
+
+def _io(args):
+    stream = iovirt.request_stream(args.requests, args.iops, args.size_kb * iovirt.KB, args.write_percent / 100, args.seed)
+    load = f"{args.iops:,} IOPS offered" if args.iops else f"saturated at queue depth {args.queue_depth or 'of each path'}"
+    print(f"{args.requests:,} requests of {args.size_kb} KB, {load}, batches of {args.batch}")
+    print(f"{'path':<20} {'kIOPS':>8} {'p50 us':>8} {'p99 us':>9} {'p99.9 us':>9} {'exits':>6} {'kicks':>6} {'irqs':>6} {'seconds':>8}")
+    for result in iovirt.compare_paths(stream, args.batch, args.queue_depth):
+        summary = result.summary()
+        print(f"{summary['path']:<20} {summary['iops'] / 1000:8.1f} {summary['p50_us']:8.1f} {summary['p99_us']:9.1f} "
+              f"{summary['p999_us']:9.1f} {summary['exits_per_request']:6.2f} {summary['kicks_per_request']:6.2f} "
+              f"{summary['interrupts_per_request']:6.2f} {summary['seconds']:8.2f}")
+
+
+def _numa(args):
+    topology = numa.TOPOLOGIES[args.topology]
+    workload = numa.random_workload(args.vms, seed=args.seed)
+    hosts = args.hosts or numa.hosts_for(topology, workload, load=args.load)
+    print(f"{args.vms:,} VMs on {hosts} hosts with {topology.nodes} nodes each ({args.topology})")
+    print(f"{'strategy':<32} {'remote %':>9} {'latency':>8} {'spanning':>9} {'peak %':>7} {'contended %':>12} "
+          f"{'cross-host %':>13} {'hosts':>6} {'unplaced':>9} {'seconds':>8}")
+    for result in numa.compare_strategies(numa.Cluster(topology, hosts), workload):
+        summary = result.summary()
+        print(f"{summary['strategy']:<32} {summary['remote_access'] * 100:9.2f} {summary['relative_latency']:8.3f} "
+              f"{summary['spanning_vms']:9,d} {summary['peak_utilization'] * 100:7.1f} {summary['contended_nodes'] * 100:12.1f} "
+              f"{summary['cross_host_traffic'] * 100:13.1f} {summary['hosts_used']:6d} {summary['unplaced']:9,d} "
+              f"{summary['seconds']:8.2f}")
+
+
+def _render(args):
+    started = time.perf_counter()
+
+    def progress(key, seconds):
+        print(f"  {key}: " + ("up to date" if seconds is None else f"{seconds:.1f}s"), flush=True)
+
+    rendered, skipped = render.render_all(args.out, formats=args.format.split(","), processes=args.processes,
+                                          only=args.only, force=args.force, progress=progress)
+    print(f"Rendered {rendered} and skipped {skipped} unchanged tasks in {time.perf_counter() - started:.1f}s; "
+          f"open {os.path.join(args.out, 'index.html')}")
+
+
+def _warm_up(args):
+    for step, seconds in figures.warm_up().items():
+        print(f"  import {step:<12} {seconds:6.2f}s")
+    for theme_name in figures.DIAGRAM_THEMES:
+        started = time.perf_counter()
+        figures.figure_bytes(figures.hypervisor_diagram(theme_name), "png")
+        figures.figure_bytes(figures.translation_diagram(theme_name), "png")
+        print(f"  diagrams ({theme_name})  {time.perf_counter() - started:6.2f}s")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m vm_tutorial")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert = commands.add_parser("convert-trace", help="convert a text memory trace to the binary format")
+    convert.add_argument("source", help="lackey or pinatrace text file (optionally .gz)")
+    convert.add_argument("destination", help="binary trace file to write")
+    convert.add_argument("--format", choices=sorted(traces.TEXT_FORMATS), default="lackey")
+    convert.set_defaults(handler=_convert_trace)
+
+    bench = commands.add_parser("bench", help="run the microbenchmark suite and save the results")
+    bench.add_argument("--label", help="environment name shown in the app (default: detected environment)")
+    bench.add_argument("--out", help="result file, .json or .parquet (default: bench_results/<label>-<host>.json)")
+    bench.add_argument("--repeats", type=int, default=5, help="samples per benchmark")
+    bench.add_argument("--size", type=int, default=1, help="problem size multiplier")
+    bench.add_argument("--only", nargs="+", choices=sorted(benchmarks.BENCHMARKS), help="benchmarks to run")
+    bench.add_argument("--scratch", help="directory for the file I/O benchmarks (default: system temp dir)")
+    bench.set_defaults(handler=_bench)
+
+    migrate = commands.add_parser("migrate", help="simulate pre-copy, post-copy and hybrid live migration")
+    source = migrate.add_mutually_exclusive_group()
+    source.add_argument("--workload", choices=sorted(migration.WORKLOAD_PRESETS), default="OLTP database")
+    source.add_argument("--trace", help="memory trace whose stores dirty the guest (binary or text)")
+    migrate.add_argument("--format", choices=sorted(traces.TEXT_FORMATS), default="lackey", help="text trace format")
+    migrate.add_argument("--writes-per-second", type=float, default=1e6, help="replay rate of the trace's stores")
+    migrate.add_argument("--memory-gb", type=float, default=8, help="guest memory")
+    migrate.add_argument("--link-gbit", type=float, default=10, help="migration link bandwidth")
+    migrate.add_argument("--downtime-ms", type=float, default=300, help="pre-copy downtime target")
+    migrate.add_argument("--encoding", choices=sorted(migration.ENCODINGS), default="None")
+    migrate.add_argument("--auto-converge", action="store_true", help="throttle the guest while pre-copy is not converging")
+    migrate.set_defaults(handler=_migrate)
+
+    scan = commands.add_parser("dedup", help="measure page sharing (KSM) across raw VM memory images")
+    scan.add_argument("images", nargs="+", help="raw memory images, one per VM")
+    scan.add_argument("--page-size", type=int, default=dedup.PAGE_SIZE)
+    scan.add_argument("--processes", type=int, help="hashing worker processes (default: one per CPU)")
+    scan.add_argument("--pages-to-scan", type=int, nargs="+", default=list(dedup.SCAN_RATES),
+                      help="KSM pages scanned per wake-up")
+    scan.add_argument("--sleep-ms", type=float, default=20, help="KSM sleep between wake-ups")
+    scan.set_defaults(handler=_dedup)
+
+    mrc = commands.add_parser("mrc", help="miss-ratio curves of page-replacement policies")
+    source = mrc.add_mutually_exclusive_group()
+    source.add_argument("--pattern", choices=sorted(replacement.REFERENCE_PATTERNS), default="Zipf hot set")
+    source.add_argument("--trace", help="memory trace to take page references from (binary or text)")
+    mrc.add_argument("--format", choices=sorted(traces.TEXT_FORMATS), default="lackey", help="text trace format")
+    mrc.add_argument("--references", type=int, default=1_000_000, help="length of a generated reference string")
+    mrc.add_argument("--page-size", type=int, default=4096)
+    mrc.add_argument("--policies", nargs="+", choices=replacement.POLICIES, default=list(replacement.POLICIES),
+                     help="policies to report; all but LRU are simulated once per memory size")
+    mrc.add_argument("--frames", type=int, nargs="+", help="memory sizes to report, in page frames")
+    mrc.add_argument("--points", type=int, default=8, help="log-spaced memory sizes to report without --frames")
+    mrc.set_defaults(handler=_replacement)
+
+    snap = commands.add_parser("snapshot", help="checkpoint a raw disk image into a copy-on-write snapshot store")
+    snap.add_argument("store", help="snapshot store directory (created if missing)")
+    snap.add_argument("image", help="raw disk image to checkpoint")
+    snap.add_argument("--name", help="snapshot name (default: snapNNNN)")
+    snap.add_argument("--parent", help="snapshot to diff against (default: the newest)")
+    snap.add_argument("--block-size", type=int, default=snapshots.BLOCK_SIZE, help="block size of a new store")
+    snap.set_defaults(handler=_snapshot)
+
+    restore = commands.add_parser("restore", help="write a snapshot back to a raw disk image")
+    restore.add_argument("store", help="snapshot store directory")
+    restore.add_argument("name", help="snapshot to restore")
+    restore.add_argument("destination", help="raw disk image to write")
+    restore.set_defaults(handler=_restore)
+
+    chain = commands.add_parser("snapshot-chain", help="measure checkpoints, restores and lookups as a snapshot chain grows")
+    chain.add_argument("--depth", type=int, default=32, help="snapshots in the chain")
+    chain.add_argument("--blocks", type=int, default=4096, help="blocks in the synthetic disk image")
+    chain.add_argument("--block-size", type=int, default=snapshots.BLOCK_SIZE)
+    chain.add_argument("--dirty-percent", type=float, default=5, help="blocks written between checkpoints")
+    chain.add_argument("--fingerprint", action="store_true", help="find dirty blocks by hashing instead of a bitmap")
+    chain.add_argument("--scratch", help="directory for the image and the store (default: system temp dir)")
+    chain.set_defaults(handler=_snapshot_chain)
+
+    io = commands.add_parser("io", help="send a request stream down each simulated I/O virtualization path")
+    io.add_argument("--requests", type=int, default=1_000_000)
+    io.add_argument("--iops", type=int, help="offered request rate (default: saturate the queue)")
+    io.add_argument("--size-kb", type=int, default=4)
+    io.add_argument("--write-percent", type=float, default=30)
+    io.add_argument("--batch", type=int, default=1, help="requests the driver publishes together")
+    io.add_argument("--queue-depth", type=int, help="requests in flight (default: each path's queue size)")
+    io.add_argument("--seed", type=int, default=0)
+    io.set_defaults(handler=_io)
+
+    placement = commands.add_parser("numa", help="compare NUMA placement strategies on a synthetic cluster")
+    placement.add_argument("--topology", choices=list(numa.TOPOLOGIES), default=next(iter(numa.TOPOLOGIES)))
+    placement.add_argument("--vms", type=int, default=8000)
+    placement.add_argument("--hosts", type=int, help="hosts in the cluster (default: enough for the VMs' memory at --load)")
+    placement.add_argument("--load", type=float, default=0.7, help="memory load the default host count is sized for")
+    placement.add_argument("--seed", type=int, default=0)
+    placement.set_defaults(handler=_numa)
+
+    export = commands.add_parser("render", help="render every figure and table to static files and an HTML bundle")
+    export.add_argument("--out", default="rendered", help="output directory")
+    export.add_argument("--format", default="svg,png", help=f"comma-separated figure formats from {', '.join(render.FORMATS)}")
+    export.add_argument("--processes", type=int, help="worker processes (default: one per CPU)")
+    export.add_argument("--only", nargs="+", choices=list(figures.VIEWS), help="views to render")
+    export.add_argument("--force", action="store_true", help="render again even when the outputs are up to date")
+    export.set_defaults(handler=_render)
+
+    warm = commands.add_parser("warmup", help="build matplotlib's font cache and time the app's deferred imports")
+    warm.set_defaults(handler=_warm_up)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
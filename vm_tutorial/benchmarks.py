@@ -0,0 +1,321 @@
+"""Local microbenchmarks for comparing bare-metal, VM and container hosts.
+
+Each benchmark returns one sample per repetition; a run collects the samples
+of every benchmark together with host metadata and is saved as a versioned
+JSON (or Parquet) file. Result files from different environments are then
+compared in the app as performance relative to a baseline environment.
+"""
+
+import datetime
+import glob
+import json
+import os
+import platform
+import socket
+import tempfile
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+SCHEMA_VERSION = 1
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    name: str
+    label: str
+    unit: str
+    higher_is_better: bool
+    category: str
+
+
+BENCHMARKS = {
+    "cpu_scalar": Benchmark("cpu_scalar", "Scalar integer loop", "Mops/s", True, "CPU"),
+    "cpu_vector": Benchmark("cpu_vector", "Matrix multiply", "GFLOP/s", True, "CPU"),
+    "memory_bandwidth": Benchmark("memory_bandwidth", "Memory copy bandwidth", "GB/s", True, "Memory"),
+    "memory_latency": Benchmark("memory_latency", "Pointer-chasing latency", "ns", False, "Memory"),
+    "file_sequential": Benchmark("file_sequential", "Sequential file write+read", "MB/s", True, "I/O"),
+    "file_random": Benchmark("file_random", "Random 4 KiB reads", "kIOPS", True, "I/O"),
+}
+
+
+def _cpu_scalar(size):
+    n = 2_000_000 * size
+    started = time.perf_counter()
+    total = 0
+    for i in range(n):
+        total += i * i & 0xFF
+    return n / (time.perf_counter() - started) / 1e6
+
+
+def _cpu_vector(size):
+    dim = 256 * size
+    a = np.random.default_rng(0).random((dim, dim))
+    started = time.perf_counter()
+    a @ a
+    return 2 * dim ** 3 / (time.perf_counter() - started) / 1e9
+
+
+def _memory_bandwidth(size):
+    source = np.ones(16 * 1024 * 1024 * size // 8)
+    target = np.empty_like(source)
+    started = time.perf_counter()
+    np.copyto(target, source)
+    # A copy reads and writes every byte once
+    return 2 * source.nbytes / (time.perf_counter() - started) / 1e9
+
+
+def _chase(chain, hops):
+    position = 0
+    started = time.perf_counter()
+    for _ in range(hops):
+        position = chain[position]
+    return (time.perf_counter() - started) / hops
+
+
+def _random_cycle(n, rng):
+    # Link a random permutation into one cycle so every hop is a cache miss
+    order = rng.permutation(n)
+    chain = np.empty(n, dtype=np.int64)
+    chain[order] = np.roll(order, -1)
+    return chain.tolist()
+
+
+def _memory_latency(size):
+    rng = np.random.default_rng(0)
+    hops = 500_000 * size
+    # Interpreter overhead is measured on a cache-resident chain and removed
+    small = _chase(_random_cycle(1024, rng), hops)
+    large = _chase(_random_cycle(8 * 1024 * 1024, rng), hops)
+    return max(large - small, 0.0) * 1e9
+
+
+def _file_sequential(size, directory=None):
+    block = os.urandom(1 << 20)
+    blocks = 64 * size
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False) as stream:
+        path = stream.name
+    try:
+        started = time.perf_counter()
+        with open(path, "wb") as stream:
+            for _ in range(blocks):
+                stream.write(block)
+            stream.flush()
+            os.fsync(stream.fileno())
+        with open(path, "rb", buffering=0) as stream:
+            while stream.read(1 << 20):
+                pass
+        return 2 * blocks / (time.perf_counter() - started)
+    finally:
+        os.unlink(path)
+
+
+def _file_random(size, directory=None):
+    file_blocks = 16 * 1024
+    reads = 20_000 * size
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False) as stream:
+        path = stream.name
+        stream.write(os.urandom(file_blocks * 4096))
+    try:
+        offsets = (np.random.default_rng(0).integers(0, file_blocks, size=reads) * 4096).tolist()
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            started = time.perf_counter()
+            for offset in offsets:
+                os.pread(fd, 4096, offset)
+            return reads / (time.perf_counter() - started) / 1e3
+        finally:
+            os.close(fd)
+    finally:
+        os.unlink(path)
+
+
+_RUNNERS = {
+    "cpu_scalar": _cpu_scalar,
+    "cpu_vector": _cpu_vector,
+    "memory_bandwidth": _memory_bandwidth,
+    "memory_latency": _memory_latency,
+    "file_sequential": _file_sequential,
+    "file_random": _file_random,
+}
+
+
+def detect_environment():
+    """Best-effort guess of whether we run on bare metal, in a VM or in a container."""
+    if os.path.exists("/.dockerenv") or os.path.exists("/run/.containerenv"):
+        return "container"
+    try:
+        with open("/proc/1/cgroup") as stream:
+            if any(name in stream.read() for name in ("docker", "kubepods", "containerd", "lxc")):
+                return "container"
+    except OSError:
+        pass
+    try:
+        with open("/proc/cpuinfo") as stream:
+            if " hypervisor" in stream.read():
+                return "virtual machine"
+    except OSError:
+        pass
+    return "bare metal"
+
+
+def host_metadata():
+    return {
+        "hostname": socket.gethostname(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "environment": detect_environment(),
+    }
+
+
+def run_suite(label=None, repeats=5, size=1, names=None, directory=None, progress=None):
+    """Run the selected benchmarks ``repeats`` times and return a result document."""
+    names = list(names or BENCHMARKS)
+    metadata = host_metadata()
+    results = {}
+    for name in names:
+        runner = _RUNNERS[name]
+        kwargs = {"directory": directory} if name.startswith("file_") else {}
+        # One untimed warm-up so allocation and page-cache effects settle
+        runner(size, **kwargs)
+        samples = []
+        for repeat in range(repeats):
+            samples.append(runner(size, **kwargs))
+            if progress:
+                progress(name, repeat + 1, repeats)
+        benchmark = BENCHMARKS[name]
+        results[name] = {"unit": benchmark.unit, "higher_is_better": benchmark.higher_is_better, "samples": samples}
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "label": label or metadata["environment"],
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "host": metadata,
+        "parameters": {"repeats": repeats, "size": size},
+        "results": results,
+    }
+
+
+def save_results(document, path):
+    """Write a result document as JSON, or as a tidy Parquet table for ``.parquet`` paths."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if path.endswith(".parquet"):
+        import pandas as pd
+
+        rows = [
+            {"schema_version": document["schema_version"], "label": document["label"], "created": document["created"],
+             "host": json.dumps(document["host"]), "benchmark": name, "unit": result["unit"],
+             "higher_is_better": result["higher_is_better"], "sample": index, "value": value}
+            for name, result in document["results"].items()
+            for index, value in enumerate(result["samples"])
+        ]
+        pd.DataFrame(rows).to_parquet(path, index=False)
+    else:
+        with open(path, "w") as stream:
+            json.dump(document, stream, indent=2)
+
+
+def load_results(path):
+    """Read a JSON or Parquet result file back into a result document."""
+    if path.endswith(".parquet"):
+        import pandas as pd
+
+        table = pd.read_parquet(path)
+        first = table.iloc[0]
+        results = {}
+        for name, rows in table.sort_values("sample").groupby("benchmark", sort=False):
+            results[name] = {"unit": rows["unit"].iloc[0], "higher_is_better": bool(rows["higher_is_better"].iloc[0]),
+                             "samples": rows["value"].tolist()}
+        document = {"schema_version": int(first["schema_version"]), "label": first["label"],
+                    "created": first["created"], "host": json.loads(first["host"]), "results": results}
+    else:
+        with open(path) as stream:
+            document = json.load(stream)
+    if document.get("schema_version") != SCHEMA_VERSION:
+        raise ValueError(f"{path}: unsupported benchmark schema version {document.get('schema_version')}")
+    return document
+
+
+def load_result_dir(directory):
+    """Load every result file in ``directory``, skipping unreadable ones."""
+    documents = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.json")) + glob.glob(os.path.join(directory, "*.parquet"))):
+        try:
+            documents.append(load_results(path))
+        except (ValueError, KeyError, ImportError, OSError):
+            continue
+    return documents
+
+
+def bootstrap_ci(samples, confidence=0.95, resamples=2000, seed=0):
+    """Percentile bootstrap confidence interval of the mean."""
+    samples = np.asarray(samples, dtype=float)
+    if len(samples) < 2:
+        return float(samples.mean()), float(samples.mean())
+    rng = np.random.default_rng(seed)
+    means = samples[rng.integers(0, len(samples), size=(resamples, len(samples)))].mean(axis=1)
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(means, [tail, 100 - tail])
+    return float(low), float(high)
+
+
+def _merge_by_label(documents):
+    """Documents keyed by label; runs saved under the same label pool their samples, host of the first."""
+    by_label = {}
+    for document in documents:
+        merged = by_label.setdefault(document["label"], dict(document, results={}))
+        for name, result in document["results"].items():
+            if name in merged["results"]:
+                merged["results"][name]["samples"] += list(result["samples"])
+            else:
+                merged["results"][name] = dict(result, samples=list(result["samples"]))
+    return by_label
+
+
+def relative_performance(documents, baseline=None):
+    """Express every environment's samples as % of the baseline environment's mean.
+
+    Lower-is-better metrics are inverted so 100% is always baseline speed and
+    higher is always better. Returns ``{label: {benchmark: summary}}`` where a
+    summary holds ``mean``, ``low``, ``high`` and the relative ``samples``.
+    The baseline is ``baseline`` when given, else the first environment whose
+    host reports bare metal, else the first one; it comes first in the result
+    and the others follow in file order. Documents with the same label are
+    merged into one environment. Samples of zero or less (below the timer
+    resolution) are left out, as is a benchmark with none left to compare and
+    an environment with no benchmark left.
+    """
+    if not documents:
+        return {}
+    by_label = _merge_by_label(documents)
+    if baseline is None:
+        bare = [label for label, document in by_label.items() if document["host"].get("environment") == "bare metal"]
+        baseline = bare[0] if bare else next(iter(by_label))
+    reference = by_label[baseline]["results"]
+    comparison = {}
+    for label in [baseline] + [label for label in by_label if label != baseline]:
+        document = by_label[label]
+        comparison[label] = {}
+        for name, result in document["results"].items():
+            if name not in reference:
+                continue
+            base_samples = np.asarray(reference[name]["samples"], dtype=float)
+            samples = np.asarray(result["samples"], dtype=float)
+            base_samples, samples = base_samples[base_samples > 0], samples[samples > 0]
+            if not len(base_samples) or not len(samples):
+                continue
+            base_mean = float(base_samples.mean())
+            relative = samples / base_mean if result["higher_is_better"] else base_mean / samples
+            relative = relative * 100
+            low, high = bootstrap_ci(relative)
+            comparison[label][name] = {"mean": float(relative.mean()), "low": low, "high": high, "samples": relative}
+    return {label: results for label, results in comparison.items() if results}
+
+
+def baseline_label(comparison):
+    """The environment ``relative_performance`` normalized ``comparison`` to."""
+    return next(iter(comparison))
@@ -0,0 +1,262 @@
+"""Vega-Lite versions of the Visualizations tab's charts, drawn in the browser.
+
+Each function takes the same data as the matching ``*_figure`` function in
+``figures`` and returns a Vega-Lite spec (a plain dict, easy to cache) with
+the data inlined. The browser draws it: dragging and scrolling pan and zoom,
+hovering shows the values and clicking a legend entry highlights that
+series, all without a round trip to the server. Long series are thinned to
+at most ``MAX_POINTS`` points so a spec stays a few tens of kilobytes; the
+matplotlib figures remain the source of the static exports.
+"""
+
+import altair as alt
+import numpy as np
+import pandas as pd
+
+from vm_tutorial.benchmarks import BENCHMARKS, baseline_label
+from vm_tutorial.dedup import PAGE_SIZE
+from vm_tutorial.figures import io_percentiles, io_rate_label, latency_percentiles
+from vm_tutorial.replacement import POLICIES as REPLACEMENT_POLICIES
+
+MAX_POINTS = 400
+HEIGHT = 400
+BLUES = ['#1E3A8A', '#2563EB', '#3B82F6', '#60A5FA', '#93C5FD', '#BFDBFE']
+
+
+def thin(length, points=MAX_POINTS, log=False):
+    """Indices of at most ``points`` samples of a series of ``length``, keeping both ends."""
+    if length <= points:
+        return np.arange(length)
+    spaced = np.geomspace(1, length, points) - 1 if log else np.linspace(0, length - 1, points)
+    return np.unique(spaced.round().astype(np.int64))
+
+
+def _interactive(chart, series, title):
+    # Clicking a legend entry (shift-click for several) fades the other series
+    highlight = alt.selection_point(fields=[series], bind="legend")
+    return (chart.add_params(highlight)
+            .encode(opacity=alt.condition(highlight, alt.value(1.0), alt.value(0.15)))
+            .properties(title=title, height=HEIGHT)
+            .interactive()
+            .to_dict())
+
+
+def _color(series, domain, palette=BLUES):
+    return alt.Color(f"{series}:N", scale=alt.Scale(domain=list(domain), range=list(palette[:len(domain)])),
+                     legend=alt.Legend(title=None, orient="bottom"))
+
+
+# VM Performance Comparison
+
+def benchmark_chart(comparison, io_performance):
+    """Measured results when there are any, else the illustrative chart with simulated I/O."""
+    if not comparison:
+        return sample_performance_chart(io_performance)
+    # The 100% reference first, then the other environments
+    baseline = baseline_label(comparison)
+    labels = [baseline] + [label for label in comparison if label != baseline]
+    rows, samples = [], []
+    for label in labels:
+        for name, stats in comparison[label].items():
+            benchmark = f"{BENCHMARKS[name].category}: {BENCHMARKS[name].label}"
+            rows.append({"environment": label, "benchmark": benchmark, "mean": stats["mean"],
+                         "low": stats["low"], "high": stats["high"]})
+            samples += [{"environment": label, "benchmark": benchmark, "sample": value} for value in stats["samples"]]
+    names = list(dict.fromkeys(row["benchmark"] for row in rows))
+    x = alt.X("environment:N", sort=labels, title=None, axis=alt.Axis(labelAngle=0))
+    offset = alt.XOffset("benchmark:N", sort=names)
+    bars = alt.Chart(pd.DataFrame(rows)).mark_bar().encode(
+        x=x, xOffset=offset, y=alt.Y("mean:Q", title="Performance (%)"), color=_color("benchmark", names),
+        tooltip=["environment", "benchmark", alt.Tooltip("mean:Q", format=".1f"), alt.Tooltip("low:Q", format=".1f"),
+                 alt.Tooltip("high:Q", format=".1f")])
+    whiskers = alt.Chart(pd.DataFrame(rows)).mark_rule(color="black").encode(x=x, xOffset=offset, y="low:Q", y2="high:Q")
+    dots = alt.Chart(pd.DataFrame(samples)).mark_circle(size=12, color="#1E3A8A", opacity=0.6).encode(
+        x=x, xOffset=offset, y="sample:Q")
+    reference = alt.Chart(pd.DataFrame({"y": [100]})).mark_rule(strokeDash=[2, 2], color="black").encode(y="y:Q")
+    highlight = alt.selection_point(fields=["benchmark"], bind="legend")
+    bars = bars.add_params(highlight).encode(opacity=alt.condition(highlight, alt.value(1.0), alt.value(0.15)))
+    return (alt.layer(bars, whiskers, dots, reference)
+            .properties(title=f"Measured Performance (% of {baseline})", height=HEIGHT)
+            .to_dict())
+
+
+def sample_performance_chart(io_performance):
+    vm_types = ["Bare Metal", "Type 1 Hypervisor", "Type 2 Hypervisor", "Container"]
+    series = {"CPU Performance": [100, 95, 80, 98], "I/O Performance": [round(io_performance[vm], 1) for vm in vm_types],
+              "Memory Performance": [100, 94, 85, 97]}
+    data = pd.DataFrame([{"environment": vm, "metric": metric, "performance": values[i]}
+                         for metric, values in series.items() for i, vm in enumerate(vm_types)])
+    chart = alt.Chart(data).mark_bar().encode(
+        x=alt.X("environment:N", sort=vm_types, title=None, axis=alt.Axis(labelAngle=0)),
+        xOffset=alt.XOffset("metric:N", sort=list(series)),
+        y=alt.Y("performance:Q", title="Performance (%)", scale=alt.Scale(domain=[0, 110])),
+        color=_color("metric", series, BLUES[3:]),
+        tooltip=["environment", "metric", "performance"])
+    return _interactive(chart, "metric", "Virtualization Performance Comparison (% of Bare Metal)")
+
+
+# Memory Virtualization Overhead
+
+def paging_chart(rows):
+    data = pd.DataFrame(rows)
+    data["page_kb"] = data["page_bytes"] // 1024
+    data["mode"] = [("Nested Paging (EPT/NPT)" if mode == "Nested paging" else mode.title()) for mode in data["mode"]]
+    modes = list(dict.fromkeys(data["mode"]))
+    chart = alt.Chart(data[["page_kb", "page_size", "mode", "relative_latency", "tlb_misses", "cycles_per_access"]]).mark_line(
+        point=True, strokeWidth=2).encode(
+        x=alt.X("page_kb:Q", title="Page Size (KB)", scale=alt.Scale(type="log", base=2)),
+        y=alt.Y("relative_latency:Q", title="Relative Latency (lower is better)"),
+        color=_color("mode", modes, BLUES[1:2] + BLUES[3:5]),
+        tooltip=["mode", "page_size", alt.Tooltip("relative_latency:Q", format=".2f"),
+                 alt.Tooltip("tlb_misses:Q", format=","), alt.Tooltip("cycles_per_access:Q", format=".1f")])
+    return _interactive(chart, "mode", "Memory Access Latency by Page Size")
+
+
+# Cache Coherence Impact
+
+def coherence_chart(rows, protocol):
+    data = pd.DataFrame(rows)
+    data["series"] = data["interconnect"] + f" ({protocol})"
+    series = list(dict.fromkeys(data["series"]))
+    chart = alt.Chart(data[["series", "cores", "efficiency", "transactions", "invalidations"]]).mark_line(
+        point=True, strokeWidth=2).encode(
+        x=alt.X("cores:Q", title="Number of Processors", scale=alt.Scale(type="log", base=2)),
+        y=alt.Y("efficiency:Q", title="Relative Performance per Processor"),
+        color=_color("series", series, BLUES[3:]),
+        tooltip=["series", "cores", alt.Tooltip("efficiency:Q", format=".3f"), alt.Tooltip("transactions:Q", format=","),
+                 alt.Tooltip("invalidations:Q", format=",")])
+    return _interactive(chart, "series", "Cache Coherence Scalability")
+
+
+# Live Migration
+
+def migration_chart(results, workload_name, memory_gb, link_gbit):
+    rounds = pd.DataFrame(results[0].rounds)
+    data = pd.concat([
+        pd.DataFrame({"round": rounds["round"], "series": np.where(rounds["phase"] == "stop-and-copy", "Stop-and-copy",
+                                                                   "Sent in round"), "gb": rounds["wire_bytes"] / 2**30}),
+        pd.DataFrame({"round": rounds["round"], "series": "Dirtied during round", "gb": rounds["dirtied"] * PAGE_SIZE / 2**30}),
+    ])
+    domain = ["Sent in round", "Stop-and-copy", "Dirtied during round"]
+    color = _color("series", domain, [BLUES[3], BLUES[0], BLUES[4]])
+    x = alt.X("round:O", title="Round (last bar: stop-and-copy)", axis=alt.Axis(labelAngle=0))
+    tooltip = ["round", "series", alt.Tooltip("gb:Q", title="GB", format=".2f")]
+    sent = alt.Chart(data).transform_filter(alt.datum.series != "Dirtied during round").mark_bar().encode(
+        x=x, y=alt.Y("gb:Q", title="Data (GB)"), color=color, tooltip=tooltip)
+    dirtied = alt.Chart(data).transform_filter(alt.datum.series == "Dirtied during round").mark_line(
+        point=True, strokeWidth=2).encode(x=x, y="gb:Q", color=color, tooltip=tooltip)
+    highlight = alt.selection_point(fields=["series"], bind="legend")
+    faded = alt.condition(highlight, alt.value(1.0), alt.value(0.15))
+    return (alt.layer(sent.add_params(highlight).encode(opacity=faded), dirtied.encode(opacity=faded))
+            .properties(title=f"Pre-copy Rounds ({workload_name}, {memory_gb} GB over {link_gbit} Gbit/s)", height=HEIGHT)
+            .to_dict())
+
+
+# Memory Deduplication
+
+def dedup_chart(report, pages_to_scan, sleep_ms):
+    seconds, saved = report.savings_over_time(pages_to_scan, sleep_ms)
+    index = thin(len(seconds))
+    label = f"{pages_to_scan} pages every {sleep_ms} ms"
+    data = pd.DataFrame({"seconds": seconds[index], "saved_mb": saved[index] / 2**20, "series": label})
+    chart = alt.Chart(data).mark_line(strokeWidth=2).encode(
+        x=alt.X("seconds:Q", title="Time Since Scanning Started (s)"),
+        y=alt.Y("saved_mb:Q", title="Memory Saved (MB)"),
+        color=_color("series", [label, "All duplicates merged"], BLUES[1:2] + BLUES[4:5]),
+        tooltip=[alt.Tooltip("seconds:Q", format=",.1f"), alt.Tooltip("saved_mb:Q", title="MB saved", format=",.0f")])
+    limit = alt.Chart(pd.DataFrame({"saved_mb": [report.saved_bytes / 2**20], "series": ["All duplicates merged"]})).mark_rule(
+        strokeDash=[6, 4]).encode(y="saved_mb:Q", color="series:N", tooltip=[alt.Tooltip("saved_mb:Q", format=",.0f")])
+    return (alt.layer(chart, limit)
+            .properties(title="Memory Saved by Page Sharing While the Scanner Runs", height=HEIGHT)
+            .interactive()
+            .to_dict())
+
+
+# Memory Overcommit
+
+def overcommit_chart(results, vm_count, overcommit):
+    frames = []
+    for result in results:
+        # Five-minute averages keep the day readable and the spec small
+        seconds = len(result.faults) // 300 * 300
+        averages = result.faults[:seconds].reshape(-1, 300).mean(axis=1)
+        frames.append(pd.DataFrame({"hour": (np.arange(len(averages)) / 12).round(3), "faults": averages.round(2), "policy": result.policy}))
+    policies = [result.policy for result in results]
+    chart = alt.Chart(pd.concat(frames)).mark_line(strokeWidth=1.5).encode(
+        x=alt.X("hour:Q", title="Hour of Day", axis=alt.Axis(values=list(range(0, 25, 4)))),
+        y=alt.Y("faults:Q", title="Page Faults per Second", scale=alt.Scale(type="symlog", constant=10)),
+        color=_color("policy", policies, [BLUES[0], BLUES[3], BLUES[4]]),
+        tooltip=["policy", alt.Tooltip("hour:Q", format=".2f"), alt.Tooltip("faults:Q", format=",.1f")])
+    return _interactive(chart, "policy", f"Page Faults on a {overcommit:g}x Overcommitted Host ({vm_count} VMs)")
+
+
+# VM Snapshots
+
+def snapshot_chart(report, dirty_percent):
+    series = ["Chain walk (qcow2 backing files)", "Folded block index"]
+    data = pd.concat([pd.DataFrame({"depth": report.depth, "lookup_us": (lookup_ns / 1000).round(2), "method": name})
+                      for name, lookup_ns in zip(series, (report.chain_lookup_ns, report.index_lookup_ns))])
+    chart = alt.Chart(data).mark_line(point=True, strokeWidth=2).encode(
+        x=alt.X("depth:Q", title="Chain Depth (Snapshots)"),
+        y=alt.Y("lookup_us:Q", title="Lookup Time (µs)"),
+        color=_color("method", series, [BLUES[0], BLUES[3]]),
+        tooltip=["method", "depth:Q", alt.Tooltip("lookup_us:Q", title="µs", format=".2f")])
+    return _interactive(chart, "method", f"Block Lookup Time as the Snapshot Chain Grows ({dirty_percent}% of Blocks Dirty per Checkpoint)")
+
+
+# I/O Virtualization
+
+def io_chart(results, size_name, rate, batch):
+    paths = [result.path for result in results]
+    frames = []
+    for result in results:
+        shares, latency = io_percentiles(result)
+        frames.append(pd.DataFrame({"latency_us": latency.round(2), "share": shares.round(1), "path": result.path}))
+    chart = alt.Chart(pd.concat(frames)).mark_line(strokeWidth=2).encode(
+        x=alt.X("latency_us:Q", title="Latency (µs)", scale=alt.Scale(type="log")),
+        y=alt.Y("share:Q", title="Requests (%)"),
+        color=_color("path", paths, [BLUES[0], BLUES[5], BLUES[4], BLUES[3], BLUES[2], BLUES[1]]),
+        tooltip=["path", alt.Tooltip("latency_us:Q", title="µs", format=",.1f"), alt.Tooltip("share:Q", title="Requests (%)", format=".1f")])
+    return _interactive(chart, "path", f"Latency of {size_name} Requests ({io_rate_label(rate)}, Batches of {batch})")
+
+
+# NUMA Placement
+
+def numa_chart(results, topology_name, vm_count):
+    strategies = [result.strategy for result in results]
+    frames = []
+    for result in results:
+        shares, latency = latency_percentiles(result)
+        frames.append(pd.DataFrame({"latency": latency.round(3), "share": shares.round(1), "strategy": result.strategy}))
+    chart = alt.Chart(pd.concat(frames)).mark_line(strokeWidth=2).encode(
+        x=alt.X("latency:Q", title="Memory Latency Relative to an Idle Local Node", scale=alt.Scale(zero=False)),
+        y=alt.Y("share:Q", title="VMs (%)"),
+        color=_color("strategy", strategies, [BLUES[4], BLUES[2], BLUES[0]]),
+        tooltip=["strategy", alt.Tooltip("latency:Q", format=".2f"), alt.Tooltip("share:Q", title="VMs (%)", format=".1f")])
+    return _interactive(chart, "strategy", f"Memory Latency of {vm_count:,} VMs on {topology_name} Hosts")
+
+
+# Page Replacement
+
+def replacement_chart(curve, sizes, ratios, pattern_name):
+    # The LRU curve covers every memory size; the other policies are simulated at the marked sizes
+    frames = thin(curve.distinct_pages, log=True) + 1
+    data = pd.concat([pd.DataFrame({"frames": frames, "miss_ratio": (curve.miss_ratios[frames] * 100).round(3), "policy": "LRU (all sizes)"})]
+                     + [pd.DataFrame({"frames": sizes, "miss_ratio": (ratios[policy] * 100).round(3), "policy": policy})
+                        for policy in REPLACEMENT_POLICIES[1:]])
+    policies = ["LRU (all sizes)", *REPLACEMENT_POLICIES[1:]]
+    x = alt.X("frames:Q", title="Memory Size (Page Frames)", scale=alt.Scale(type="log"))
+    y = alt.Y("miss_ratio:Q", title="Miss Ratio (%)")
+    color = alt.Color("policy:N", scale=alt.Scale(domain=policies), legend=alt.Legend(title=None, orient="bottom"))
+    tooltip = ["policy", alt.Tooltip("frames:Q", format=","), alt.Tooltip("miss_ratio:Q", format=".1f")]
+    lru = alt.Chart(data).transform_filter(alt.datum.policy == policies[0]).mark_line(strokeWidth=2).encode(
+        x=x, y=y, color=color, tooltip=tooltip)
+    simulated = alt.Chart(data).transform_filter(alt.datum.policy != policies[0]).mark_line(
+        point=True, strokeDash=[4, 3], strokeWidth=1).encode(x=x, y=y, color=color, shape=alt.Shape("policy:N", legend=None),
+                                                             tooltip=tooltip)
+    highlight = alt.selection_point(fields=["policy"], bind="legend")
+    faded = alt.condition(highlight, alt.value(1.0), alt.value(0.15))
+    return (alt.layer(lru.add_params(highlight).encode(opacity=faded), simulated.encode(opacity=faded))
+            .properties(title=f"Miss-Ratio Curves: {pattern_name}", height=HEIGHT)
+            .interactive()
+            .to_dict())
@@ -0,0 +1,340 @@
+"""Multiprocessor cache-coherence simulator.
+
+Every core has a private set-associative cache whose tags, coherence states
+and LRU stamps live in ``(cores, sets, ways)`` NumPy arrays, and a
+``(lines, cores)`` array records which way (if any) holds each line in each
+cache. That array is what a snooping bus discovers by broadcasting and what a
+directory stores explicitly, so one pass of the MSI/MESI/MOESI state machine
+over a workload yields per-core event counts that both interconnect models
+then turn into bus transactions or network messages and execution time.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+# Coherence states; everything at or above EXCLUSIVE may be written silently
+INVALID, SHARED, OWNED, EXCLUSIVE, MODIFIED = range(5)
+STATE_NAMES = ("I", "S", "O", "E", "M")
+
+# Per-core event columns
+HIT, UPGRADE, MEMORY_MISS, CACHE_MISS, INVALIDATING = range(5)
+EVENT_NAMES = ("hits", "upgrades", "memory_misses", "cache_to_cache_misses", "invalidating_requests")
+
+
+@dataclass(frozen=True)
+class Protocol:
+    name: str
+    exclusive: bool
+    owned: bool
+    # Whether clean copies (S/E) may supply data instead of memory
+    clean_forwarding: bool
+
+
+PROTOCOLS = {
+    "MSI": Protocol("MSI", exclusive=False, owned=False, clean_forwarding=False),
+    "MESI": Protocol("MESI", exclusive=True, owned=False, clean_forwarding=True),
+    "MOESI": Protocol("MOESI", exclusive=True, owned=True, clean_forwarding=True),
+}
+
+
+@dataclass(frozen=True)
+class CacheConfig:
+    sets: int = 64
+    ways: int = 4
+    line_bytes: int = 64
+
+    @property
+    def size_bytes(self):
+        return self.sets * self.ways * self.line_bytes
+
+
+@dataclass
+class CoherenceResult:
+    protocol: str
+    cores: int
+    events: np.ndarray
+    invalidations: int
+    writebacks: int
+    clean_evictions: int
+    home_requests: np.ndarray
+
+    @property
+    def accesses(self):
+        return int(self.events[:, :INVALIDATING].sum())
+
+    @property
+    def misses(self):
+        return int(self.events[:, MEMORY_MISS].sum() + self.events[:, CACHE_MISS].sum())
+
+    @property
+    def requests(self):
+        return self.misses + int(self.events[:, UPGRADE].sum())
+
+    @property
+    def miss_rate(self):
+        return self.misses / max(self.accesses, 1)
+
+    @property
+    def cache_to_cache_rate(self):
+        return int(self.events[:, CACHE_MISS].sum()) / max(self.misses, 1)
+
+    def summary(self):
+        totals = dict(zip(EVENT_NAMES, self.events.sum(axis=0).tolist()))
+        totals.update(accesses=self.accesses, invalidations=self.invalidations, writebacks=self.writebacks,
+                      miss_rate=self.miss_rate, cache_to_cache_rate=self.cache_to_cache_rate)
+        return totals
+
+
+def simulate(core_ids, addrs, writes, cores, protocol="MESI", cache=CacheConfig()):
+    """Run one interleaved access stream through the coherence protocol.
+
+    ``core_ids``, ``addrs`` and ``writes`` are equal-length arrays giving the
+    issuing core, byte address and store flag of each access in global order.
+    """
+    spec = PROTOCOLS[protocol]
+    line_addrs, line_index = np.unique(np.asarray(addrs, dtype=np.uint64) // np.uint64(cache.line_bytes),
+                                       return_inverse=True)
+    set_of_line = (line_addrs % np.uint64(cache.sets)).astype(np.int64).tolist()
+
+    tags = np.full((cores, cache.sets, cache.ways), -1, dtype=np.int64)
+    states = np.zeros((cores, cache.sets, cache.ways), dtype=np.uint8)
+    stamps = np.zeros((cores, cache.sets, cache.ways), dtype=np.int64)
+    where = np.full((len(line_addrs), cores), -1, dtype=np.int8)
+    events = np.zeros((cores, len(EVENT_NAMES)), dtype=np.int64)
+    requests = np.zeros(len(line_addrs), dtype=np.int64)
+    invalidations = writebacks = clean_evictions = 0
+    read_fill = EXCLUSIVE if spec.exclusive else SHARED
+
+    accesses = zip(np.asarray(core_ids).tolist(), line_index.ravel().tolist(), np.asarray(writes, dtype=bool).tolist())
+    for now, (core, line, write) in enumerate(accesses):
+        s = set_of_line[line]
+        way = where[line, core]
+        if way >= 0:
+            stamps[core, s, way] = now
+            state = states[core, s, way]
+            if not write:
+                events[core, HIT] += 1
+                continue
+            if state >= EXCLUSIVE:
+                states[core, s, way] = MODIFIED
+                events[core, HIT] += 1
+                continue
+            # Write to S or O: invalidate the other copies without a data transfer
+            holders = where[line]
+            others = np.flatnonzero(holders >= 0)
+            others = others[others != core]
+            if len(others):
+                states[others, s, holders[others]] = INVALID
+                tags[others, s, holders[others]] = -1
+                where[line, others] = -1
+                invalidations += len(others)
+                events[core, INVALIDATING] += 1
+            states[core, s, way] = MODIFIED
+            events[core, UPGRADE] += 1
+            requests[line] += 1
+            continue
+
+        requests[line] += 1
+        holders = where[line]
+        others = np.flatnonzero(holders >= 0)
+        if len(others):
+            other_ways = holders[others]
+            other_states = states[others, s, other_ways]
+            dirty = (other_states == MODIFIED) | (other_states == OWNED)
+            from_cache = spec.clean_forwarding or bool(dirty.any())
+            if write:
+                states[others, s, other_ways] = INVALID
+                tags[others, s, other_ways] = -1
+                where[line, others] = -1
+                invalidations += len(others)
+                events[core, INVALIDATING] += 1
+                fill = MODIFIED
+            else:
+                modified = other_states == MODIFIED
+                if modified.any() and not spec.owned:
+                    # Without an O state the dirty line is written back as it becomes shared
+                    writebacks += 1
+                other_states = np.where(modified, OWNED if spec.owned else SHARED,
+                                        np.where(other_states == EXCLUSIVE, SHARED, other_states))
+                states[others, s, other_ways] = other_states
+                fill = SHARED
+            events[core, CACHE_MISS if from_cache else MEMORY_MISS] += 1
+        else:
+            events[core, MEMORY_MISS] += 1
+            fill = MODIFIED if write else read_fill
+
+        row = tags[core, s]
+        empty = np.flatnonzero(row < 0)
+        way = empty[0] if len(empty) else int(stamps[core, s].argmin())
+        victim = row[way]
+        if victim >= 0:
+            if states[core, s, way] in (OWNED, MODIFIED):
+                writebacks += 1
+            else:
+                clean_evictions += 1
+            where[victim, core] = -1
+        tags[core, s, way] = line
+        states[core, s, way] = fill
+        stamps[core, s, way] = now
+        where[line, core] = way
+
+    # Directory slices are interleaved across cores by line address
+    homes = (line_addrs % np.uint64(cores)).astype(np.int64)
+    return CoherenceResult(protocol, cores, events, invalidations, writebacks, clean_evictions,
+                           np.bincount(homes, weights=requests, minlength=cores))
+
+
+@dataclass(frozen=True)
+class Latencies:
+    """Cycle costs used to turn event counts into execution time."""
+
+    hit: int = 1
+    memory: int = 100
+    cache_transfer: int = 30
+    address_phase: int = 4
+    data_phase: int = 8
+    directory_lookup: int = 10
+    router_hop: int = 3
+
+
+class SnoopingBus:
+    """Every miss, upgrade and writeback is broadcast on one shared bus."""
+
+    name = "Snooping bus"
+
+    def evaluate(self, result, latencies=Latencies()):
+        events = result.events
+        transactions = result.requests + result.writebacks
+        data_transfers = result.misses + result.writebacks
+        bus_cycles = transactions * latencies.address_phase + data_transfers * latencies.data_phase
+        bus = latencies.address_phase + latencies.data_phase
+        core_cycles = (events[:, HIT] * latencies.hit
+                       + events[:, UPGRADE] * latencies.address_phase
+                       + events[:, MEMORY_MISS] * (bus + latencies.memory)
+                       + events[:, CACHE_MISS] * (bus + latencies.cache_transfer))
+        return {
+            "transactions": transactions,
+            # Every other cache checks its tags for each broadcast
+            "snoop_lookups": transactions * (result.cores - 1),
+            "cycles": max(int(core_cycles.max()), bus_cycles),
+        }
+
+
+class Directory:
+    """Point-to-point messages through a home directory on a 2-D mesh."""
+
+    name = "Directory"
+
+    def evaluate(self, result, latencies=Latencies()):
+        events = result.events
+        # Average distance between two nodes of a sqrt(n) x sqrt(n) mesh
+        hop = latencies.router_hop * max(1.0, 2 / 3 * np.sqrt(result.cores))
+        messages = (2 * (events[:, MEMORY_MISS].sum() + events[:, UPGRADE].sum())
+                    + 3 * events[:, CACHE_MISS].sum()
+                    + 2 * result.invalidations + result.writebacks + result.clean_evictions)
+        core_cycles = (events[:, HIT] * latencies.hit
+                       + events[:, UPGRADE] * (2 * hop + latencies.directory_lookup)
+                       + events[:, MEMORY_MISS] * (2 * hop + latencies.directory_lookup + latencies.memory)
+                       + events[:, CACHE_MISS] * (3 * hop + latencies.directory_lookup + latencies.cache_transfer)
+                       # Waiting for invalidation acknowledgements costs another round trip
+                       + events[:, INVALIDATING] * 2 * hop)
+        directory_cycles = result.home_requests.max() * latencies.directory_lookup
+        # Bisection bandwidth of the mesh grows with its side length
+        network_cycles = messages * latencies.data_phase / max(1.0, 2 * np.sqrt(result.cores))
+        return {
+            "transactions": int(messages),
+            "snoop_lookups": 0,
+            "cycles": int(max(core_cycles.max(), directory_cycles, network_cycles)),
+        }
+
+
+INTERCONNECTS = {cls.name: cls for cls in (SnoopingBus, Directory)}
+
+# Sharing behaviour of the synthetic workloads offered by the app
+WORKLOAD_PRESETS = {
+    "Read-mostly sharing": {"shared_fraction": 0.3, "write_fraction": 0.05},
+    "Migratory data": {"shared_fraction": 0.2, "write_fraction": 0.5},
+    "Mostly private": {"shared_fraction": 0.05, "write_fraction": 0.3},
+}
+
+
+def synthetic_workload(cores, accesses_per_core=1500, shared_fraction=0.2, write_fraction=0.2,
+                       shared_lines=256, private_lines=512, line_bytes=64, seed=0):
+    """Round-robin interleaving of per-core streams over private and shared data.
+
+    Both regions are accessed with a skew towards their first lines, so each
+    core has a hot working set plus a tail that causes capacity misses.
+    """
+    rng = np.random.default_rng(seed)
+    n = cores * accesses_per_core
+    core_ids = np.tile(np.arange(cores, dtype=np.int64), accesses_per_core)
+    shared = rng.random(n) < shared_fraction
+    skew = rng.random(n) ** 3
+    lines = np.where(shared, (skew * shared_lines).astype(np.int64),
+                     ((core_ids + 1) << 20) + (skew * private_lines).astype(np.int64))
+    writes = rng.random(n) < write_fraction
+    return core_ids, lines.astype(np.uint64) * np.uint64(line_bytes), writes
+
+
+def trace_workload(records, cores, quantum=64):
+    """Split one memory trace into ``cores`` threads by dealing out ``quantum``-record slices.
+
+    ``records`` uses ``traces.RECORD_DTYPE``; stores and modifies count as writes
+    and instruction fetches are dropped.
+    """
+    records = records[records["kind"] != 0]
+    core_ids = (np.arange(len(records)) // quantum) % cores
+    return core_ids, records["addr"], records["kind"] >= 2
+
+
+def _simulate_point(arguments):
+    cores, protocol, workload, accesses_per_core, cache, seed = arguments
+    core_ids, addrs, writes = synthetic_workload(cores, accesses_per_core, line_bytes=cache.line_bytes,
+                                                 seed=seed, **workload)
+    result = simulate(core_ids, addrs, writes, cores, protocol, cache)
+    return result, {name: cls().evaluate(result) for name, cls in INTERCONNECTS.items()}
+
+
+def sweep(core_counts=(1, 2, 4, 8, 16, 32, 64), protocol="MESI", workload=None, accesses_per_core=1500,
+          cache=CacheConfig(), seed=0, processes=None):
+    """Simulate each core count (in parallel worker processes) and compare interconnects.
+
+    Returns one row per core count and interconnect with traffic counts and
+    ``efficiency``: throughput per core relative to the first (smallest) core
+    count on the same interconnect.
+    """
+    workload = WORKLOAD_PRESETS["Read-mostly sharing"] if workload is None else workload
+    jobs = [(cores, protocol, dict(workload), accesses_per_core, cache, seed) for cores in core_counts]
+    processes = min(len(jobs), os.cpu_count() or 1) if processes is None else processes
+    # Inside a worker already (a parallel static render), the points run inline rather than in a nested pool
+    if processes > 1 and multiprocessing.parent_process() is None:
+        # Largest core counts first so they do not end up alone at the tail
+        order = sorted(range(len(jobs)), key=lambda i: -jobs[i][0])
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+            done = dict(zip(order, pool.map(_simulate_point, [jobs[i] for i in order])))
+        points = [done[i] for i in range(len(jobs))]
+    else:
+        points = [_simulate_point(job) for job in jobs]
+
+    rows = []
+    for name in INTERCONNECTS:
+        base = None
+        for cores, (result, costs) in zip(core_counts, points):
+            cost = costs[name]
+            per_core = result.accesses / cost["cycles"] / cores
+            base = per_core if base is None else base
+            rows.append({
+                "cores": cores,
+                "interconnect": name,
+                "efficiency": per_core / base,
+                "transactions": cost["transactions"],
+                "snoop_lookups": cost["snoop_lookups"],
+                "invalidations": result.invalidations,
+                "miss_rate": result.miss_rate,
+                "cache_to_cache_rate": result.cache_to_cache_rate,
+            })
+    return rows
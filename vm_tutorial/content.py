@@ -0,0 +1,231 @@
+"""Static tutorial content: terminology, section text and resource lists.
+
+Everything here is plain module-level data, built once per process and shared
+by every session. Section paragraphs are HTML fragments rendered inside the
+app's ``text-content`` paragraphs; ``documents`` flattens all of it into
+records for the search index.
+"""
+
+import functools
+import os
+import re
+from dataclasses import dataclass
+
+STYLE_PATH = os.path.join(os.path.dirname(__file__), "data", "style.css")
+TABS = ["Overview", "Virtual Machine Concepts", "Memory Virtualization", "Visualizations", "Resources"]
+
+
+@dataclass(frozen=True)
+class Section:
+    tab: str
+    heading: str
+    html: str
+
+
+@dataclass(frozen=True)
+class Document:
+    """One searchable item and where it lives in the app."""
+
+    id: str
+    kind: str
+    title: str
+    text: str
+    tab: str
+
+
+TERMINOLOGY = {
+    "Cache Coherence": "Ensures all CPU caches maintain a consistent view of memory.",
+    "Full Virtualization": "A method where the VMM completely emulates hardware so that an unmodified guest OS can run.",
+    "Hardware-Assisted Virtualization": "CPU features that provide direct support for virtualization, reducing the need for software-based emulation (e.g., Intel VT-x, AMD-V).",
+    "Host OS vs. Guest OS": "The host OS is the primary operating system running on the physical machine, while the guest OS runs within a virtual machine.",
+    "Live Migration": "The process of moving a running VM from one physical host to another without downtime.",
+    "Memory Management Unit (MMU)": "A hardware component that translates virtual addresses into physical addresses.",
+    "Non-Uniform Memory Access (NUMA)": "A multiprocessor design where each processor reaches its own memory faster than memory attached to other processors.",
+    "Page Fault": "Occurs when a requested page is not in physical memory, requiring the OS to fetch it from disk.",
+    "Page Table": "A data structure used by the OS to map virtual addresses to physical addresses.",
+    "Paging": "A memory management scheme that divides virtual memory into fixed-size units called pages.",
+    "Paravirtualization": "A virtualization method where the guest OS is modified to work efficiently with the hypervisor.",
+    "Resource Sharing": "Multiple VMs share hardware resources such as CPU, memory, and storage, improving utilization.",
+    "Snooping Protocol": "A cache coherence mechanism where caches monitor the bus for changes.",
+    "Trap-and-Emulate": "A method where the VMM intercepts privileged instructions executed by the guest OS and safely emulates them.",
+    "Translation Lookaside Buffer (TLB)": "A cache that stores recent virtual-to-physical address mappings to speed up address translation.",
+    "Type 1 Hypervisor (Bare Metal)": "Runs directly on the hardware without a host OS (e.g., VMware ESXi, Microsoft Hyper-V, Xen).",
+    "Type 2 Hypervisor (Hosted)": "Runs on a conventional operating system and manages VMs as applications (e.g., VMware Workstation, VirtualBox).",
+    "Virtual Machines (VMs)": "A software emulation of a physical computer system, allowing multiple operating systems to run on the same hardware.",
+    "Virtual Memory": "A system where the OS uses disk storage to extend RAM, allowing processes to use more memory than is physically available.",
+    "Virtual Machine Monitor (VMM) / Hypervisor": "A software layer that manages virtual machines by mapping virtual resources to physical resources.",
+    "VM Isolation": "The principle that each VM is independent and cannot directly interfere with others, improving security and reliability.",
+    "VM Snapshots": "A saved state of a virtual machine that can be restored later.",
+    "Write-Back Cache": "Writes data to memory only when the cache line is replaced.",
+    "Write-Through Cache": "Writes data to both cache and main memory simultaneously.",
+}
+
+TERM_CATEGORIES = {
+    "Basic Virtualization Concepts": ["Virtual Machines (VMs)", "Virtual Machine Monitor (VMM) / Hypervisor", "Type 1 Hypervisor (Bare Metal)", "Type 2 Hypervisor (Hosted)", "Host OS vs. Guest OS", "VM Isolation", "VM Snapshots"],
+    "Memory Virtualization": ["Virtual Memory", "Paging", "Page Table", "Page Fault", "Memory Management Unit (MMU)", "Translation Lookaside Buffer (TLB)"],
+    "CPU Virtualization": ["Hardware-Assisted Virtualization", "Trap-and-Emulate", "Full Virtualization", "Paravirtualization"],
+    "Cache and Memory": ["Cache Coherence", "Snooping Protocol", "Write-Through Cache", "Write-Back Cache", "Resource Sharing", "Live Migration", "Non-Uniform Memory Access (NUMA)"],
+}
+
+SECTIONS = {
+    "abstract": Section("Overview", "Abstract",
+        "Virtualization is a powerful technology that enables multiple <span class='highlight-term'>Virtual Machines (VMs)</span> to run on a single physical system. This paper explores the fundamental concepts of virtual machines, memory virtualization, CPU instruction handling, and cache coherence. By leveraging <span class='highlight-term'>VM Isolation</span>, <span class='highlight-term'>Memory Virtualization</span>, <span class='highlight-term'>Cache Coherence</span>, and <span class='highlight-term'>Instruction Set Virtualization</span>, modern hypervisors optimize hardware utilization while ensuring robust performance."),
+    "introduction": Section("Overview", "Introduction",
+        "<span class='highlight-term'>Virtualization</span> enhances efficiency, security, and scalability in modern computing environments. Multiple <span class='highlight-term'>Virtual Machines (VMs)</span> run on a single system using a <span class='highlight-term'>Virtual Machine Monitor (VMM) / Hypervisor</span>, enabling efficient resource sharing and isolation. This paper discusses the various aspects of virtualization, including <span class='highlight-term'>virtual memory management</span>, <span class='highlight-term'>instruction set virtualization</span>, and <span class='highlight-term'>cache coherence</span> in multiprocessor systems."),
+    "hypervisor_diagram": Section("Overview", "Virtualization Overview",
+        "The diagram above illustrates the two primary hypervisor types. <span class='highlight-term'>Type 1 (Bare Metal)</span> hypervisors run directly on hardware, while <span class='highlight-term'>Type 2 (Hosted)</span> hypervisors run on a host operating system. Each approach has different performance characteristics and use cases."),
+    "vm_operations": Section("Virtual Machine Concepts", "Virtual Machine Operations",
+        "A <span class='highlight-term'>Host OS vs. Guest OS</span> setup allows multiple <span class='highlight-term'>VMs</span> to operate within a single system. There are two primary types of hypervisors: <span class='highlight-term'>Type 1 Hypervisor (Bare Metal)</span>, which runs directly on hardware, and <span class='highlight-term'>Type 2 Hypervisor (Hosted)</span>, which runs within an existing operating system. <span class='highlight-term'>VM Snapshots</span> can save the state of a <span class='highlight-term'>VM</span> for later restoration, and <span class='highlight-term'>Live Migration</span> enables seamless movement between physical hosts."),
+    "cpu_virtualization": Section("Virtual Machine Concepts", "CPU and Instruction Set Virtualization",
+        "<span class='highlight-term'>Trap-and-Emulate</span> is a technique used by the <span class='highlight-term'>VMM</span> to handle <span class='highlight-term'>Privileged Instructions</span> executed by a <span class='highlight-term'>Guest OS</span>. <span class='highlight-term'>Hardware-Assisted Virtualization</span> technologies, such as <span class='highlight-term'>Intel VT-x</span> and <span class='highlight-term'>AMD-V</span>, optimize performance and reduce emulation overhead. The <span class='highlight-term'>System Mode (Kernel Mode)</span> provides unrestricted hardware access, while <span class='highlight-term'>User Mode</span> restricts applications. <span class='highlight-term'>Trap Handling</span> ensures system security by switching execution to <span class='highlight-term'>System Mode</span> when needed."),
+    "memory_virtualization": Section("Memory Virtualization", "Memory Virtualization",
+        "<span class='highlight-term'>Virtual Memory</span> allows operating systems to extend <span class='highlight-term'>RAM</span> using disk storage. <span class='highlight-term'>Paging</span> divides <span class='highlight-term'>virtual memory</span> into fixed-size units, mapped by a <span class='highlight-term'>Page Table</span> and translated by the <span class='highlight-term'>Memory Management Unit (MMU)</span>. When a <span class='highlight-term'>Page Fault</span> occurs, the <span class='highlight-term'>OS</span> retrieves the missing page from disk. <span class='highlight-term'>Translation Lookaside Buffer (TLB)</span> caching optimizes memory access, reducing <span class='highlight-term'>TLB Miss</span> rates."),
+    "translation_diagram": Section("Memory Virtualization", "Memory Address Translation Process",
+        "The diagram illustrates the memory address translation process in virtualized environments. When a program accesses memory using a virtual address, it first checks the <span class='highlight-term'>TLB</span> for a quick translation. If not found (TLB miss), the system consults the <span class='highlight-term'>Page Table</span> for the mapping between virtual pages and physical frames. The offset portion remains unchanged throughout the translation."),
+    "cache_coherence": Section("Memory Virtualization", "Cache Coherence in Multiprocessor Systems",
+        "<span class='highlight-term'>Cache Coherence</span> ensures that multiple processors have a consistent view of <span class='highlight-term'>memory</span>. The <span class='highlight-term'>Snooping Protocol</span> monitors memory changes, while an <span class='highlight-term'>Invalidating Snooping Protocol</span> ensures consistency by removing outdated cache copies. <span class='highlight-term'>Directory-Based Coherence</span> scales better in large <span class='highlight-term'>multiprocessor</span> environments."),
+    "cache_policies": Section("Memory Virtualization", "Cache Coherence in Multiprocessor Systems",
+        "<span class='highlight-term'>Write-Through Cache</span> writes data to both cache and main memory, while <span class='highlight-term'>Write-Back Cache</span> only writes to memory when necessary. <span class='highlight-term'>Cache Migration</span> moves frequently accessed data closer to the relevant <span class='highlight-term'>processor</span>. <span class='highlight-term'>Memory Consistency</span> defines rules for memory update visibility. On multi-socket hosts memory is also <span class='highlight-term'>Non-Uniform</span>: a processor reaches memory on another socket more slowly, so where a hypervisor puts a VM's vCPUs and memory matters as much as how the caches stay coherent."),
+    "page_replacement": Section("Memory Virtualization", "Page Replacement",
+        "When every frame is in use, a <span class='highlight-term'>Page Fault</span> can only be served by evicting another page, so the replacement policy decides how much <span class='highlight-term'>Virtual Memory</span> a workload can use before it starts thrashing. <span class='highlight-term'>LRU</span> and its hardware-friendly approximation <span class='highlight-term'>CLOCK</span> evict pages by recency, while <span class='highlight-term'>2Q</span>, <span class='highlight-term'>ARC</span> and <span class='highlight-term'>LIRS</span> also consider reuse distance and resist one-time scans. A <span class='highlight-term'>miss-ratio curve</span> plots misses against memory size and tells a hypervisor how much memory each VM really needs; the Page Replacement visualization computes one for every policy."),
+}
+
+COMPARISON_TABLE = {
+    "Feature": ["Hardware Requirements", "Performance", "I/O Devices", "Isolation", "Guest OS Modification", "Common Use Cases"],
+    "Full Virtualization": ["High", "Moderate", "Emulated", "Complete", "None", "Cloud Infrastructure, Testing Environments"],
+    "Paravirtualization": ["Medium", "Good", "virtio with vhost", "High", "Required", "Enterprise Servers, Cloud Hosting"],
+    "Hardware-Assisted": ["VT-x/AMD-V", "Excellent", "SR-IOV passthrough", "Complete", "None", "Enterprise Virtualization, Cloud Computing"],
+}
+
+# Explanations shown under each visualization (the illustrative one for VM Performance Comparison)
+VISUALIZATION_TEXT = {
+    "VM Performance Comparison": "This chart compares the relative performance of different virtualization approaches. <span class='highlight-term'>Bare Metal</span> represents native hardware performance (100%). <span class='highlight-term'>Type 1 Hypervisors</span> achieve near-native performance, while <span class='highlight-term'>Type 2 Hypervisors</span> have more overhead due to the host OS layer. <span class='highlight-term'>Containers</span> offer lightweight virtualization with minimal performance impact.",
+    "Memory Virtualization Overhead": "This chart illustrates how different memory virtualization techniques affect access latency. <span class='highlight-term'>Shadow Paging</span>, used in software virtualization, keeps the page walk as short as on native hardware but pays a VM exit for every guest page-table write, while hardware-assisted <span class='highlight-term'>Nested Paging</span> technologies like Intel EPT or AMD NPT walk the guest and host tables together, up to 24 memory references per TLB miss with 4 KB pages. Larger page sizes reduce virtualization overhead by requiring fewer translations and shorter walks.",
+    "Cache Coherence Impact": "This visualization demonstrates how different <span class='highlight-term'>Cache Coherence</span> protocols scale with increasing processor counts. <span class='highlight-term'>Bus-Based Snooping</span> protocols perform well with few processors but don't scale to large systems due to bus bandwidth limitations. <span class='highlight-term'>Directory-Based</span> protocols maintain better performance as the system size increases, making them suitable for large-scale multiprocessor systems.",
+    "Live Migration": "<span class='highlight-term'>Live Migration</span> with pre-copy sends all guest memory while the VM keeps running, then resends the pages written in the meantime until the remainder can be copied within a short pause. A guest that dirties memory faster than the link can carry it never converges, and the final stop-and-copy becomes a long outage. Post-copy resumes the VM on the destination almost immediately and fetches pages on demand, trading downtime for remote page faults; hybrid migration runs one pre-copy pass first so fewer pages are left to fault in.",
+    "Memory Deduplication": "Hypervisors reclaim memory by finding guest pages with identical contents and mapping them to a single copy-on-write page, a technique VMware calls <span class='highlight-term'>Transparent Page Sharing</span> and Linux KVM implements as Kernel Same-page Merging (KSM). Guests that boot the same operating system share kernel and library pages, and every guest has zero pages. A background scanner hashes a few pages at a time, so savings build up gradually: scanning faster finds duplicates sooner but costs more CPU.",
+    "VM Snapshots": "A <span class='highlight-term'>VM Snapshot</span> freezes a disk image so it can be restored later. Copy-on-write formats such as qcow2 never copy the image: each snapshot becomes a read-only backing file and new writes go to a thin overlay on top, so a checkpoint only stores the blocks written since the previous one. A block is looked up by walking the overlays from the newest down to the one that holds it, so reads slow down as the chain grows, unless the chain is folded into one block index when it is opened. Storing blocks by content hash also deduplicates blocks that several snapshots or images have in common.",
+    "Memory Overcommit": "<span class='highlight-term'>Resource Sharing</span> lets a host promise its VMs more memory than it has, because working sets rarely peak together. When memory runs short the hypervisor must take some back. <span class='highlight-term'>Host swapping</span> works without guest help but cannot tell idle pages from active ones, so the guests fault on pages it evicted. A <span class='highlight-term'>balloon driver</span> inside the guest lets the guest OS choose what to give up, starting with free and cached pages, and an <span class='highlight-term'>idle memory tax</span> reclaims from VMs that are not using their memory before squeezing busy ones.",
+    "I/O Virtualization": "A guest cannot touch the host's devices, so every I/O request crosses the hypervisor somehow. An <span class='highlight-term'>emulated device</span> looks like real hardware to an unmodified guest, but each register access is a VM exit to the device model, several per request and more per interrupt. <span class='highlight-term'>Paravirtualization</span> replaces the registers with virtio rings in shared memory: the guest writes descriptors and only notifies (\"kicks\") the backend when it has gone to sleep, and the backend interrupts the guest only when its handler is idle, so under load one exit covers many requests. A packed ring keeps each request in a single descriptor instead of three structures, so fewer cache lines bounce between the cores, and vhost moves the backend from QEMU into the host kernel, turning the kick into a cheap in-kernel exit. <span class='highlight-term'>SR-IOV</span> gives the guest a virtual function of the device itself: the guest rings the device's doorbell directly and posted interrupts reach it without any exit.",
+    "NUMA Placement": "On a <span class='highlight-term'>Non-Uniform Memory Access (NUMA)</span> host every socket has its own memory controller, and a vCPU reading memory attached to another socket waits roughly twice as long as for local memory. A guest that does not know the host's topology spreads its accesses over all of its memory, so a VM whose vCPUs and memory straddle nodes pays that penalty on a share of its accesses. A NUMA-unaware scheduler fills hosts and nodes in order; balancing spreads load but splits VMs; an affinity-aware placer keeps each VM on as few nodes as possible, weighs the remote distance from the SLIT table against the queueing delay of a busy memory controller, and keeps the tiers of one application on the same host so their traffic stays off the network. A local search then moves VMs between nodes and hosts while the total latency falls.",
+    "Page Replacement": "When memory is full, a <span class='highlight-term'>Page Fault</span> forces the OS or hypervisor to evict a page, and the replacement policy decides which. <span class='highlight-term'>LRU</span> evicts the page unused for longest and <span class='highlight-term'>CLOCK</span> approximates it with reference bits. <span class='highlight-term'>2Q</span>, <span class='highlight-term'>ARC</span> and <span class='highlight-term'>LIRS</span> also track how often pages come back, so a one-time scan cannot flush the hot set. <span class='highlight-term'>Belady's OPT</span> evicts the page needed furthest in the future; it needs knowledge of the future, so it serves as the lower bound.",
+}
+
+VIDEO_RESOURCES = [
+    {
+        "title": "Introduction to Virtual Machines",
+        "creator": "TechWorld with Nana",
+        "url": "https://www.youtube.com/watch?v=wX75Z-4MEoM",
+        "description": "A beginner-friendly introduction to virtual machines and their benefits",
+        "duration": "15:42",
+    },
+    {
+        "title": "Memory Virtualization Explained",
+        "creator": "Computer Science Center",
+        "url": "https://www.youtube.com/watch?v=dZqOlaDaBhY",
+        "description": "Technical explanation of how memory virtualization works in modern hypervisors",
+        "duration": "48:23",
+    },
+    {
+        "title": "Cache Coherence Protocols",
+        "creator": "MIT OpenCourseWare",
+        "url": "https://www.youtube.com/watch?v=rnGK12aQR6s",
+        "description": "Detailed lecture on MESI and other cache coherence protocols",
+        "duration": "52:10",
+    },
+]
+
+BOOK_RESOURCES = [
+    {
+        "title": "A Primer on Memory Consistency and Cache Coherence",
+        "authors": "Daniel J. Sorin, Mark D. Hill, and David A. Wood",
+        "year": "2011",
+        "description": "Comprehensive reference on memory consistency models and cache coherence protocols",
+        "type": "Book",
+    },
+    {
+        "title": "Parallel Computer Architecture: A Hardware/Software Approach",
+        "authors": "David Culler and Jaswinder Pal Singh",
+        "year": "1999",
+        "description": "Foundational text covering parallel computing, including cache coherence and memory systems",
+        "type": "Book",
+    },
+    {
+        "title": "Memory Resource Management in VMware ESXi",
+        "authors": "Carl Waldspurger",
+        "year": "2002",
+        "description": "Classic paper describing memory management techniques in virtualized environments",
+        "type": "Research Paper",
+    },
+]
+
+COURSE_RESOURCES = [
+    {
+        "title": "Cloud Computing Specialization",
+        "provider": "Coursera (University of Illinois)",
+        "url": "https://www.coursera.org/specializations/cloud-computing",
+        "description": "Comprehensive course series covering virtualization, cloud infrastructure, and distributed systems",
+        "level": "Intermediate",
+    },
+    {
+        "title": "Advanced Operating Systems",
+        "provider": "edX (Georgia Tech)",
+        "url": "https://www.edx.org/course/advanced-operating-systems",
+        "description": "Covers advanced OS concepts including memory management and virtualization technologies",
+        "level": "Advanced",
+    },
+    {
+        "title": "Virtualization for Beginners",
+        "provider": "Udemy",
+        "url": "https://www.udemy.com/course/virtualization-for-beginners",
+        "description": "Practical introduction to setting up and managing virtual machines with hands-on exercises",
+        "level": "Beginner",
+    },
+]
+
+REFERENCES = [
+    {"title": "Intel VT-x and AMD-V documentation", "url": "https://www.intel.com/content/www/us/en/virtualization/virtualization-technology/intel-virtualization-technology.html", "source": "Intel"},
+    {"title": "VMware ESXi official documentation", "url": "https://docs.vmware.com/en/VMware-vSphere/index.html", "source": "VMware"},
+    {"title": "Microsoft Hyper-V documentation", "url": "https://learn.microsoft.com/en-us/windows-server/virtualization/hyper-v/hyper-v-technology-overview", "source": "Microsoft"},
+    {"title": "Research paper on memory virtualization", "url": "https://www.usenix.org/system/files/conference/osdi14/osdi14-paper-belay.pdf", "source": "USENIX"},
+    {"title": "Cache Coherence for Modern Multicore Processors", "url": "https://scholar.google.com/scholar?q=Cache+Coherence+for+Modern+Multicore+Processors", "source": "Google Scholar"},
+]
+
+# Tab that explains the terms of each terminology category
+CATEGORY_TABS = {
+    "Basic Virtualization Concepts": "Virtual Machine Concepts",
+    "Memory Virtualization": "Memory Virtualization",
+    "CPU Virtualization": "Virtual Machine Concepts",
+    "Cache and Memory": "Memory Virtualization",
+}
+
+_TAGS = re.compile(r"<[^>]+>")
+
+
+def term_category(term):
+    return next(category for category, terms in TERM_CATEGORIES.items() if term in terms)
+
+
+@functools.lru_cache(maxsize=1)
+def stylesheet():
+    """CSS for the app's header, paragraph and highlight classes, read once per process."""
+    with open(STYLE_PATH, encoding="utf-8") as stream:
+        return stream.read()
+
+
+def documents():
+    """Flatten terms, section paragraphs and resources into searchable documents."""
+    records = [
+        Document(f"term:{term}", "term", term, definition, CATEGORY_TABS[term_category(term)])
+        for term, definition in TERMINOLOGY.items()
+    ]
+    records += [
+        Document(f"section:{key}", "section", section.heading, _TAGS.sub("", section.html), section.tab)
+        for key, section in SECTIONS.items()
+    ]
+    for kind, resources in (("video", VIDEO_RESOURCES), ("book", BOOK_RESOURCES), ("course", COURSE_RESOURCES)):
+        records += [
+            Document(f"{kind}:{resource['title']}", kind, resource["title"], resource["description"], "Resources")
+            for resource in resources
+        ]
+    return records
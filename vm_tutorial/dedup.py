@@ -0,0 +1,246 @@
+"""Memory deduplication (KSM, transparent page sharing) over VM memory images.
+
+Raw memory images, one file per VM, are split into page ranges that worker
+processes map with ``mmap`` and fingerprint with a 64-bit hash per page:
+the pages' words are mixed and multiplied by fixed random keys, which
+NumPy does a few hundred pages at a time. Each range comes back as its
+distinct hashes and their counts, which are merged into a sorted content
+index of ``(hash, count, VM mask)`` entries. Memory use grows with the
+number of distinct pages, never with the size of the images.
+
+Ranges are merged in file order, which is the order a KSM-style scanner
+visits memory, so the index size after each range gives the savings curve:
+after ``k`` pages have been scanned, ``k - distinct`` of them share a page.
+The scan rate (``pages_to_scan`` every ``sleep_ms``, as in Linux KSM) turns
+that into savings over time, and the measured hashing cost per page into
+the CPU share the scanner needs.
+"""
+
+import glob
+import mmap
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+PAGE_SIZE = 4096
+# Pages hashed per vectorized step, and the most pages one worker task covers
+_BLOCK_PAGES = 256
+_MAX_RANGE_PAGES = 1 << 16
+# Scan settings shown by the app: Linux KSM defaults to 100 pages every 20 ms
+SCAN_RATES = (100, 1000, 10000)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+IMAGE_PATTERNS = ("*.img", "*.raw", "*.mem")
+
+
+def _keys(words_per_page):
+    # Fixed seed: every worker process must hash the same content to the same value
+    return np.random.default_rng(0x4B534D).integers(1, 2**63, words_per_page, dtype=np.uint64) | np.uint64(1)
+
+
+def hash_pages(buffer, page_size=PAGE_SIZE):
+    """64-bit content hash of every whole page in ``buffer``; zero pages hash to 0."""
+    words = np.frombuffer(buffer, dtype="<u8", count=len(buffer) // page_size * (page_size // 8))
+    words = words.reshape(-1, page_size // 8)
+    keys = _keys(page_size // 8)
+    hashes = np.empty(len(words), dtype=np.uint64)
+    for start in range(0, len(words), _BLOCK_PAGES):
+        block = words[start:start + _BLOCK_PAGES]
+        mixed = block * _MIX
+        mixed ^= mixed >> np.uint64(32)
+        mixed *= keys
+        hashes[start:start + _BLOCK_PAGES] = mixed.sum(axis=1)
+        # Keep 0 for pages that really are all zeros
+        hashes[start:start + _BLOCK_PAGES][(hashes[start:start + _BLOCK_PAGES] == 0) & block.any(axis=1)] = 1
+    return hashes
+
+
+def _hash_range(job):
+    """Distinct hashes and counts of ``pages`` pages of one image starting at page ``first``."""
+    path, first, pages, page_size = job
+    started = time.process_time()
+    with open(path, "rb") as stream, mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        buffer = memoryview(view)[first * page_size:(first + pages) * page_size]
+        try:
+            hashes, counts = np.unique(hash_pages(buffer, page_size), return_counts=True)
+        finally:
+            buffer.release()
+    return hashes, counts, time.process_time() - started
+
+
+def _ranges(paths, page_size, range_pages):
+    jobs = []
+    for image, path in enumerate(paths):
+        pages = os.path.getsize(path) // page_size
+        jobs.extend((image, (path, first, min(range_pages, pages - first), page_size))
+                    for first in range(0, pages, range_pages))
+    return jobs
+
+
+def _hashed(jobs, processes):
+    """Results of ``_hash_range`` in job order, with a bounded number of ranges in flight."""
+    # Inside a worker already (a parallel static render), the ranges are hashed inline rather than in a nested pool
+    if processes <= 1 or multiprocessing.parent_process() is not None:
+        for _, job in jobs:
+            yield _hash_range(job)
+        return
+    window = processes * 4
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = [pool.submit(_hash_range, job) for _, job in jobs[:window]]
+        for index in range(len(jobs)):
+            result = pending.pop(0).result()
+            if index + window < len(jobs):
+                pending.append(pool.submit(_hash_range, jobs[index + window][1]))
+            yield result
+
+
+class ContentIndex:
+    """Sorted distinct page hashes with their page counts and the VMs that hold them."""
+
+    def __init__(self):
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.masks = np.empty(0, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def add(self, hashes, counts, image):
+        """Merge sorted distinct ``hashes`` with their ``counts`` seen in VM number ``image``."""
+        bit = np.uint64(1) << np.uint64(image)
+        positions = np.searchsorted(self.hashes, hashes)
+        found = positions < len(self.hashes)
+        found[found] = self.hashes[positions[found]] == hashes[found]
+        self.counts[positions[found]] += counts[found]
+        self.masks[positions[found]] |= bit
+        new = ~found
+        self.hashes = np.insert(self.hashes, positions[new], hashes[new])
+        self.counts = np.insert(self.counts, positions[new], counts[new])
+        self.masks = np.insert(self.masks, positions[new], bit)
+
+
+@dataclass
+class DedupReport:
+    images: list
+    image_pages: list
+    page_size: int
+    total_pages: int
+    distinct_pages: int
+    zero_pages: int
+    shared_pages: int
+    cross_vm_pages: int
+    scanned: np.ndarray
+    saved: np.ndarray
+    seconds_per_page: float
+    elapsed: float
+
+    @property
+    def sharing_ratio(self):
+        return self.total_pages / max(self.distinct_pages, 1)
+
+    @property
+    def saved_bytes(self):
+        return (self.total_pages - self.distinct_pages) * self.page_size
+
+    def scan_cost(self, pages_to_scan=100, sleep_ms=20):
+        """Scan rate, CPU share of one core and time for one full pass at a KSM setting."""
+        rate = pages_to_scan * 1000 / sleep_ms
+        return {
+            "pages_to_scan": pages_to_scan,
+            "sleep_ms": sleep_ms,
+            "pages_per_second": rate,
+            "cpu_fraction": rate * self.seconds_per_page,
+            "full_scan_seconds": self.total_pages / rate,
+        }
+
+    def savings_over_time(self, pages_to_scan=100, sleep_ms=20):
+        """Seconds since the scanner started and the bytes saved by then."""
+        rate = pages_to_scan * 1000 / sleep_ms
+        return self.scanned / rate, self.saved * self.page_size
+
+
+def scan_images(paths, page_size=PAGE_SIZE, processes=None, range_pages=None):
+    """Fingerprint every page of the memory images at ``paths`` and measure how much they share.
+
+    Up to 64 images are supported (one bit each in the VM mask). A partial
+    page at the end of an image is ignored.
+    """
+    paths = list(paths)
+    if len(paths) > 64:
+        raise ValueError(f"At most 64 images can be scanned together, got {len(paths)}")
+    image_pages = [os.path.getsize(path) // page_size for path in paths]
+    # Around 256 points on the savings curve, without tasks too small to be worth a process
+    range_pages = range_pages or int(np.clip(sum(image_pages) // 256, 1024, _MAX_RANGE_PAGES))
+    jobs = _ranges(paths, page_size, range_pages)
+    processes = min(len(jobs), os.cpu_count() or 1) if processes is None else processes
+
+    started = time.perf_counter()
+    index = ContentIndex()
+    zero_pages = 0
+    cpu_seconds = 0.0
+    scanned = [0]
+    saved = [0]
+    for (image, job), (hashes, counts, seconds) in zip(jobs, _hashed(jobs, processes)):
+        index.add(hashes, counts, image)
+        if len(hashes) and hashes[0] == 0:
+            zero_pages += int(counts[0])
+        cpu_seconds += seconds
+        scanned.append(scanned[-1] + job[2])
+        saved.append(scanned[-1] - len(index))
+
+    total = scanned[-1]
+    vms = np.zeros(len(index), dtype=np.int64)
+    for image in range(len(paths)):
+        vms += ((index.masks >> np.uint64(image)) & np.uint64(1)).astype(np.int64)
+    return DedupReport(
+        images=[os.path.basename(path) for path in paths],
+        image_pages=image_pages,
+        page_size=page_size,
+        total_pages=total,
+        distinct_pages=len(index),
+        zero_pages=zero_pages,
+        shared_pages=int(index.counts[index.counts > 1].sum()),
+        cross_vm_pages=int(index.counts[vms > 1].sum()),
+        scanned=np.array(scanned, dtype=np.int64),
+        saved=np.array(saved, dtype=np.int64),
+        seconds_per_page=cpu_seconds / max(total, 1),
+        elapsed=time.perf_counter() - started,
+    )
+
+
+def find_images(directory):
+    """Memory image files in ``directory``, sorted by name."""
+    return sorted(path for pattern in IMAGE_PATTERNS for path in glob.glob(os.path.join(directory, pattern)))
+
+
+def synthetic_images(directory, vms=4, pages=8192, base_pages=4096, base_fraction=0.4, zero_fraction=0.2,
+                     duplicate_fraction=0.05, page_size=PAGE_SIZE, seed=0):
+    """Write ``vms`` raw memory images that share a common guest OS image, for demos.
+
+    Each page is a zero page, a page of the shared base image (kernel and
+    libraries every guest loads), a copy of another page of the same VM or
+    private random data. Images are written in blocks; returns their paths.
+    """
+    rng = np.random.default_rng(seed)
+    base = rng.integers(0, 256, (base_pages, page_size), dtype=np.uint8)
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for vm in range(vms):
+        path = os.path.join(directory, f"vm{vm}.img")
+        private = rng.integers(0, 256, (64, page_size), dtype=np.uint8)
+        with open(path, "wb") as stream:
+            for first in range(0, pages, _BLOCK_PAGES * 4):
+                count = min(_BLOCK_PAGES * 4, pages - first)
+                kind = rng.choice(4, count, p=(zero_fraction, base_fraction, duplicate_fraction,
+                                               1 - zero_fraction - base_fraction - duplicate_fraction))
+                block = rng.integers(0, 256, (count, page_size), dtype=np.uint8)
+                block[kind == 0] = 0
+                block[kind == 1] = base[rng.integers(0, base_pages, (kind == 1).sum())]
+                # Duplicates within one VM come from a small set of private pages (page cache, heaps)
+                block[kind == 2] = private[rng.integers(0, len(private), (kind == 2).sum())]
+                stream.write(block.tobytes())
+        paths.append(path)
+    return paths
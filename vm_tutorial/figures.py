@@ -0,0 +1,732 @@
+"""Figures and tables of the tutorial, independent of Streamlit.
+
+Each visualization is split into a ``*_data`` function that runs the model,
+a ``*_figure`` function that draws a matplotlib figure from that data and,
+where the app shows one, a ``*_table`` function returning a DataFrame. The
+app caches and displays them. ``VIEWS`` lists every visualization with the
+options the app offers, and ``render`` uses it to draw all of them without
+a server.
+
+pyplot and pandas are imported inside the functions that draw or tabulate,
+so importing this module for its data functions stays cheap; ``warm_up``
+loads them ahead of the first request.
+"""
+
+import glob
+import io
+import itertools
+import os
+import tempfile
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from vm_tutorial import (benchmarks, coherence, content, dedup, iovirt, isa, migration, nested_paging, numa, overcommit,
+                         replacement, snapshots, stack_distance, translation)
+from vm_tutorial.benchmarks import BENCHMARKS, baseline_label, load_result_dir, relative_performance
+from vm_tutorial.coherence import WORKLOAD_PRESETS as COHERENCE_WORKLOADS, sweep as coherence_sweep
+from vm_tutorial.dedup import SCAN_RATES, find_images, scan_images, synthetic_images
+from vm_tutorial.iovirt import compare_paths as compare_io_paths, environment_io_performance, relative_iops, request_stream
+from vm_tutorial.isa import WORKLOAD_PRESETS as GUEST_WORKLOADS, compare_techniques, measured_performance
+from vm_tutorial.migration import ENCODINGS, STRATEGIES as MIGRATION_STRATEGIES, WORKLOAD_PRESETS as MIGRATION_WORKLOADS, MigrationConfig, migrate
+from vm_tutorial.nested_paging import MODES as NESTED_MODES, compare_modes, random_access_trace
+from vm_tutorial.numa import TOPOLOGIES, Cluster, compare_strategies as compare_placements, hosts_for, random_workload
+from vm_tutorial.overcommit import HostConfig, random_vms, simulate as simulate_overcommit
+from vm_tutorial.replacement import POLICIES as REPLACEMENT_POLICIES, REFERENCE_PATTERNS, compare_policies, curve_sizes
+from vm_tutorial.snapshots import chain_growth
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Benchmark result files (JSON or Parquet) written by `python -m vm_tutorial bench`
+BENCHMARK_DIR = os.environ.get("VM_TUTORIAL_BENCH_DIR", os.path.join(_ROOT, "bench_results"))
+# Raw VM memory images for the deduplication view; sample images are generated when there are none
+SNAPSHOT_DIR = os.environ.get("VM_TUTORIAL_SNAPSHOT_DIR", os.path.join(_ROOT, "snapshots"))
+
+# Colour schemes for the static diagrams; the theme name is part of the cache key
+DIAGRAM_THEMES = {
+    "light": {"background": "#F0F2F6"},
+}
+
+# Options of the app's selectboxes (and a sample of its sliders)
+PAGING_FOOTPRINTS = {"64 MB": 64 << 20, "1 GB": 1 << 30, "16 GB": 16 << 30}
+MIGRATION_MEMORY_GB = (4, 16, 64)
+MIGRATION_LINKS_GBIT = (1, 10, 25)
+OVERCOMMIT_VMS = (50, 200, 1000)
+OVERCOMMIT_RATIOS = (1.25, 1.5, 2.0)
+REPLACEMENT_LENGTHS = (20_000, 100_000)
+SNAPSHOT_DIRTY_PERCENT = (1, 5, 20)
+NUMA_VMS = (500, 2000, 8000)
+TECHNIQUE_COLUMNS = {"Full Virtualization": "Trap-and-emulate", "Paravirtualization": "Paravirtual", "Hardware-Assisted": "Hardware-assisted"}
+TECHNIQUE_IO_PATHS = {"Full Virtualization": "Emulated device", "Paravirtualization": "vhost", "Hardware-Assisted": "SR-IOV passthrough"}
+IO_SIZES = {"4 KB": 4 * 1024, "64 KB": 64 * 1024}
+# Offered request rates; None keeps IO_QUEUE_DEPTH requests in flight on every path
+IO_RATES = (20_000, 200_000, None)
+IO_QUEUE_DEPTH = 32
+IO_BATCHES = (1, 8)
+
+
+def figure_bytes(fig, fmt, dpi=200):
+    import matplotlib.pyplot as plt
+    # Serialize the figure and always release it from pyplot's figure registry
+    buffer = io.BytesIO()
+    try:
+        fig.savefig(buffer, format=fmt, dpi=dpi, bbox_inches="tight")
+    finally:
+        plt.close(fig)
+    return buffer.getvalue()
+
+
+# Diagrams
+
+def hypervisor_diagram(theme_name="light"):
+    import matplotlib.pyplot as plt
+    theme = DIAGRAM_THEMES[theme_name]
+    fig, ax = plt.subplots(figsize=(10, 6))
+    fig.patch.set_facecolor(theme['background'])
+    ax.set_facecolor(theme['background'])
+
+    # Create a simple diagram
+    ax.add_patch(plt.Rectangle((0, 0), 10, 2, fc='#BFDBFE', ec='black', lw=2))
+    ax.text(5, 1, 'Hardware (CPU, Memory, I/O)', ha='center', va='center', fontsize=12, fontweight='bold')
+
+    # Type 1
+    ax.add_patch(plt.Rectangle((0, 2.5), 4.5, 1.5, fc='#93C5FD', ec='black', lw=2))
+    ax.text(2.25, 3.25, 'Type 1 Hypervisor', ha='center', va='center', fontsize=11, fontweight='bold')
+
+    ax.add_patch(plt.Rectangle((0.5, 4.5), 1, 1, fc='#DBEAFE', ec='black', lw=1))
+    ax.text(1, 5, 'VM 1', ha='center', va='center', fontsize=10)
+
+    ax.add_patch(plt.Rectangle((2, 4.5), 1, 1, fc='#DBEAFE', ec='black', lw=1))
+    ax.text(2.5, 5, 'VM 2', ha='center', va='center', fontsize=10)
+
+    ax.add_patch(plt.Rectangle((3.5, 4.5), 1, 1, fc='#DBEAFE', ec='black', lw=1))
+    ax.text(4, 5, 'VM 3', ha='center', va='center', fontsize=10)
+
+    # Type 2
+    ax.add_patch(plt.Rectangle((5.5, 2.5), 4.5, 1.5, fc='#60A5FA', ec='black', lw=2))
+    ax.text(7.75, 3.25, 'Host OS', ha='center', va='center', fontsize=11, fontweight='bold')
+
+    ax.add_patch(plt.Rectangle((5.5, 4.5), 4.5, 1, fc='#93C5FD', ec='black', lw=1))
+    ax.text(7.75, 5, 'Type 2 Hypervisor', ha='center', va='center', fontsize=10)
+
+    ax.add_patch(plt.Rectangle((6, 6), 1, 1, fc='#DBEAFE', ec='black', lw=1))
+    ax.text(6.5, 6.5, 'VM 1', ha='center', va='center', fontsize=10)
+
+    ax.add_patch(plt.Rectangle((7.5, 6), 1, 1, fc='#DBEAFE', ec='black', lw=1))
+    ax.text(8, 6.5, 'VM 2', ha='center', va='center', fontsize=10)
+
+    # Add labels at the top
+    ax.text(2.25, 7.2, 'Type 1 (Bare Metal)', ha='center', va='center', fontsize=12, fontweight='bold')
+    ax.text(7.75, 7.2, 'Type 2 (Hosted)', ha='center', va='center', fontsize=12, fontweight='bold')
+
+    # Setting the limits and removing the axes
+    ax.set_xlim(-0.5, 11)
+    ax.set_ylim(-0.5, 8)
+    ax.axis('off')
+    return fig
+
+
+def translation_diagram(theme_name="light"):
+    import matplotlib.pyplot as plt
+    theme = DIAGRAM_THEMES[theme_name]
+    fig, ax = plt.subplots(figsize=(10, 6))
+    fig.patch.set_facecolor(theme['background'])
+    ax.set_facecolor(theme['background'])
+
+    # Virtual Address
+    ax.add_patch(plt.Rectangle((1, 5), 6, 1, fc='#BFDBFE', ec='black', lw=2))
+    ax.text(4, 5.5, 'Virtual Address', ha='center', va='center', fontsize=11, fontweight='bold')
+
+    # Split into VPN and Offset
+    ax.add_patch(plt.Rectangle((1, 4), 3, 1, fc='#93C5FD', ec='black', lw=2))
+    ax.text(2.5, 4.5, 'Virtual Page Number', ha='center', va='center', fontsize=10)
+
+    ax.add_patch(plt.Rectangle((4, 4), 3, 1, fc='#60A5FA', ec='black', lw=2))
+    ax.text(5.5, 4.5, 'Offset', ha='center', va='center', fontsize=10)
+
+    # Arrows
+    ax.arrow(2.5, 4, 0, -1, head_width=0.2, head_length=0.2, fc='black', ec='black')
+    ax.arrow(5.5, 4, 0, -1, head_width=0.2, head_length=0.2, fc='black', ec='black')
+
+    # TLB and Page Table
+    ax.add_patch(plt.Rectangle((1, 2), 3, 1, fc='#DBEAFE', ec='black', lw=2))
+    ax.text(2.5, 2.5, 'TLB Lookup', ha='center', va='center', fontsize=10)
+
+    ax.add_patch(plt.Rectangle((5, 2), 3, 1, fc='#DBEAFE', ec='black', lw=2))
+    ax.text(6.5, 2.5, 'Page Table', ha='center', va='center', fontsize=10)
+
+    # Arrows down
+    ax.arrow(2.5, 2, 0, -1, head_width=0.2, head_length=0.2, fc='black', ec='black')
+    ax.arrow(6.5, 2, 0, -1, head_width=0.2, head_length=0.2, fc='black', ec='black')
+
+    # Physical frame number + offset
+    ax.add_patch(plt.Rectangle((1, 0.5), 3, 1, fc='#93C5FD', ec='black', lw=2))
+    ax.text(2.5, 1, 'Physical Frame Number', ha='center', va='center', fontsize=10)
+
+    ax.add_patch(plt.Rectangle((4, 0.5), 3, 1, fc='#60A5FA', ec='black', lw=2))
+    ax.text(5.5, 1, 'Offset', ha='center', va='center', fontsize=10)
+
+    # Final arrow to physical address
+    ax.arrow(4, 0.1, 0, -0.5, head_width=0.2, head_length=0.2, fc='black', ec='black')
+
+    # Physical Address
+    ax.add_patch(plt.Rectangle((1, -1), 6, 1, fc='#BFDBFE', ec='black', lw=2))
+    ax.text(4, -0.5, 'Physical Address', ha='center', va='center', fontsize=11, fontweight='bold')
+
+    # Connect TLB miss to page table
+    ax.arrow(3.5, 2.5, 1, 0, head_width=0.2, head_length=0.2, fc='red', ec='red')
+    ax.text(4, 2.8, 'TLB Miss', color='red', ha='center', va='center', fontsize=9)
+
+    # Setting the limits and removing the axes
+    ax.set_xlim(0, 10)
+    ax.set_ylim(-1.5, 6.5)
+    ax.axis('off')
+    return fig
+
+
+# Virtualization approaches
+
+def comparison_columns(performance, io_performance):
+    """The comparison table's columns with the Performance row modeled by ``isa.measured_performance``
+    and the I/O row simulated by ``iovirt.relative_iops``."""
+    table = {approach: list(values) for approach, values in content.COMPARISON_TABLE.items()}
+    row = table["Feature"].index("Performance")
+    io_row = table["Feature"].index("I/O Devices")
+    for approach, technique in TECHNIQUE_COLUMNS.items():
+        table[approach][row] = f"{performance[technique]:.0%} of native (modeled)"
+        table[approach][io_row] += f", {io_performance[TECHNIQUE_IO_PATHS[approach]]:.0%} of native IOPS (simulated)"
+    return table
+
+
+def comparison_data():
+    return measured_performance(), relative_iops()
+
+
+def comparison_table(performance, io_performance):
+    import pandas as pd
+    return pd.DataFrame(comparison_columns(performance, io_performance)).set_index("Feature")
+
+
+def comparison_markdown(performance, io_performance):
+    """The comparison table as Markdown, which the app renders without building a DataFrame."""
+    columns = comparison_columns(performance, io_performance)
+    lines = ["| " + " | ".join(columns) + " |", "|" + " --- |" * len(columns)]
+    lines += ["| " + " | ".join(row) + " |" for row in zip(*columns.values())]
+    return "\n".join(lines)
+
+
+def isa_data(workload_name):
+    return compare_techniques(GUEST_WORKLOADS[workload_name])
+
+
+def isa_table(rows):
+    import pandas as pd
+    techniques = pd.DataFrame(rows).set_index("technique")
+    techniques["relative_performance"] *= 100
+    techniques["host_ips"] /= 1e6
+    return techniques[["exits_per_million", "cycles_per_exit", "cpi", "relative_performance", "guest_mips", "host_ips"]].round(2).rename(columns={
+        "exits_per_million": "Exits per Million Instructions", "cycles_per_exit": "Cycles per Exit", "cpi": "Cycles per Instruction",
+        "relative_performance": "% of Native", "guest_mips": "Guest MIPS at 3 GHz", "host_ips": "Interpreter M Instr/s"})
+
+
+# VM Performance Comparison
+
+def benchmark_data(directory=BENCHMARK_DIR):
+    return relative_performance(load_result_dir(directory))
+
+
+def performance_data(directory=BENCHMARK_DIR):
+    return benchmark_data(directory), environment_io_performance()
+
+
+def benchmark_figure(comparison, io_performance):
+    """Measured results when there are any, else the illustrative chart with simulated I/O."""
+    import matplotlib.pyplot as plt
+    if not comparison:
+        return sample_performance_figure(io_performance)
+    # Measured results: bars are means, whiskers 95% bootstrap CIs, dots the samples
+    labels = list(comparison)
+    names = [name for name in BENCHMARKS if any(name in comparison[label] for label in labels)]
+    colors = ['#1D4ED8', '#2563EB', '#3B82F6', '#60A5FA', '#93C5FD', '#BFDBFE']
+    fig, ax = plt.subplots(figsize=(10, 6))
+    x = np.arange(len(labels))
+    width = 0.8 / len(names)
+
+    for i, name in enumerate(names):
+        offset = (i - (len(names) - 1) / 2) * width
+        stats = [comparison[label].get(name) for label in labels]
+        means = np.array([s["mean"] if s else np.nan for s in stats])
+        errors = np.array([[s["mean"] - s["low"], s["high"] - s["mean"]] if s else [0, 0] for s in stats]).T
+        ax.bar(x + offset, means, width, yerr=errors, capsize=3, label=f"{BENCHMARKS[name].category}: {BENCHMARKS[name].label}", color=colors[i % len(colors)])
+        for j, s in enumerate(stats):
+            if s:
+                ax.scatter(np.full(len(s["samples"]), x[j] + offset), s["samples"], s=8, color='#1E3A8A', alpha=0.6, zorder=3)
+
+    ax.axhline(100, color='black', linewidth=1, linestyle=':')
+    ax.set_title(f'Measured Performance (% of {baseline_label(comparison)})', fontsize=14)
+    ax.set_ylabel('Performance (%)', fontsize=12)
+    ax.set_xticks(x)
+    ax.set_xticklabels(labels, fontsize=10)
+    ax.legend(fontsize=8)
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    return fig
+
+
+def sample_performance_figure(io_performance):
+    import matplotlib.pyplot as plt
+    # Sample data for VM performance; I/O from environment_io_performance
+    vm_types = ["Bare Metal", "Type 1 Hypervisor", "Type 2 Hypervisor", "Container"]
+    cpu_perf = [100, 95, 80, 98]
+    io_perf = [io_performance[vm_type] for vm_type in vm_types]
+    memory_perf = [100, 94, 85, 97]
+
+    # Create bar chart
+    fig, ax = plt.subplots(figsize=(10, 6))
+    x = np.arange(len(vm_types))
+    width = 0.25
+
+    ax.bar(x - width, cpu_perf, width, label='CPU Performance', color='#60A5FA')
+    ax.bar(x, io_perf, width, label='I/O Performance', color='#93C5FD')
+    ax.bar(x + width, memory_perf, width, label='Memory Performance', color='#BFDBFE')
+
+    ax.set_title('Virtualization Performance Comparison (% of Bare Metal)', fontsize=14)
+    ax.set_ylabel('Performance (%)', fontsize=12)
+    ax.set_xticks(x)
+    ax.set_xticklabels(vm_types, fontsize=10)
+    ax.set_ylim(0, 110)
+    ax.legend()
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    return fig
+
+
+# Memory Virtualization Overhead
+
+def paging_data(footprint, pte_updates_per_10k):
+    return compare_modes(random_access_trace(200_000, PAGING_FOOTPRINTS[footprint]), pte_update_rate=pte_updates_per_10k / 10_000)
+
+
+def paging_figure(rows):
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    paging_data = pd.DataFrame(rows)
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    for mode, marker, color in zip(NESTED_MODES, ['o-', 's-', '^-'], ['#2563EB', '#60A5FA', '#93C5FD']):
+        group = paging_data[paging_data["mode"] == mode]
+        label = 'Nested Paging (EPT/NPT)' if mode == "Nested paging" else mode.title()
+        ax.plot(group["page_bytes"] // 1024, group["relative_latency"], marker, label=label, linewidth=2, color=color)
+
+    ax.set_title('Memory Access Latency by Page Size', fontsize=14)
+    ax.set_xlabel('Page Size (KB)', fontsize=12)
+    ax.set_ylabel('Relative Latency (lower is better)', fontsize=12)
+    ax.set_xscale('log', base=2)
+    ax.grid(True, linestyle='--', alpha=0.7)
+    ax.legend()
+    return fig
+
+
+def paging_table(rows):
+    import pandas as pd
+    return pd.DataFrame(rows).set_index(["page_size", "mode"])[["tlb_misses", "refs_per_walk", "max_refs_per_walk", "vm_exits", "cycles_per_access"]].round(2)
+
+
+# Cache Coherence Impact
+
+def coherence_data(protocol, workload_name):
+    return coherence_sweep(protocol=protocol, workload=COHERENCE_WORKLOADS[workload_name])
+
+
+def coherence_figure(rows, protocol):
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    sweep_data = pd.DataFrame(rows)
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    for (name, group), marker, color in zip(sweep_data.groupby("interconnect", sort=False), ['o-', 's-'], ['#60A5FA', '#93C5FD']):
+        ax.plot(group["cores"], group["efficiency"], marker, label=f"{name} ({protocol})", linewidth=2, color=color)
+
+    ax.set_title('Cache Coherence Scalability', fontsize=14)
+    ax.set_xlabel('Number of Processors', fontsize=12)
+    ax.set_ylabel('Relative Performance per Processor', fontsize=12)
+    ax.set_xscale('log', base=2)
+    ax.grid(True, linestyle='--', alpha=0.7)
+    ax.legend()
+    return fig
+
+
+def coherence_table(rows):
+    import pandas as pd
+    sweep_data = pd.DataFrame(rows)
+    return sweep_data.set_index(["interconnect", "cores"])[["transactions", "invalidations", "cache_to_cache_rate", "efficiency"]].round(3)
+
+
+# Live Migration
+
+def migration_data(workload_name, memory_gb, link_gbit, encoding_name):
+    config = MigrationConfig(memory_bytes=memory_gb << 30, bandwidth=link_gbit * 1e9 / 8)
+    return [migrate(MIGRATION_WORKLOADS[workload_name], strategy, config, ENCODINGS[encoding_name])
+            for strategy in MIGRATION_STRATEGIES]
+
+
+def migration_figure(results, workload_name, memory_gb, link_gbit):
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    rounds = pd.DataFrame(results[0].rounds)
+    fig, ax = plt.subplots(figsize=(10, 6))
+    colors = ['#1E3A8A' if phase == "stop-and-copy" else '#60A5FA' for phase in rounds["phase"]]
+    ax.bar(rounds["round"], rounds["wire_bytes"] / 2**30, color=colors, label='Sent in round')
+    ax.plot(rounds["round"], rounds["dirtied"] * 4096 / 2**30, 'o-', color='#93C5FD', linewidth=2, label='Dirtied during round')
+
+    ax.set_title(f'Pre-copy Rounds ({workload_name}, {memory_gb} GB over {link_gbit} Gbit/s)', fontsize=14)
+    ax.set_xlabel('Round (last bar: stop-and-copy)', fontsize=12)
+    ax.set_ylabel('Data (GB)', fontsize=12)
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    ax.legend()
+    return fig
+
+
+def migration_table(results):
+    import pandas as pd
+    comparison = pd.DataFrame([result.summary() for result in results]).set_index("strategy")
+    comparison["downtime"] *= 1000
+    comparison["wire_bytes"] /= 2**30
+    return comparison[["total_time", "downtime", "wire_bytes", "precopy_rounds", "faults", "fault_stall"]].round(2).rename(columns={
+        "total_time": "Total (s)", "downtime": "Downtime (ms)", "wire_bytes": "Sent (GB)", "precopy_rounds": "Pre-copy Rounds",
+        "faults": "Remote Faults", "fault_stall": "vCPU Stall (s)"})
+
+
+# Memory Deduplication
+
+def dedup_data(directory=SNAPSHOT_DIR):
+    sample_dir = os.path.join(tempfile.gettempdir(), "vm_tutorial_images")
+    return scan_images(find_images(directory) or find_images(sample_dir) or synthetic_images(sample_dir))
+
+
+def dedup_figure(report, pages_to_scan, sleep_ms):
+    import matplotlib.pyplot as plt
+    seconds, saved = report.savings_over_time(pages_to_scan, sleep_ms)
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.plot(seconds, saved / 2**20, '-', linewidth=2, color='#2563EB', label=f'{pages_to_scan} pages every {sleep_ms} ms')
+    ax.axhline(report.saved_bytes / 2**20, color='#93C5FD', linestyle='--', label='All duplicates merged')
+
+    ax.set_title('Memory Saved by Page Sharing While the Scanner Runs', fontsize=14)
+    ax.set_xlabel('Time Since Scanning Started (s)', fontsize=12)
+    ax.set_ylabel('Memory Saved (MB)', fontsize=12)
+    ax.grid(True, linestyle='--', alpha=0.7)
+    ax.legend()
+    return fig
+
+
+def dedup_table(report, sleep_ms):
+    import pandas as pd
+    costs = pd.DataFrame([report.scan_cost(rate, sleep_ms) for rate in SCAN_RATES]).set_index("pages_to_scan")
+    costs["cpu_fraction"] *= 100
+    return costs[["pages_per_second", "cpu_fraction", "full_scan_seconds"]].round(1).rename(columns={
+        "pages_per_second": "Pages/s", "cpu_fraction": "CPU (% of a core)", "full_scan_seconds": "Full Pass (s)"})
+
+
+# Memory Overcommit
+
+def overcommit_data(vm_count, overcommit):
+    working_sets = random_vms(vm_count)
+    return simulate_overcommit(working_sets, HostConfig(memory_mb=working_sets.sizes.sum() / overcommit))
+
+
+def overcommit_figure(results, vm_count, overcommit):
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    for result, color in zip(results, ['#1E3A8A', '#60A5FA', '#93C5FD']):
+        # One-minute averages keep the day readable
+        minutes = len(result.faults) // 60 * 60
+        per_minute = result.faults[:minutes].reshape(-1, 60).mean(axis=1)
+        ax.plot(np.arange(len(per_minute)) / 60, per_minute, label=result.policy, linewidth=1.5, color=color)
+
+    ax.set_title(f'Page Faults on a {overcommit:g}x Overcommitted Host ({vm_count} VMs)', fontsize=14)
+    ax.set_xlabel('Hour of Day', fontsize=12)
+    ax.set_ylabel('Page Faults per Second', fontsize=12)
+    ax.set_xticks(range(0, 25, 4))
+    ax.set_yscale('symlog', linthresh=10)
+    ax.grid(True, linestyle='--', alpha=0.7)
+    ax.legend()
+    return fig
+
+
+def overcommit_table(results):
+    import pandas as pd
+    summary = pd.DataFrame([result.summary() for result in results]).set_index("policy")
+    summary["pressure_fraction"] *= 100
+    summary[["mean_balloon_mb", "mean_swapped_mb"]] /= 1024
+    return summary[["faults_per_second", "peak_faults_per_second", "stalled_per_second", "reclaim_latency", "pressure_fraction", "mean_balloon_mb",
+                    "mean_swapped_mb"]].round(1).rename(columns={
+        "faults_per_second": "Faults/s", "peak_faults_per_second": "Peak Faults/s", "stalled_per_second": "Stalled Faults/s",
+        "reclaim_latency": "Reclaim Latency (s)",
+        "pressure_fraction": "Short of Memory (%)", "mean_balloon_mb": "Ballooned (GB)", "mean_swapped_mb": "Host-Swapped (GB)"})
+
+
+# Page Replacement
+
+def replacement_data(pattern_name, references):
+    keys = REFERENCE_PATTERNS[pattern_name](references)
+    sizes = curve_sizes(len(np.unique(keys)), points=10)
+    curve, ratios = compare_policies(keys, sizes)
+    return curve, sizes, ratios
+
+
+def replacement_figure(curve, sizes, ratios, pattern_name):
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    # The LRU curve covers every memory size; the other policies are simulated at the marked sizes
+    frames = np.arange(1, curve.distinct_pages + 1)
+    ax.plot(frames, curve.miss_ratios[1:] * 100, label='LRU (all sizes)', linewidth=2, color='#1E3A8A')
+    for policy, marker in zip(REPLACEMENT_POLICIES[1:], ['o', 's', '^', 'D', '*']):
+        ax.plot(sizes, ratios[policy] * 100, label=policy, marker=marker, linestyle='--', linewidth=1)
+
+    ax.set_title(f'Miss-Ratio Curves: {pattern_name}', fontsize=14)
+    ax.set_xlabel('Memory Size (Page Frames)', fontsize=12)
+    ax.set_ylabel('Miss Ratio (%)', fontsize=12)
+    ax.set_xscale('log')
+    ax.grid(True, linestyle='--', alpha=0.7)
+    ax.legend()
+    return fig
+
+
+def replacement_table(sizes, ratios):
+    import pandas as pd
+    return pd.DataFrame({policy: ratios[policy] * 100 for policy in REPLACEMENT_POLICIES}, index=pd.Index(sizes, name="Frames")).round(1)
+
+
+# VM Snapshots
+
+def snapshot_data(dirty_percent, use_bitmap=True):
+    # A 32 MB disk in 64 KB blocks, checkpointed 16 times
+    return chain_growth(depth=16, blocks=512, dirty_fraction=dirty_percent / 100, use_bitmap=use_bitmap)
+
+
+def snapshot_figure(report, dirty_percent):
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.plot(report.depth, report.chain_lookup_ns / 1000, 'o-', linewidth=2, color='#1E3A8A', label='Chain walk (qcow2 backing files)')
+    ax.plot(report.depth, report.index_lookup_ns / 1000, 'o-', linewidth=2, color='#60A5FA', label='Folded block index')
+
+    ax.set_title(f'Block Lookup Time as the Snapshot Chain Grows ({dirty_percent}% of Blocks Dirty per Checkpoint)', fontsize=14)
+    ax.set_xlabel('Chain Depth (Snapshots)', fontsize=12)
+    ax.set_ylabel('Lookup Time (µs)', fontsize=12)
+    ax.grid(True, linestyle='--', alpha=0.7)
+    ax.legend()
+    return fig
+
+
+def snapshot_table(report):
+    import pandas as pd
+    return pd.DataFrame({
+        "Dirty Blocks": report.dirty_blocks,
+        "New Blocks Stored": report.new_blocks,
+        "Checkpoint (ms)": report.checkpoint_seconds * 1000,
+        "Restore (ms)": report.restore_seconds * 1000,
+        "Stored (MB)": report.stored_bytes / 2**20,
+        "Space Amplification": report.space_amplification,
+        "Full Copies": report.full_copy_amplification,
+    }, index=pd.Index(report.depth, name="Depth")).round(2)
+
+
+# I/O Virtualization
+
+def io_rate_label(rate):
+    return f"{rate // 1000}k IOPS" if rate else f"Saturated, Queue Depth {IO_QUEUE_DEPTH}"
+
+
+def io_data(size_name, rate, batch):
+    return compare_io_paths(request_stream(100_000, rate, IO_SIZES[size_name]), batch, None if rate else IO_QUEUE_DEPTH)
+
+
+def io_percentiles(result, points=201):
+    # Latency in µs at evenly spaced percentiles
+    shares = np.linspace(0, 100, points)
+    return shares, np.percentile(result.latency_ns, shares) / 1000
+
+
+def io_figure(results, size_name, rate, batch):
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=(10, 6))
+    colors = ['#1E3A8A', '#BFDBFE', '#93C5FD', '#60A5FA', '#3B82F6', '#2563EB']
+    for result, color in zip(results, colors):
+        shares, latency = io_percentiles(result)
+        ax.plot(latency, shares, linewidth=2, color=color, label=result.path)
+
+    ax.set_xscale('log')
+    ax.set_title(f'Latency of {size_name} Requests ({io_rate_label(rate)}, Batches of {batch})', fontsize=14)
+    ax.set_xlabel('Latency (µs)', fontsize=12)
+    ax.set_ylabel('Requests (%)', fontsize=12)
+    ax.grid(True, linestyle='--', alpha=0.7)
+    ax.legend()
+    return fig
+
+
+def io_table(results):
+    import pandas as pd
+    rows = [result.summary() for result in results]
+    return pd.DataFrame({
+        "kIOPS": [row["iops"] / 1000 for row in rows],
+        "p50 (µs)": [row["p50_us"] for row in rows],
+        "p99 (µs)": [row["p99_us"] for row in rows],
+        "p99.9 (µs)": [row["p999_us"] for row in rows],
+        "VM Exits per Request": [row["exits_per_request"] for row in rows],
+        "Kicks per Request": [row["kicks_per_request"] for row in rows],
+        "Interrupts per Request": [row["interrupts_per_request"] for row in rows],
+        "Time (s)": [row["seconds"] for row in rows],
+    }, index=pd.Index([row["path"] for row in rows], name="I/O Path")).round(2)
+
+
+# NUMA Placement
+
+def numa_data(topology_name, vm_count):
+    # Enough hosts for the workload's memory at 70% load
+    topology = TOPOLOGIES[topology_name]
+    workload = random_workload(vm_count)
+    return compare_placements(Cluster(topology, hosts_for(topology, workload)), workload)
+
+
+def latency_percentiles(result, points=201):
+    # Relative memory latency of the placed VMs at evenly spaced percentiles
+    shares = np.linspace(0, 100, points)
+    return shares, np.percentile(result.latency[result.placed], shares)
+
+
+def numa_figure(results, topology_name, vm_count):
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=(10, 6))
+    colors = ['#93C5FD', '#3B82F6', '#1E3A8A']
+    for result, color in zip(results, colors):
+        shares, latency = latency_percentiles(result)
+        ax.plot(latency, shares, linewidth=2, color=color, label=result.strategy)
+
+    ax.set_title(f'Memory Latency of {vm_count:,} VMs on {topology_name} Hosts', fontsize=14)
+    ax.set_xlabel('Memory Latency Relative to an Idle Local Node', fontsize=12)
+    ax.set_ylabel('VMs (%)', fontsize=12)
+    ax.grid(True, linestyle='--', alpha=0.7)
+    ax.legend()
+    return fig
+
+
+def numa_table(results):
+    import pandas as pd
+    rows = [result.summary() for result in results]
+    return pd.DataFrame({
+        "Remote Access %": [row["remote_access"] * 100 for row in rows],
+        "Relative Latency": [row["relative_latency"] for row in rows],
+        "Spanning VMs": [row["spanning_vms"] for row in rows],
+        "Peak Node Utilization %": [row["peak_utilization"] * 100 for row in rows],
+        "Contended Nodes %": [row["contended_nodes"] * 100 for row in rows],
+        "Cross-Host Group Traffic %": [row["cross_host_traffic"] * 100 for row in rows],
+        "Hosts Used": [row["hosts_used"] for row in rows],
+        "Unplaced": [row["unplaced"] for row in rows],
+        "Time (s)": [row["seconds"] for row in rows],
+    }, index=pd.Index([row["strategy"] for row in rows], name="Strategy")).round(2)
+
+
+# Warm-up
+
+def warm_up():
+    """Import pyplot, pandas and the chart library before anything needs them.
+
+    The first pyplot import on a host also builds matplotlib's font cache
+    on disk, which takes seconds. Returns the time each step took.
+    """
+    timings = {}
+    started = time.perf_counter()
+    import matplotlib.pyplot  # noqa: F401
+    from matplotlib import font_manager
+    font_manager.findfont(font_manager.FontProperties())
+    timings["matplotlib"] = time.perf_counter() - started
+    started = time.perf_counter()
+    import pandas  # noqa: F401
+    timings["pandas"] = time.perf_counter() - started
+    started = time.perf_counter()
+    from vm_tutorial import charts  # noqa: F401
+    timings["altair"] = time.perf_counter() - started
+    return timings
+
+
+@dataclass(frozen=True)
+class View:
+    """One figure or table of the tutorial and every variant the app can show.
+
+    ``data`` runs once per combination of ``data_options``; ``figure`` and
+    ``table`` then run for each combination of ``display_options`` on that
+    data. ``modules`` are the sources whose changes invalidate rendered
+    files, and ``inputs`` names files the data is read from.
+    """
+
+    name: str
+    slug: str
+    tab: str
+    data: object
+    figure: object = None
+    table: object = None
+    data_options: dict = field(default_factory=dict)
+    display_options: dict = field(default_factory=dict)
+    modules: tuple = ()
+    inputs: object = None
+
+    def data_variants(self):
+        return [dict(zip(self.data_options, values)) for values in itertools.product(*self.data_options.values())]
+
+    def display_variants(self):
+        return [dict(zip(self.display_options, values)) for values in itertools.product(*self.display_options.values())]
+
+
+def _benchmark_inputs():
+    return sorted(path for pattern in ("*.json", "*.parquet") for path in glob.glob(os.path.join(BENCHMARK_DIR, pattern)))
+
+
+VIEWS = {view.slug: view for view in (
+    View("Virtualization Overview", "hypervisor-diagram", "Overview", data=lambda: None,
+         figure=lambda _, theme_name: hypervisor_diagram(theme_name), display_options={"theme_name": tuple(DIAGRAM_THEMES)}),
+    View("Memory Address Translation Process", "translation-diagram", "Memory Virtualization", data=lambda: None,
+         figure=lambda _, theme_name: translation_diagram(theme_name), display_options={"theme_name": tuple(DIAGRAM_THEMES)}),
+    View("Comparison of Virtualization Approaches", "approaches", "Virtual Machine Concepts", data=comparison_data,
+         table=lambda data: comparison_table(*data), modules=(isa, iovirt, content)),
+    View("Trap-and-Emulate in Action", "trap-and-emulate", "Virtual Machine Concepts", data=isa_data,
+         table=lambda rows, **_: isa_table(rows), data_options={"workload_name": tuple(GUEST_WORKLOADS)}, modules=(isa,)),
+    View("VM Performance Comparison", "performance", "Visualizations", data=performance_data,
+         figure=lambda data: benchmark_figure(*data), modules=(benchmarks, iovirt), inputs=_benchmark_inputs),
+    View("Memory Virtualization Overhead", "paging-overhead", "Visualizations", data=paging_data,
+         figure=lambda rows, **_: paging_figure(rows), table=lambda rows, **_: paging_table(rows),
+         data_options={"footprint": tuple(PAGING_FOOTPRINTS), "pte_updates_per_10k": (0, 10, 25, 50)},
+         modules=(nested_paging, translation, stack_distance)),
+    View("Cache Coherence Impact", "coherence", "Visualizations", data=coherence_data,
+         figure=lambda rows, protocol, **_: coherence_figure(rows, protocol), table=lambda rows, **_: coherence_table(rows),
+         data_options={"protocol": tuple(coherence.PROTOCOLS), "workload_name": tuple(COHERENCE_WORKLOADS)}, modules=(coherence,)),
+    View("Live Migration", "migration", "Visualizations", data=migration_data,
+         figure=lambda results, workload_name, memory_gb, link_gbit, **_: migration_figure(results, workload_name, memory_gb, link_gbit),
+         table=lambda results, **_: migration_table(results),
+         data_options={"workload_name": tuple(MIGRATION_WORKLOADS), "memory_gb": MIGRATION_MEMORY_GB,
+                       "link_gbit": MIGRATION_LINKS_GBIT, "encoding_name": tuple(ENCODINGS)}, modules=(migration,)),
+    View("Memory Deduplication", "dedup", "Visualizations", data=dedup_data,
+         figure=lambda report, pages_to_scan, sleep_ms: dedup_figure(report, pages_to_scan, sleep_ms),
+         table=lambda report, pages_to_scan, sleep_ms: dedup_table(report, sleep_ms),
+         display_options={"pages_to_scan": SCAN_RATES, "sleep_ms": (20, 100, 200)}, modules=(dedup,),
+         inputs=lambda: find_images(SNAPSHOT_DIR)),
+    View("Memory Overcommit", "overcommit", "Visualizations", data=overcommit_data,
+         figure=lambda results, vm_count, overcommit: overcommit_figure(results, vm_count, overcommit),
+         table=lambda results, **_: overcommit_table(results),
+         data_options={"vm_count": OVERCOMMIT_VMS, "overcommit": OVERCOMMIT_RATIOS}, modules=(overcommit,)),
+    View("VM Snapshots", "snapshots", "Visualizations", data=snapshot_data,
+         figure=lambda report, dirty_percent, **_: snapshot_figure(report, dirty_percent), table=lambda report, **_: snapshot_table(report),
+         data_options={"dirty_percent": SNAPSHOT_DIRTY_PERCENT, "use_bitmap": (True, False)}, modules=(snapshots,)),
+    View("I/O Virtualization", "io", "Visualizations", data=io_data,
+         figure=lambda results, size_name, rate, batch: io_figure(results, size_name, rate, batch),
+         table=lambda results, **_: io_table(results),
+         data_options={"size_name": tuple(IO_SIZES), "rate": IO_RATES, "batch": IO_BATCHES}, modules=(iovirt,)),
+    View("NUMA Placement", "numa", "Visualizations", data=numa_data,
+         figure=lambda results, topology_name, vm_count: numa_figure(results, topology_name, vm_count),
+         table=lambda results, **_: numa_table(results),
+         data_options={"topology_name": tuple(TOPOLOGIES), "vm_count": NUMA_VMS}, modules=(numa,)),
+    View("Page Replacement", "replacement", "Visualizations", data=replacement_data,
+         figure=lambda data, pattern_name, **_: replacement_figure(*data, pattern_name),
+         table=lambda data, **_: replacement_table(data[1], data[2]),
+         data_options={"pattern_name": tuple(REFERENCE_PATTERNS), "references": REPLACEMENT_LENGTHS},
+         modules=(replacement, stack_distance)),
+)}
@@ -0,0 +1,166 @@
+"""Opt-in timing of the app's sections, figures and tables.
+
+A ``Recorder`` keeps, per kind (``rerun``, ``section``, ``figure``,
+``table``) and name, a count, a sum and a latency histogram with fixed
+bucket bounds. Recording takes no lock: every thread writes only to its
+own shard, keyed by thread ident, and readers merge the shards. Streamlit
+runs each rerun in a fresh thread, but idents are reused once a thread
+has exited, so the number of shards stays at the number of threads alive
+at once. A reader can see a histogram between the bucket increment and the
+sum update of a concurrent observation, which is harmless for monitoring.
+
+Merged histograms are exported in the Prometheus text exposition format,
+to a file (for node_exporter's textfile collector) or on a small HTTP
+endpoint.
+"""
+
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds in seconds, from 1 ms cached reruns to multi-second simulations
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRIC = "vm_tutorial_render_seconds"
+
+
+@dataclass
+class Histogram:
+    buckets: tuple
+    counts: list
+    total: float
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    @property
+    def mean(self):
+        return self.total / max(self.count, 1)
+
+    def quantile(self, q):
+        """Estimated ``q`` quantile, interpolating within a bucket as Prometheus' ``histogram_quantile`` does."""
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return 0.0
+
+
+class Recorder:
+    """Per-process latency histograms, recorded without locks."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self._shards = {}
+        self._exported = 0.0
+        self.started = time.time()
+
+    def observe(self, kind, name, seconds):
+        shard = self._shards.get(threading.get_ident())
+        if shard is None:
+            shard = self._shards.setdefault(threading.get_ident(), {})
+        series = shard.get((kind, name))
+        if series is None:
+            # Bucket counts, with the overflow bucket last, followed by the sum
+            series = shard[(kind, name)] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, seconds)] += 1
+        series[-1] += seconds
+
+    @contextmanager
+    def timer(self, kind, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(kind, name, time.perf_counter() - started)
+
+    def histograms(self):
+        """Merged histogram of every series, keyed by ``(kind, name)``."""
+        merged = {}
+        for shard in list(self._shards.values()):
+            for key, series in list(shard.items()):
+                series = list(series)
+                histogram = merged.get(key)
+                if histogram is None:
+                    merged[key] = Histogram(self.buckets, series[:-1], series[-1])
+                else:
+                    histogram.counts = [a + b for a, b in zip(histogram.counts, series[:-1])]
+                    histogram.total += series[-1]
+        return merged
+
+    def rows(self):
+        """One summary row per series in milliseconds, slowest total first."""
+        rows = [{"kind": kind, "name": name, "count": histogram.count, "total_ms": histogram.total * 1000,
+                 "mean_ms": histogram.mean * 1000, "p50_ms": histogram.quantile(0.5) * 1000,
+                 "p95_ms": histogram.quantile(0.95) * 1000, "p99_ms": histogram.quantile(0.99) * 1000}
+                for (kind, name), histogram in self.histograms().items()]
+        return sorted(rows, key=lambda row: -row["total_ms"])
+
+    def prometheus(self):
+        """All series in the Prometheus text exposition format."""
+        lines = [f"# HELP {METRIC} Time spent rendering parts of the tutorial app.", f"# TYPE {METRIC} histogram"]
+        for (kind, name), histogram in sorted(self.histograms().items()):
+            labels = f'kind="{_escape(kind)}",name="{_escape(name)}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{METRIC}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{METRIC}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"{METRIC}_sum{{{labels}}} {histogram.total:.6f}")
+            lines.append(f"{METRIC}_count{{{labels}}} {histogram.count}")
+        lines.append("# HELP vm_tutorial_start_time_seconds Start time of the process' recorder.")
+        lines.append("# TYPE vm_tutorial_start_time_seconds gauge")
+        lines.append(f"vm_tutorial_start_time_seconds {self.started:.0f}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write ``prometheus()`` to ``path`` atomically, as the textfile collector expects."""
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as stream:
+            stream.write(self.prometheus())
+        os.replace(temporary, path)
+
+    def export(self, path, interval=5.0):
+        """``write`` to ``path`` unless that was done less than ``interval`` seconds ago."""
+        now = time.monotonic()
+        if now - self._exported >= interval:
+            self._exported = now
+            self.write(path)
+
+    def serve(self, port, host="127.0.0.1"):
+        """Serve ``prometheus()`` at ``http://host:port/metrics`` from a daemon thread; returns the server."""
+        recorder = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = recorder.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+        return server
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+RECORDER = Recorder()
@@ -0,0 +1,476 @@
+"""I/O virtualization paths: emulated devices, virtio rings, vhost and SR-IOV.
+
+A request stream (arrival times and sizes) goes through the stages of one
+``IOPath`` to a physical device, and back:
+
+1. the guest driver on the submitting vCPU builds the request, publishes it
+   in the queue and notifies the device ("kicks");
+2. the backend fetches it: QEMU's device model, a vhost kernel worker, or
+   the hardware itself for native and SR-IOV queues;
+3. the device transfers the data at its bandwidth and completes after its
+   latency;
+4. the completion interrupt runs the guest driver's handler on another
+   vCPU, as with multi-queue devices whose interrupts are steered there.
+
+Each stage serves requests in order, one at a time, so its departure times
+follow Lindley's recursion ``d[i] = max(a[i], d[i-1]) + s[i]``, which
+``_lindley`` evaluates for a whole window of requests with a cumulative
+maximum. What a request costs depends on state of the other stages:
+
+* an emulated device exits to the VMM on every register access, and so on
+  every request and every interrupt;
+* a virtio driver kicks only when the backend has gone to sleep, and the
+  device interrupts only when the driver's handler has finished
+  (``VIRTIO_F_EVENT_IDX``), so under load a single kick or interrupt covers
+  many requests. A kick to QEMU is a heavy exit to user space; with vhost it
+  is an ioeventfd handled in the kernel;
+* with SR-IOV the guest owns a virtual function: doorbells are plain writes
+  and posted interrupts reach the vCPU without an exit.
+
+QEMU's backends poll an empty ring for a while before they sleep; vhost
+sleeps at once. Interrupts only cost the handler's vCPU, so
+``_lindley_setup`` finds them exactly in one vectorized pass. Kicks also
+delay the backend, which decides the next kick, so each window iterates
+the stages until the kick flags stop changing. A window is at most one
+queue's worth of requests: a slot is reused only after the driver reaped the
+request that last held it, which the preallocated ``free_at`` array records,
+so a saturated stream keeps exactly the queue size in flight.
+
+The virtio rings are preallocated arrays laid out as in the specification.
+Requests really pass through them, and the cache lines each request touches
+there are charged as transfers between the guest's and the backend's cores:
+a split ring spreads a request over the descriptor table, the available and
+the used ring, a packed ring keeps it in one descriptor, and a batch of
+requests shares lines.
+"""
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+CACHE_LINE = 64
+KB = 1024
+
+# Descriptor flags (virtio 1.1)
+VIRTQ_DESC_F_WRITE = 2
+VIRTQ_DESC_F_AVAIL = 1 << 7
+VIRTQ_DESC_F_USED = 1 << 15
+
+
+@dataclass(frozen=True)
+class Costs:
+    """CPU costs along the I/O path, in nanoseconds."""
+
+    submit_ns: float = 700
+    complete_ns: float = 500
+    interrupt_ns: float = 500
+    # An uncached MMIO write to a device doorbell
+    doorbell_ns: float = 150
+    # A cache line moving between the guest's and the backend's cores
+    line_ns: float = 80
+    # An exit handled inside KVM (ioeventfd, interrupt injection, EOI) and one that returns to the userspace VMM
+    light_exit_ns: float = 1200
+    heavy_exit_ns: float = 6000
+
+
+@dataclass(frozen=True)
+class Device:
+    """A fast NVMe SSD."""
+
+    latency_ns: float = 10_000
+    bandwidth_gbs: float = 3.2
+
+
+@dataclass(frozen=True)
+class IOPath:
+    name: str
+    # "split" or "packed" virtqueue; None for a device's own queues
+    ring: str = None
+    queue_size: int = 256
+    # Heavy exits for register accesses per request, on top of the kick
+    submit_exits: int = 0
+    # "heavy" (MMIO exit to the VMM), "light" (ioeventfd in the kernel) or "doorbell" (no exit)
+    kick: str = "doorbell"
+    # Kick only when the backend sleeps; interrupt only when the driver's handler is idle
+    notify_suppression: bool = False
+    interrupt_suppression: bool = False
+    # Per-request work of the backend, how long it polls an empty ring before sleeping and the time to wake it after a kick
+    backend_ns: float = 0
+    poll_ns: float = 0
+    wake_ns: float = 0
+    # Bounce-buffer copy by the backend, GB/s (0: zero-copy)
+    copy_gbs: float = 0
+    # "native", "injected" (an exit to inject and one for the EOI) or "posted" (no exits)
+    interrupt: str = "injected"
+    # Heavy exits in the guest's interrupt handler (status register reads)
+    interrupt_exits: int = 0
+
+
+# QEMU's iothreads poll adaptively for up to 32 us (poll-max-ns) before they sleep
+POLL_NS = 32_000
+
+PATHS = {
+    "Native": IOPath("Native", queue_size=1024, interrupt="native"),
+    "Emulated device": IOPath("Emulated device", queue_size=32, submit_exits=4, kick="heavy", backend_ns=4000,
+                              wake_ns=5000, copy_gbs=4.0, interrupt_exits=1),
+    "virtio split ring": IOPath("virtio split ring", ring="split", kick="heavy", notify_suppression=True,
+                                interrupt_suppression=True, backend_ns=1500, poll_ns=POLL_NS, wake_ns=5000),
+    "virtio packed ring": IOPath("virtio packed ring", ring="packed", kick="heavy", notify_suppression=True,
+                                 interrupt_suppression=True, backend_ns=1500, poll_ns=POLL_NS, wake_ns=5000),
+    "vhost": IOPath("vhost", ring="split", kick="light", notify_suppression=True, interrupt_suppression=True,
+                    backend_ns=700, wake_ns=2000),
+    # The IOMMU translates the virtual function's DMA addresses
+    "SR-IOV passthrough": IOPath("SR-IOV passthrough", queue_size=1024, backend_ns=250, interrupt="posted"),
+}
+
+# The I/O path behind each environment of the performance comparison. Hosted hypervisors (VirtualBox,
+# VMware Workstation, QEMU) ship paravirtual drivers served by their user-space process; containers use the host's driver
+ENVIRONMENT_PATHS = {"Bare Metal": "Native", "Type 1 Hypervisor": "vhost", "Type 2 Hypervisor": "virtio split ring",
+                     "Container": "Native"}
+
+
+class SplitRing:
+    """A split virtqueue: descriptor table, available ring and used ring.
+
+    Descriptors are used in order (``VIRTIO_F_IN_ORDER``), so request ``i``
+    takes descriptor ``i % size``. Indices run freely as in the
+    specification and are reduced modulo the size on access.
+    """
+
+    # Bytes per entry of the descriptor table, the available ring and the used ring
+    ENTRIES = (16, 2, 8)
+    # The used ring's index, read once per interrupt
+    INDEX_LINES = 1
+
+    def __init__(self, size):
+        self.size = size
+        self.desc_addr = np.zeros(size, np.uint64)
+        self.desc_len = np.zeros(size, np.uint32)
+        self.desc_flags = np.zeros(size, np.uint16)
+        self.avail = np.zeros(size, np.uint16)
+        self.used_id = np.zeros(size, np.uint32)
+        self.used_len = np.zeros(size, np.uint32)
+        self.avail_idx = self.last_avail = self.used_idx = self.last_used = 0
+
+    def publish(self, addrs, lens, writes):
+        slots = (self.avail_idx + np.arange(len(lens))) % self.size
+        self.desc_addr[slots] = addrs
+        self.desc_len[slots] = lens
+        self.desc_flags[slots] = np.where(writes, 0, VIRTQ_DESC_F_WRITE)
+        self.avail[slots] = slots
+        self.avail_idx += len(lens)
+        return slots
+
+    def fetch(self, count):
+        """The device side: descriptor ids and lengths of the next ``count`` available requests."""
+        ids = self.avail[(self.last_avail + np.arange(count)) % self.size]
+        self.last_avail += count
+        return ids, self.desc_len[ids]
+
+    def push_used(self, ids, lens):
+        slots = (self.used_idx + np.arange(len(ids))) % self.size
+        self.used_id[slots] = ids
+        self.used_len[slots] = lens
+        self.used_idx += len(ids)
+
+    def reap(self, count):
+        ids = self.used_id[(self.last_used + np.arange(count)) % self.size]
+        self.last_used += count
+        return ids
+
+    def submission_lines(self, slots, starts):
+        """Cache lines the device fetches per request.
+
+        Entries share a line with the previous request of the same batch
+        (``starts`` marks the first of each); every batch also reads the
+        ring's index.
+        """
+        desc, avail = ((slots * entry) // CACHE_LINE for entry in self.ENTRIES[:2])
+        return _new_lines(desc, starts) + _new_lines(avail, starts) + starts
+
+    def completion_lines(self, slots):
+        """Cache lines of the used ring the driver's handler fetches per request."""
+        return _new_lines((slots * self.ENTRIES[2]) // CACHE_LINE, slots == slots[0])
+
+
+class PackedRing:
+    """A packed virtqueue: one ring of descriptors the device marks used in place.
+
+    The driver flips a descriptor's AVAIL flag to its wrap counter to make
+    it available; the device sets USED to match when it is done.
+    """
+
+    ENTRY = 16
+    INDEX_LINES = 0
+
+    def __init__(self, size):
+        self.size = size
+        self.desc_addr = np.zeros(size, np.uint64)
+        self.desc_len = np.zeros(size, np.uint32)
+        self.desc_id = np.zeros(size, np.uint16)
+        self.desc_flags = np.zeros(size, np.uint16)
+        self.next_avail = self.next_used = self.last_avail = self.last_used = 0
+
+    def _slots(self, start, count):
+        positions = start + np.arange(count)
+        return positions % self.size, (positions // self.size) % 2 == 0
+
+    def publish(self, addrs, lens, writes):
+        slots, wrap = self._slots(self.next_avail, len(lens))
+        self.desc_addr[slots] = addrs
+        self.desc_len[slots] = lens
+        self.desc_id[slots] = slots
+        avail = np.where(wrap, VIRTQ_DESC_F_AVAIL, VIRTQ_DESC_F_USED)
+        self.desc_flags[slots] = avail | np.where(writes, 0, VIRTQ_DESC_F_WRITE)
+        self.next_avail += len(lens)
+        return slots
+
+    def fetch(self, count):
+        slots, wrap = self._slots(self.last_avail, count)
+        expected = np.where(wrap, VIRTQ_DESC_F_AVAIL, VIRTQ_DESC_F_USED)
+        if np.any(self.desc_flags[slots] & (VIRTQ_DESC_F_AVAIL | VIRTQ_DESC_F_USED) != expected):
+            raise RuntimeError("device fetched a descriptor the driver has not made available")
+        self.last_avail += count
+        return self.desc_id[slots], self.desc_len[slots]
+
+    def push_used(self, ids, lens):
+        slots, wrap = self._slots(self.next_used, len(ids))
+        self.desc_id[slots] = ids
+        self.desc_len[slots] = lens
+        self.desc_flags[slots] = np.where(wrap, VIRTQ_DESC_F_AVAIL | VIRTQ_DESC_F_USED, 0)
+        self.next_used += len(ids)
+
+    def reap(self, count):
+        slots, _ = self._slots(self.last_used, count)
+        self.last_used += count
+        return self.desc_id[slots]
+
+    # Both sides read the descriptors themselves; there are no indices to fetch
+    def submission_lines(self, slots, starts):
+        return _new_lines((slots * self.ENTRY) // CACHE_LINE, starts)
+
+    def completion_lines(self, slots):
+        return _new_lines((slots * self.ENTRY) // CACHE_LINE, slots == slots[0])
+
+
+RINGS = {"split": SplitRing, "packed": PackedRing}
+
+
+def _new_lines(lines, starts):
+    """1 where a request's entry lies on another cache line than the previous request's in its batch."""
+    changed = np.ones(len(lines), bool)
+    changed[1:] = lines[1:] != lines[:-1]
+    return (changed | starts).astype(np.int64)
+
+
+def _lindley(arrivals, service, previous):
+    """Departure times of a FIFO single server whose last departure before the window was ``previous``."""
+    total = np.cumsum(service)
+    return total + np.maximum.accumulate(np.maximum(arrivals - (total - service), previous))
+
+
+def _lindley_setup(arrivals, service, setup, previous):
+    """Departures of a FIFO single server that first spends ``setup`` on a request that finds it idle.
+
+    Also returns which requests found it idle. Within a busy period the
+    server owes ``arrival - work before it``, call it the key, and the next
+    request to find it idle is the first whose key exceeds the key of the
+    busy period's first request plus the setup. That request's key is the
+    running maximum, so every successor is one ``searchsorted`` and the
+    chain of busy-period starts is marked by pointer doubling.
+    """
+    n = len(arrivals)
+    total = np.cumsum(service)
+    key = arrivals - (total - service)
+    peak = np.maximum.accumulate(key)
+    jump = np.append(np.searchsorted(peak, peak + setup, side="right"), n)
+    starts = np.zeros(n + 1, bool)
+    starts[np.searchsorted(peak, previous, side="right")] = True
+    # After the k-th pass the marked starts are the first 2**k of the chain and jump skips 2**k of them
+    while True:
+        following = jump[np.flatnonzero(starts[:n])]
+        following = following[following < n]
+        if not following.size:
+            break
+        starts[following] = True
+        jump = jump[jump]
+    starts = starts[:n]
+    latest = np.maximum.accumulate(np.where(starts, np.arange(n), -1))
+    base = np.where(latest >= 0, key[latest] + setup, previous)
+    return base + total, starts
+
+
+@dataclass(frozen=True)
+class RequestStream:
+    arrivals_ns: np.ndarray
+    sizes: np.ndarray
+    writes: np.ndarray
+
+    def __len__(self):
+        return len(self.arrivals_ns)
+
+
+def request_stream(n, iops=None, size=4 * KB, write_fraction=0.3, seed=0):
+    """Poisson arrivals at ``iops``, or all at once (a saturating stream limited by the queue) when None."""
+    rng = np.random.default_rng(seed)
+    if iops:
+        arrivals = np.cumsum(rng.exponential(1e9 / iops, n))
+    else:
+        arrivals = np.zeros(n)
+    return RequestStream(arrivals, np.full(n, size, np.uint32), rng.random(n) < write_fraction)
+
+
+@dataclass
+class IOResult:
+    path: str
+    latency_ns: np.ndarray
+    completed_ns: np.ndarray
+    arrivals_ns: np.ndarray
+    kicks: int
+    interrupts: int
+    exits: int
+    seconds: float
+
+    @property
+    def iops(self):
+        span = self.completed_ns.max() - self.arrivals_ns.min()
+        return float(len(self.latency_ns) / span * 1e9)
+
+    def summary(self):
+        n = len(self.latency_ns)
+        p50, p99, p999 = np.percentile(self.latency_ns, [50, 99, 99.9]) / 1000
+        return {
+            "path": self.path,
+            "iops": self.iops,
+            "mean_us": float(self.latency_ns.mean() / 1000),
+            "p50_us": float(p50),
+            "p99_us": float(p99),
+            "p999_us": float(p999),
+            "exits_per_request": self.exits / n,
+            "kicks_per_request": self.kicks / n,
+            "interrupts_per_request": self.interrupts / n,
+            "seconds": self.seconds,
+        }
+
+
+def simulate(path, stream, batch=1, queue_depth=None, device=Device(), costs=Costs()):
+    """Run ``stream`` through ``path``.
+
+    The driver publishes up to ``batch`` requests together when they are
+    already queued behind each other (blk-mq plugging, ``xmit_more``) and
+    keeps at most ``queue_depth`` in flight, by default the queue size.
+    Latency runs from when a request gets a queue slot, as fio reports it.
+
+    Every window of up to ``queue_depth`` requests costs a fixed number of
+    NumPy calls, and the kick flags usually settle in one pass, so the run
+    time grows with ``n / queue_depth``. A million requests take 0.1-1.5 s
+    at the default queue sizes and 1.5-3.5 s at depth 32.
+    """
+    started = time.perf_counter()
+    n = len(stream)
+    size = min(path.queue_size, queue_depth or path.queue_size)
+    ring = RINGS[path.ring](size) if path.ring else None
+    # When each queue slot is free again: the driver reaped the request that held it
+    free_at = np.zeros(size)
+    issued = np.empty(n)
+    completed = np.empty(n)
+    kick_ns = {"heavy": costs.heavy_exit_ns, "light": costs.light_exit_ns, "doorbell": costs.doorbell_ns}[path.kick]
+    kick_exits = 0 if path.kick == "doorbell" else 1
+    injection_exits = 2 if path.interrupt == "injected" else 0
+    irq_exits = injection_exits + path.interrupt_exits
+    irq_ns = costs.interrupt_ns + injection_exits * costs.light_exit_ns + path.interrupt_exits * costs.heavy_exit_ns
+    if ring is not None:
+        irq_ns += ring.INDEX_LINES * costs.line_ns
+    transfer = stream.sizes / device.bandwidth_gbs
+    copy = stream.sizes / path.copy_gbs if path.copy_gbs else np.zeros(n)
+    kicks = interrupts = 0
+    idle = np.ones(1, bool)
+    last_submit = last_backend = last_transfer = last_handler = 0.0
+    window = max(size - size % batch, batch)
+    for begin in range(0, n, window):
+        end = min(begin + window, n)
+        k = end - begin
+        local = np.arange(k)
+        slots = np.arange(begin, end) % size
+        ready = np.maximum(stream.arrivals_ns[begin:end], free_at[slots])
+        # A batch closes at ``batch`` requests or when the next one is not queued yet
+        queued = np.append(True, ready[1:] <= ready[:-1] + costs.submit_ns)
+        run = np.maximum.accumulate(np.where(queued, 0, local))
+        first = ~queued | ((local - run) % batch == 0)
+        chunk = np.cumsum(first) - 1
+        last = np.append(first[1:], True)
+        firsts = np.flatnonzero(first)
+        sizes = stream.sizes[begin:end]
+        if ring is not None:
+            # Request i's buffer is at guest-physical address i * 64 KB
+            slots = ring.publish((begin + local) * 64 * KB, sizes, stream.writes[begin:end])
+            ids, lens = ring.fetch(k)
+            if not np.array_equal(ids, slots):
+                raise RuntimeError(f"{path.ring} ring returned descriptors out of order")
+            device_lines = ring.submission_lines(slots, first)
+        else:
+            lens, device_lines = sizes, 0
+        backend = path.backend_ns + copy[begin:end] + device_lines * costs.line_ns
+        completion = costs.complete_ns + (0 if ring is None else ring.completion_lines(slots) * costs.line_ns)
+        # Start from the previous window's flags; each depends only on earlier ones, so every pass settles one more
+        idle = np.resize(idle, len(firsts))
+        for _ in range(k + 1):
+            kicked = idle if path.notify_suppression else np.ones(len(firsts), bool)
+            kick = last & kicked[chunk]
+            submit = costs.submit_ns + path.submit_exits * costs.heavy_exit_ns + kick * kick_ns
+            submitted = _lindley(ready, submit, last_submit)
+            # Requests become visible when the last of their batch is published, before its kick
+            published = (submitted - kick * kick_ns)[last][chunk]
+            woken = first & idle[chunk]
+            fetched = _lindley(published + woken * path.wake_ns, backend, last_backend)
+            transfer_done = _lindley(fetched, transfer[begin:end], last_transfer)
+            before = np.concatenate(([last_backend], fetched[:-1]))
+            new_idle = published[firsts] > before[firsts] + path.poll_ns
+            if np.array_equal(new_idle, idle):
+                break
+            idle = new_idle
+        done = transfer_done + device.latency_ns
+        if path.interrupt_suppression:
+            # Completions that arrive while the handler runs are reaped without an interrupt
+            handled, irq = _lindley_setup(done, completion, irq_ns, last_handler)
+        else:
+            handled = _lindley(done, completion + irq_ns, last_handler)
+            irq = np.ones(k, bool)
+        if ring is not None:
+            ring.push_used(ids, lens)
+            ring.reap(k)
+        kicks += int(kick.sum())
+        interrupts += int(irq.sum())
+        issued[begin:end] = ready
+        completed[begin:end] = handled
+        free_at[slots] = handled
+        last_submit, last_backend, last_transfer, last_handler = submitted[-1], fetched[-1], transfer_done[-1], handled[-1]
+    exits = n * path.submit_exits + kicks * kick_exits + interrupts * irq_exits
+    return IOResult(path.name, completed - issued, completed, stream.arrivals_ns, kicks, interrupts, exits,
+                    time.perf_counter() - started)
+
+
+def compare_paths(stream, batch=1, queue_depth=None, paths=tuple(PATHS), device=Device(), costs=Costs()):
+    return [simulate(PATHS[name], stream, batch, queue_depth, device, costs) for name in paths]
+
+
+def relative_iops(n=1000, size=4 * KB, queue_depths=(1, 32)):
+    """Geometric mean over queue depths of each path's saturated IOPS relative to native.
+
+    Depth 1 measures the latency a path adds; depth 32 how much work it
+    leaves the host once requests overlap.
+    """
+    stream = request_stream(n, size=size)
+    totals = dict.fromkeys(PATHS, 1.0)
+    for depth in queue_depths:
+        iops = {result.path: result.iops for result in compare_paths(stream, queue_depth=depth)}
+        for name in PATHS:
+            totals[name] *= iops[name] / iops["Native"]
+    return {name: float(total ** (1 / len(queue_depths))) for name, total in totals.items()}
+
+
+def environment_io_performance():
+    """I/O performance of each environment of the performance comparison, % of bare metal."""
+    relative = relative_iops()
+    return {environment: 100 * relative[name] for environment, name in ENVIRONMENT_PATHS.items()}
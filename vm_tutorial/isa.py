@@ -0,0 +1,585 @@
+"""Trap-and-emulate on a toy instruction set.
+
+A small guest kernel and user program run on an interpreted CPU with user
+and kernel modes, eight registers and a word-addressed memory. The same
+guest runs under four virtualization techniques:
+
+- Native: the kernel owns the CPU and privileged instructions just execute.
+- Trap-and-emulate: the kernel is deprivileged, so each privileged
+  instruction, system call and interrupt traps to the VMM, which emulates
+  it on the virtual CPU state.
+- Paravirtual: the kernel is rewritten at load time. CLI/STI become stores
+  to a shared event mask, and the other privileged instructions become
+  hypercalls. System calls go straight to the guest kernel.
+- Hardware-assisted: the kernel runs in guest ring 0 (VT-x/AMD-V with
+  nested paging), so only I/O, interrupts and HALT cause VM exits.
+
+Programs are assembled into pre-decoded ``(op, a, b, c)`` tuples with branch
+targets resolved. The dispatch loop runs the unprivileged instructions
+inline. Every system instruction goes through a handler table that is built
+once per technique, so a run never checks which technique it is under.
+Ordinary instructions cost one cycle. System instructions, exits and their
+emulation cost the ``CycleCosts`` below, which gives cycles per exit and the
+guest's speed relative to native execution.
+"""
+
+import time
+from dataclasses import dataclass
+
+# Unprivileged instructions, executed inline by the dispatch loop
+ADD, ADDI, SUB, MUL, AND, LI, LOAD, STORE, STOREI, BNZ, JMP = range(11)
+# System instructions, dispatched through the technique's handler table
+SYSCALL, SYSRET, CLI, STI, OUT, IN, SETPT, HCALL, HALT = range(11, 20)
+OP_NAMES = ("add", "addi", "sub", "mul", "and", "li", "load", "store", "storei", "bnz", "jmp",
+            "syscall", "sysret", "cli", "sti", "out", "in", "setpt", "hcall", "halt")
+
+TECHNIQUES = ("Native", "Trap-and-emulate", "Paravirtual", "Hardware-assisted")
+CLOCK_HZ = 3e9
+MEMORY_WORDS = 2048
+
+# Guest memory layout (word addresses)
+SAVE, TIMER_SAVE, EVENT_MASK, TICKS, SWITCHES, PTBASE = 0, 8, 16, 17, 18, 19
+KERNEL_BUFFER, USER_BUFFER = 64, 1024
+EOI_PORT, CONSOLE_PORT = 0x20, 1
+
+# Hypercall numbers used by the paravirtual rewrite
+HC_IRET, HC_IO_OUT, HC_IO_IN, HC_MMU, HC_HALT = range(5)
+
+# How each operand is parsed and which field of (a, b, c) it fills
+_SYNTAX = {
+    "add": ("ra", "rb", "rc"), "sub": ("ra", "rb", "rc"), "mul": ("ra", "rb", "rc"), "and": ("ra", "rb", "rc"),
+    "addi": ("ra", "rb", "ic"), "li": ("ra", "ic"),
+    "load": ("ra", "m"), "store": ("ra", "m"), "storei": ("ic", "ib"),
+    "bnz": ("ra", "ic"), "jmp": ("ic",),
+    "syscall": (), "sysret": (), "cli": (), "sti": (), "halt": (),
+    "out": ("ic", "ra"), "in": ("ra", "ic"), "setpt": ("ra",), "hcall": ("ic",),
+}
+
+
+class GuestFault(Exception):
+    """The guest did something the machine cannot continue from (a privilege violation)."""
+
+
+@dataclass(frozen=True)
+class Program:
+    code: tuple
+    labels: dict
+
+    def listing(self):
+        """Assembly listing with addresses, for display."""
+        names = {address: label for label, address in self.labels.items()}
+        lines = []
+        for address, (op, a, b, c) in enumerate(self.code):
+            if address in names:
+                lines.append(f"{names[address]}:")
+            lines.append(f"  {address:4d}  {OP_NAMES[op]:<8} {a} {b} {c}")
+        return "\n".join(lines)
+
+
+def assemble(source):
+    """Assemble ``label:`` lines and ``op operand, ...`` instructions; ``;`` starts a comment."""
+    lines = []
+    labels = {}
+    for raw in source.splitlines():
+        line = raw.split(";", 1)[0].strip()
+        if not line:
+            continue
+        if line.endswith(":"):
+            labels[line[:-1]] = len(lines)
+            continue
+        lines.append(line)
+
+    def value(token):
+        return labels[token] if token in labels else int(token, 0)
+
+    code = []
+    for address, line in enumerate(lines):
+        mnemonic, _, rest = line.partition(" ")
+        if mnemonic not in _SYNTAX:
+            raise ValueError(f"Unknown instruction {mnemonic!r} at {address}")
+        operands = [token.strip() for token in rest.split(",")] if rest.strip() else []
+        if len(operands) != len(_SYNTAX[mnemonic]):
+            raise ValueError(f"{mnemonic} takes {len(_SYNTAX[mnemonic])} operands at {address}: {line!r}")
+        fields = {"a": 0, "b": 0, "c": 0}
+        for kind, token in zip(_SYNTAX[mnemonic], operands):
+            if kind == "m":
+                # [rN+imm] or [rN]
+                base, _, offset = token.strip("[]").partition("+")
+                fields["b"], fields["c"] = int(base.strip()[1:]), value(offset.strip() or "0")
+            elif kind[0] == "r":
+                fields[kind[1]] = int(token[1:])
+            else:
+                fields[kind[1]] = value(token)
+        code.append((OP_NAMES.index(mnemonic), fields["a"], fields["b"], fields["c"]))
+    return Program(tuple(code), labels)
+
+
+def paravirtualize(code):
+    """Rewrite a kernel's privileged instructions into event-mask stores and hypercalls."""
+    rewritten = []
+    for op, a, b, c in code:
+        if op == CLI:
+            rewritten.append((STOREI, 0, 1, EVENT_MASK))
+        elif op == STI:
+            rewritten.append((STOREI, 0, 0, EVENT_MASK))
+        elif op == SYSRET:
+            rewritten.append((HCALL, 0, 0, HC_IRET))
+        elif op == OUT:
+            rewritten.append((HCALL, a, c, HC_IO_OUT))
+        elif op == IN:
+            rewritten.append((HCALL, a, c, HC_IO_IN))
+        elif op == SETPT:
+            rewritten.append((HCALL, a, 0, HC_MMU))
+        elif op == HALT:
+            rewritten.append((HCALL, 0, 0, HC_HALT))
+        else:
+            rewritten.append((op, a, b, c))
+    return tuple(rewritten)
+
+
+@dataclass(frozen=True)
+class CycleCosts:
+    """Cycle costs of everything but ordinary instructions, which take one cycle each."""
+
+    syscall: int = 80
+    interrupt_flag: int = 5
+    io: int = 1000
+    page_table_switch: int = 250
+    interrupt: int = 250
+    # Round trips into the VMM: a deprivileged trap with instruction decode,
+    # a hypercall, and a hardware VM exit plus VM entry
+    trap: int = 1500
+    hypercall: int = 400
+    vm_exit: int = 800
+    # VMM work once there
+    device_emulation: int = 1500
+    shadow_sync: int = 4000
+    page_table_validation: int = 1200
+    inject: int = 200
+
+
+# Semantics of the system instructions on the (virtual) CPU state
+
+def _privileged(machine, pc, name):
+    if machine.user:
+        raise GuestFault(f"Privileged instruction {name} in user mode at {pc}")
+
+
+def _syscall(machine, pc, a, b, c):
+    machine.epc = pc + 1
+    machine.user = False
+    return machine.syscall_vector
+
+
+def _sysret(machine, pc, a, b, c):
+    _privileged(machine, pc, "sysret")
+    machine.user = True
+    machine.interrupts = True
+    return machine.epc
+
+
+def _cli(machine, pc, a, b, c):
+    _privileged(machine, pc, "cli")
+    machine.interrupts = False
+    return pc + 1
+
+
+def _sti(machine, pc, a, b, c):
+    _privileged(machine, pc, "sti")
+    machine.interrupts = True
+    return pc + 1
+
+
+def _out(machine, pc, a, b, c):
+    _privileged(machine, pc, "out")
+    machine.ports[c] = machine.regs[a]
+    machine.io_operations += 1
+    return pc + 1
+
+
+def _in(machine, pc, a, b, c):
+    _privileged(machine, pc, "in")
+    machine.regs[a] = machine.ports.get(c, 0)
+    machine.io_operations += 1
+    return pc + 1
+
+
+def _setpt(machine, pc, a, b, c):
+    _privileged(machine, pc, "setpt")
+    machine.ptbase = machine.regs[a]
+    return pc + 1
+
+
+def _halt(machine, pc, a, b, c):
+    _privileged(machine, pc, "halt")
+    machine.halted = True
+    return pc
+
+
+def _undefined(machine, pc, a, b, c):
+    raise GuestFault(f"Undefined instruction {OP_NAMES[machine.code[pc][0]]} at {pc}")
+
+
+# Handler factories: where the cycles go for each way of running an instruction
+
+def _native(semantics, cost=None):
+    def handler(machine, pc, a, b, c):
+        if cost:
+            machine.system_cycles += getattr(machine.costs, cost)
+        return semantics(machine, pc, a, b, c)
+    return handler
+
+
+def _exit(semantics, reason, entry, work=None):
+    def handler(machine, pc, a, b, c):
+        costs = machine.costs
+        machine.record_exit(reason, getattr(costs, entry) + (getattr(costs, work) if work else 0))
+        return semantics(machine, pc, a, b, c)
+    return handler
+
+
+# Paravirtual hypercalls: (semantics of the instruction they replace, exit reason, VMM work)
+_HYPERCALLS = {
+    HC_IRET: (_sysret, "iret", "syscall"),
+    HC_IO_OUT: (lambda machine, pc, a, b, c: _out(machine, pc, a, 0, b), "io", "device_emulation"),
+    HC_IO_IN: (lambda machine, pc, a, b, c: _in(machine, pc, a, 0, b), "io", "device_emulation"),
+    HC_MMU: (_setpt, "page table", "page_table_validation"),
+    HC_HALT: (_halt, "halt", None),
+}
+
+
+def _hypercall(machine, pc, a, b, c):
+    _privileged(machine, pc, "hcall")
+    semantics, reason, work = _HYPERCALLS[c]
+    costs = machine.costs
+    machine.record_exit(reason, costs.hypercall + (getattr(costs, work) if work else 0))
+    return semantics(machine, pc, a, b, c)
+
+
+_TRAPPED = {
+    SYSCALL: _exit(_syscall, "syscall", "trap", "syscall"),
+    SYSRET: _exit(_sysret, "iret", "trap", "syscall"),
+    CLI: _exit(_cli, "interrupt flag", "trap", "interrupt_flag"),
+    STI: _exit(_sti, "interrupt flag", "trap", "interrupt_flag"),
+    OUT: _exit(_out, "io", "trap", "device_emulation"),
+    IN: _exit(_in, "io", "trap", "device_emulation"),
+    SETPT: _exit(_setpt, "page table", "trap", "shadow_sync"),
+    HALT: _exit(_halt, "halt", "trap"),
+}
+
+_NATIVE = {
+    SYSCALL: _native(_syscall, "syscall"),
+    SYSRET: _native(_sysret, "syscall"),
+    CLI: _native(_cli, "interrupt_flag"),
+    STI: _native(_sti, "interrupt_flag"),
+    OUT: _native(_out, "io"),
+    IN: _native(_in, "io"),
+    SETPT: _native(_setpt, "page_table_switch"),
+    HALT: _native(_halt),
+}
+
+_HANDLERS = {
+    "Native": _NATIVE,
+    "Trap-and-emulate": _TRAPPED,
+    # Unrewritten privileged instructions still trap in a deprivileged kernel
+    "Paravirtual": {**_TRAPPED, SYSCALL: _NATIVE[SYSCALL], HCALL: _hypercall},
+    "Hardware-assisted": {
+        **_NATIVE,
+        OUT: _exit(_out, "io", "vm_exit", "device_emulation"),
+        IN: _exit(_in, "io", "vm_exit", "device_emulation"),
+        HALT: _exit(_halt, "halt", "vm_exit"),
+    },
+}
+# Precompiled tables indexed by ``op - SYSCALL``
+_TABLES = {technique: [handlers.get(op, _undefined) for op in range(SYSCALL, HALT + 1)]
+           for technique, handlers in _HANDLERS.items()}
+# Entry cost of a timer interrupt that arrives while the technique's VMM owns the CPU
+_INTERRUPT_EXITS = {"Native": None, "Trap-and-emulate": "trap", "Paravirtual": "trap", "Hardware-assisted": "vm_exit"}
+
+
+class Machine:
+    """One guest CPU running ``program`` under a virtualization technique."""
+
+    def __init__(self, program, technique="Native", costs=CycleCosts(), timer_interval=100_000):
+        if technique not in TECHNIQUES:
+            raise ValueError(f"Unknown technique {technique!r}; expected one of {TECHNIQUES}")
+        self.technique = technique
+        self.code = paravirtualize(program.code) if technique == "Paravirtual" else program.code
+        self.costs = costs
+        self.regs = [0] * 8
+        self.mem = [0] * MEMORY_WORDS
+        self.ports = {}
+        self.pc = program.labels.get("boot", 0)
+        self.epc = program.labels.get("user", 0)
+        self.syscall_vector = program.labels.get("syscall", 0)
+        self.timer_vector = program.labels.get("timer", 0)
+        self.user = False
+        self.interrupts = False
+        self.ptbase = 0
+        self.halted = False
+        self.timer_interval = timer_interval
+        self.next_tick = timer_interval
+        self.pending = False
+        self.instructions = 0
+        self.system_cycles = 0
+        self.exit_cycles = 0
+        self.exits = {}
+        self.io_operations = 0
+        self.elapsed = 0.0
+        self._system = _TABLES[technique]
+
+    def record_exit(self, reason, cycles):
+        self.exits[reason] = self.exits.get(reason, 0) + 1
+        self.exit_cycles += cycles
+
+    @property
+    def cycles(self):
+        return self.instructions + self.system_cycles + self.exit_cycles
+
+    def _unmasked(self):
+        if self.technique == "Paravirtual":
+            return self.mem[EVENT_MASK] == 0
+        return self.interrupts
+
+    def _tick(self, pc):
+        """Raise due timer interrupts and deliver a pending one if the guest can take it."""
+        while self.instructions >= self.next_tick:
+            self.pending = True
+            self.next_tick += self.timer_interval
+        # The kernel is not preemptible: interrupts wait for the return to user mode
+        if not (self.pending and self.user and self._unmasked()):
+            return pc
+        self.pending = False
+        entry = _INTERRUPT_EXITS[self.technique]
+        if entry is None:
+            self.system_cycles += self.costs.interrupt
+        else:
+            self.record_exit("interrupt", getattr(self.costs, entry) + self.costs.inject)
+        self.epc = pc
+        self.user = False
+        self.interrupts = False
+        return self.timer_vector
+
+    def run(self, max_instructions=1_000_000):
+        """Execute up to ``max_instructions`` more guest instructions, or until HALT.
+
+        Nothing is counted or checked per instruction. Straight-line code
+        runs from ``start`` to ``pc``, so the instruction count is brought up
+        to date only where control leaves it: at taken branches, which every
+        loop has and where timer interrupts and the budget are checked, and
+        at system instructions, after which an interrupt that fell due in the
+        kernel is delivered as soon as the guest can take it.
+        """
+        if self.halted:
+            return self
+        code = self.code
+        r = self.regs
+        mem = self.mem
+        system = self._system
+        pc = start = self.pc
+        n = self.instructions
+        stop = n + max_instructions
+        check = min(self.next_tick, stop)
+        # The dispatch chain compares every instruction against these, and locals are faster than globals
+        add, addi, sub, mul, and_, li, load, store, storei, bnz, jmp = ADD, ADDI, SUB, MUL, AND, LI, LOAD, STORE, STOREI, BNZ, JMP
+        started = time.perf_counter()
+        while True:
+            op, a, b, c = code[pc]
+            # Ordered by how often the guests below execute them
+            if op == addi:
+                r[a] = r[b] + c
+                pc += 1
+            elif op == bnz:
+                if r[a]:
+                    n += pc - start + 1
+                    pc = start = c
+                    if n >= check:
+                        if n >= stop:
+                            break
+                        self.instructions = n
+                        pc = start = self._tick(pc)
+                        check = min(self.next_tick, stop)
+                else:
+                    pc += 1
+            elif op == load:
+                r[a] = mem[r[b] + c]
+                pc += 1
+            elif op == store:
+                mem[r[b] + c] = r[a]
+                pc += 1
+            elif op == add:
+                r[a] = r[b] + r[c]
+                pc += 1
+            elif op == and_:
+                r[a] = r[b] & r[c]
+                pc += 1
+            elif op == li:
+                r[a] = c
+                pc += 1
+            elif op == sub:
+                r[a] = r[b] - r[c]
+                pc += 1
+            elif op == mul:
+                r[a] = r[b] * r[c]
+                pc += 1
+            elif op == storei:
+                mem[c] = b
+                pc += 1
+            elif op == jmp:
+                n += pc - start + 1
+                pc = start = c
+            else:
+                n += pc - start + 1
+                self.instructions = n
+                pc = start = system[op - SYSCALL](self, pc, a, b, c)
+                if self.halted:
+                    break
+                # A tick that fell due in the kernel is taken on the way back to user mode
+                if self.pending:
+                    pc = start = self._tick(pc)
+                check = min(self.next_tick, stop)
+        self.elapsed += time.perf_counter() - started
+        self.pc = pc
+        self.instructions = n
+        return self
+
+
+@dataclass(frozen=True)
+class GuestWorkload:
+    """A user program that calls into the guest kernel every ``user_work`` loop iterations."""
+
+    user_work: int = 200
+    kernel_work: int = 40
+    io_per_syscall: int = 0
+    switch_every: int = 0
+
+    def source(self):
+        io = f"    out {CONSOLE_PORT}, r5\n" * self.io_per_syscall
+        switch = f"""\
+    load r3, [r0+{SWITCHES}]
+    addi r3, r3, -1
+    store r3, [r0+{SWITCHES}]
+    bnz r3, no_switch
+    li r3, {self.switch_every}
+    store r3, [r0+{SWITCHES}]
+    load r4, [r0+{PTBASE}]
+    addi r4, r4, 1
+    store r4, [r0+{PTBASE}]
+    setpt r4                     ; switch address spaces
+no_switch:
+""" if self.switch_every else ""
+        return f"""\
+; Guest kernel. r0 is kept zero; kernel entry saves the registers it uses.
+boot:
+    li r3, {self.switch_every}
+    store r3, [r0+{SWITCHES}]
+    setpt r0
+    sysret                       ; into user mode at the user program
+syscall:
+    store r3, [r0+{SAVE}]
+    store r4, [r0+{SAVE + 1}]
+    store r5, [r0+{SAVE + 2}]
+    store r6, [r0+{SAVE + 3}]
+    bnz r1, service
+    halt
+service:
+    cli                          ; critical section around the device
+    li r4, {self.kernel_work}
+    li r6, {KERNEL_BUFFER}
+copy:
+    load r5, [r6+0]
+    add r5, r5, r2
+    store r5, [r6+0]
+    addi r6, r6, 1
+    addi r4, r4, -1
+    bnz r4, copy
+{io}    sti
+{switch}    load r3, [r0+{SAVE}]
+    load r4, [r0+{SAVE + 1}]
+    load r5, [r0+{SAVE + 2}]
+    load r6, [r0+{SAVE + 3}]
+    sysret
+timer:
+    store r3, [r0+{TIMER_SAVE}]
+    load r3, [r0+{TICKS}]
+    addi r3, r3, 1
+    store r3, [r0+{TICKS}]
+    out {EOI_PORT}, r0               ; acknowledge the interrupt controller
+    load r3, [r0+{TIMER_SAVE}]
+    sysret
+; User program: a compute loop, then a write system call
+user:
+    li r7, 65535
+    li r6, {USER_BUFFER}
+    li r3, 1000000000
+outer:
+    li r4, {self.user_work}
+inner:
+    load r5, [r6+0]
+    add r5, r5, r4
+    and r5, r5, r7
+    store r5, [r6+0]
+    addi r4, r4, -1
+    bnz r4, inner
+    li r1, 1
+    add r2, r5, r0
+    syscall
+    addi r3, r3, -1
+    bnz r3, outer
+    li r1, 0
+    syscall
+"""
+
+    def program(self):
+        return assemble(self.source())
+
+
+WORKLOAD_PRESETS = {
+    "CPU-bound": GuestWorkload(user_work=2000, kernel_work=40),
+    "System-call heavy": GuestWorkload(user_work=10, kernel_work=20),
+    "I/O-heavy": GuestWorkload(user_work=100, kernel_work=40, io_per_syscall=4),
+    "Context switching": GuestWorkload(user_work=100, kernel_work=40, switch_every=1),
+}
+
+
+def run_workload(workload, technique, instructions=1_000_000, costs=CycleCosts(), timer_interval=100_000):
+    """Run ``instructions`` guest instructions of ``workload`` under ``technique``."""
+    return Machine(workload.program(), technique, costs, timer_interval).run(instructions)
+
+
+def compare_techniques(workload, instructions=1_000_000, costs=CycleCosts(), timer_interval=100_000):
+    """Exits, cycles per exit and speed of every technique on one workload.
+
+    ``relative_performance`` is native cycles per instruction divided by the
+    technique's; ``host_ips`` is how fast this interpreter ran the guest.
+    """
+    program = workload.program()
+    rows = []
+    for technique in TECHNIQUES:
+        machine = Machine(program, technique, costs, timer_interval).run(instructions)
+        exits = sum(machine.exits.values())
+        rows.append({
+            "technique": technique,
+            "instructions": machine.instructions,
+            "cycles": machine.cycles,
+            "cpi": machine.cycles / max(machine.instructions, 1),
+            "exits": exits,
+            "exits_per_million": exits * 1e6 / max(machine.instructions, 1),
+            "cycles_per_exit": machine.exit_cycles / exits if exits else 0.0,
+            "exit_reasons": dict(machine.exits),
+            "guest_mips": machine.instructions / (machine.cycles / CLOCK_HZ) / 1e6,
+            "host_ips": machine.instructions / max(machine.elapsed, 1e-9),
+        })
+    native = rows[0]["cpi"]
+    for row in rows:
+        row["relative_performance"] = native / row["cpi"]
+    return rows
+
+
+def measured_performance(instructions=300_000, costs=CycleCosts()):
+    """Geometric mean over the workload presets of each technique's speed relative to native."""
+    totals = dict.fromkeys(TECHNIQUES, 1.0)
+    for workload in WORKLOAD_PRESETS.values():
+        for row in compare_techniques(workload, instructions, costs):
+            totals[row["technique"]] *= row["relative_performance"]
+    return {technique: total ** (1 / len(WORKLOAD_PRESETS)) for technique, total in totals.items()}
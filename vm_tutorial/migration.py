@@ -0,0 +1,356 @@
+"""Live migration: pre-copy, post-copy and hybrid transfer of guest memory.
+
+Guest memory is tracked as packed dirty bitmaps, one bit per page in a
+``uint8`` array, so a 64 GiB guest (16M pages of 4 KiB) costs 2 MiB per
+bitmap and every round is a handful of vectorized passes over it.
+
+Pre-copy sends all memory while the guest keeps running, then resends the
+pages written during the previous round until the rest fits in the downtime
+target (or the round limit forces a long stop-and-copy). Post-copy stops the
+guest once, resumes it on the destination and pulls memory in the
+background; a write to a page that has not arrived yet is a remote page
+fault. Hybrid runs some pre-copy rounds before switching to post-copy.
+
+Writes come from a dirtying model: ``DirtyRateModel`` (regions of memory
+written at a fixed page rate) or ``TraceDirtying`` (stores of a recorded
+trace replayed at a given rate). Both set the bits of the pages written in
+an interval of guest time.
+"""
+
+import math
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from vm_tutorial.traces import RECORD_DTYPE
+
+STRATEGIES = ("Pre-copy", "Post-copy", "Hybrid")
+
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+# Post-copy is stepped in this many intervals of the background copy
+_POSTCOPY_STEPS = 256
+_SCAN_BYTES = 1 << 16
+
+
+def _bitmap(n_pages, filled=False):
+    bitmap = np.zeros((n_pages + 7) // 8, dtype=np.uint8)
+    if filled:
+        bitmap[:] = 0xFF
+        if n_pages % 8:
+            bitmap[-1] = (1 << (n_pages % 8)) - 1
+    return bitmap
+
+
+def _count(bitmap):
+    if hasattr(np, "bitwise_count") and len(bitmap) % 8 == 0:
+        return int(np.bitwise_count(bitmap.view(np.uint64)).sum(dtype=np.int64))
+    return int(_POPCOUNT[bitmap].sum(dtype=np.int64))
+
+
+def _set(bitmap, pages, bits=None):
+    """Set the bits of ``pages``; ``bits`` is an optional unpacked bool array to merge as well."""
+    if bits is None and len(pages) * 64 < len(bitmap) * 8:
+        np.bitwise_or.at(bitmap, pages >> 3, (1 << (pages & 7)).astype(np.uint8))
+        return
+    # Many pages: scattering into bools and packing them beats ufunc.at
+    if bits is None:
+        bits = np.zeros(len(bitmap) * 8, dtype=bool)
+    bits[pages] = True
+    bitmap |= np.packbits(bits, bitorder="little")
+
+
+def _take(bitmap, cursor, count):
+    """Clear at least ``count`` set bits from byte ``cursor`` on, eight pages at a time.
+
+    Returns the new cursor and the number of bits cleared; the background
+    copy of post-copy sends pages in address order this way.
+    """
+    taken = 0
+    while taken < count and cursor < len(bitmap):
+        # Enough bytes for the rest if they are all set; sparse stretches take more passes
+        chunk = bitmap[cursor:cursor + min((count - taken) // 8 + 64, _SCAN_BYTES)]
+        totals = np.cumsum(_POPCOUNT[chunk], dtype=np.int64)
+        end = int(np.searchsorted(totals, count - taken))
+        if end >= len(chunk):
+            taken += int(totals[-1])
+            chunk[:] = 0
+            cursor += len(chunk)
+        else:
+            taken += int(totals[end])
+            chunk[:end + 1] = 0
+            cursor += end + 1
+    return cursor, taken
+
+
+@dataclass(frozen=True)
+class DirtyRateModel:
+    """Guest writes as consecutive regions of memory, each written uniformly.
+
+    ``regions`` are ``(fraction of memory, page writes per second)`` pairs.
+    Writes hit uniformly random pages of their region, so the pages dirtied
+    in an interval saturate at the region size however fast it is written.
+    """
+
+    regions: tuple = ((0.1, 50_000),)
+
+    def dirty(self, bitmap, n_pages, start, duration, rng):
+        """Set the bits of the pages written during ``duration`` seconds of guest time."""
+        pages = []
+        bits = None
+        offset = 0
+        for fraction, rate in self.regions:
+            size = min(int(fraction * n_pages), n_pages - offset)
+            writes = rate * max(duration, 0)
+            if size <= 0 or not writes:
+                pass
+            elif writes > size / 4:
+                # Dense: each page is written at least once with probability 1 - exp(-writes / size)
+                if bits is None:
+                    bits = np.zeros(len(bitmap) * 8, dtype=bool)
+                bits[offset:offset + size] = rng.random(size, dtype=np.float32) < -math.expm1(-writes / size)
+            else:
+                pages.append(offset + rng.integers(0, size, rng.poisson(writes)))
+            offset += max(size, 0)
+        if pages or bits is not None:
+            _set(bitmap, np.concatenate(pages) if pages else np.empty(0, dtype=np.int64), bits)
+
+    def write_rate(self):
+        return sum(rate for _, rate in self.regions)
+
+
+@dataclass(frozen=True)
+class TraceDirtying:
+    """Stores of a recorded trace replayed at ``writes_per_second``, looping at the end.
+
+    ``pages`` are page numbers in write order, renumbered densely from 0 so
+    that any trace fits into the simulated guest.
+    """
+
+    pages: np.ndarray
+    writes_per_second: float
+
+    @classmethod
+    def from_records(cls, records, writes_per_second, page_shift=12):
+        return cls.from_chunks([records], writes_per_second, page_shift)
+
+    @classmethod
+    def from_chunks(cls, chunks, writes_per_second, page_shift=12):
+        """Fold record chunks (e.g. from ``traces.iter_trace``) one at a time, keeping only their stores' pages."""
+        stores = []
+        for chunk in chunks:
+            chunk = np.asarray(chunk, dtype=RECORD_DTYPE)
+            # Stores and modifies (load + store) dirty their page
+            stores.append(chunk["addr"][chunk["kind"] >= 2] >> np.uint64(page_shift))
+        stores = np.concatenate(stores) if stores else np.zeros(0, np.uint64)
+        _, pages = np.unique(stores, return_inverse=True)
+        return cls(pages.astype(np.int64), writes_per_second)
+
+    def dirty(self, bitmap, n_pages, start, duration, rng):
+        if not len(self.pages) or duration <= 0:
+            return
+        first = int(start * self.writes_per_second)
+        last = int((start + duration) * self.writes_per_second)
+        # One pass over the trace already dirties every page it will ever write
+        positions = np.arange(first, min(last, first + len(self.pages))) % len(self.pages)
+        _set(bitmap, self.pages[positions] % n_pages)
+
+    def write_rate(self):
+        return self.writes_per_second
+
+
+WORKLOAD_PRESETS = {
+    "Idle desktop": DirtyRateModel(((0.01, 200),)),
+    "Web server": DirtyRateModel(((0.05, 20_000), (0.3, 2_000))),
+    "OLTP database": DirtyRateModel(((0.1, 100_000), (0.5, 5_000))),
+    "In-memory analytics": DirtyRateModel(((0.6, 400_000),)),
+}
+
+
+@dataclass(frozen=True)
+class Encoding:
+    """Wire encoding of sent pages.
+
+    ``ratio`` is the compressed size of a full page, ``delta_ratio`` the size
+    of an XBZRLE-style delta against the copy in a ``cache_bytes`` cache of
+    recently sent pages (only resent pages can hit), and ``throughput`` the
+    rate at which the source can encode raw page data.
+    """
+
+    ratio: float = 1.0
+    delta_ratio: float = None
+    cache_bytes: int = 0
+    throughput: float = math.inf
+
+    def round_cost(self, pages, resent, page_size, bandwidth):
+        """Wire bytes and seconds to send ``pages`` pages, ``resent`` of them sent before."""
+        full = pages
+        wire = 0.0
+        if self.delta_ratio is not None and resent:
+            # The cache keeps the most recently sent pages, which are the ones being rewritten
+            hits = min(resent, self.cache_bytes // page_size)
+            wire += hits * page_size * self.delta_ratio
+            full -= hits
+        wire += full * page_size * self.ratio
+        return wire, max(wire / bandwidth, pages * page_size / self.throughput)
+
+
+ENCODINGS = {
+    "None": Encoding(),
+    "Compression": Encoding(ratio=0.45, throughput=1.5e9),
+    "XBZRLE": Encoding(delta_ratio=0.15, cache_bytes=512 << 20, throughput=4e9),
+}
+
+
+@dataclass(frozen=True)
+class MigrationConfig:
+    memory_bytes: int = 8 << 30
+    page_size: int = 4096
+    # Bytes per second; 10 Gbit/s
+    bandwidth: float = 1.25e9
+    downtime_target: float = 0.3
+    max_rounds: int = 30
+    # Throttle the guest CPU by 20% and then 10% more per round that dirties over half of what it sent
+    auto_converge: bool = False
+    device_state_bytes: int = 16 << 20
+    # Round trip of one post-copy page request
+    fault_latency: float = 200e-6
+
+    @property
+    def n_pages(self):
+        return self.memory_bytes // self.page_size
+
+
+@dataclass
+class MigrationResult:
+    strategy: str
+    rounds: list = field(default_factory=list)
+    total_time: float = 0.0
+    downtime: float = 0.0
+    wire_bytes: float = 0.0
+    converged: bool = True
+    throttle: float = 0.0
+    faults: int = 0
+    fault_stall: float = 0.0
+
+    def summary(self):
+        return {
+            "strategy": self.strategy,
+            "total_time": self.total_time,
+            "downtime": self.downtime,
+            "wire_bytes": self.wire_bytes,
+            "precopy_rounds": sum(1 for r in self.rounds if r["phase"] == "pre-copy"),
+            "converged": self.converged,
+            "throttle": self.throttle,
+            "faults": self.faults,
+            "fault_stall": self.fault_stall,
+        }
+
+
+def _precopy(result, model, config, encoding, rng, rounds):
+    """Iterative pre-copy; returns the dirty bitmap left for the final phase and the clocks."""
+    n_pages = config.n_pages
+    dirty = _bitmap(n_pages, filled=True)
+    sent = _bitmap(n_pages)
+    clock = guest_clock = 0.0
+    for number in range(rounds):
+        pages = _count(dirty)
+        resent = _count(dirty & sent)
+        wire, seconds = encoding.round_cost(pages, resent, config.page_size, config.bandwidth)
+        if result.strategy == "Pre-copy" and seconds <= config.downtime_target:
+            break
+        sent |= dirty
+        dirty[:] = 0
+        guest_seconds = seconds * (1 - result.throttle)
+        model.dirty(dirty, n_pages, guest_clock, guest_seconds, rng)
+        dirtied = _count(dirty)
+        result.rounds.append({"round": number, "phase": "pre-copy", "pages": pages, "wire_bytes": wire,
+                              "seconds": seconds, "dirtied": dirtied, "throttle": result.throttle})
+        result.wire_bytes += wire
+        clock += seconds
+        guest_clock += guest_seconds
+        if config.auto_converge and number > 0 and dirtied > pages / 2:
+            result.throttle = min(result.throttle + (0.1 if result.throttle else 0.2), 0.99)
+    else:
+        result.converged = result.strategy != "Pre-copy"
+    return dirty, sent, clock, guest_clock
+
+
+def _postcopy(result, pending, model, config, rng, clock, guest_clock):
+    """Background copy of the ``pending`` pages while guest writes fault them in on demand.
+
+    Faulted pages go before the background copy but share the link with it:
+    a step sends at most what the bandwidth allows, and faults beyond that
+    wait in a queue for the next step, which adds to ``fault_stall``.
+    """
+    n_pages = config.n_pages
+    left = sent = _count(pending)
+    step = max(left * config.page_size / config.bandwidth / _POSTCOPY_STEPS, 1e-3)
+    per_step = max(int(config.bandwidth * step / config.page_size), 1)
+    cursor = queued = 0
+    waited = 0.0
+    started = clock
+    while left:
+        written = _bitmap(n_pages)
+        model.dirty(written, n_pages, guest_clock, step, rng)
+        faults = _count(written & pending)
+        pending &= ~written
+        queued += faults
+        served = min(queued, per_step)
+        queued -= served
+        cursor, taken = _take(pending, cursor, per_step - served)
+        left -= served + taken
+        result.faults += faults
+        waited += queued * step
+        clock += step
+        guest_clock += step
+    seconds = clock - started
+    result.rounds.append({"round": len(result.rounds), "phase": "post-copy", "pages": sent,
+                          "wire_bytes": sent * config.page_size, "seconds": seconds, "dirtied": 0,
+                          "throttle": 0.0})
+    result.wire_bytes += sent * config.page_size
+    result.fault_stall = result.faults * (config.fault_latency + config.page_size / config.bandwidth) + waited
+    return clock
+
+
+def migrate(model, strategy="Pre-copy", config=MigrationConfig(), encoding=ENCODINGS["None"], precopy_rounds=1,
+            seed=0):
+    """Simulate one migration of a guest written to by ``model``.
+
+    Times are in seconds and ``wire_bytes`` counts everything sent. Downtime
+    is the final stop-and-copy plus the device state for pre-copy, and only
+    the device state for post-copy and hybrid, whose cost moves into the
+    remote page faults instead. ``fault_stall`` is the time vCPUs spend
+    waiting for those pages, summed over vCPUs; the dirtying model is not
+    slowed down by it. Post-copy pages are sent unencoded.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy {strategy!r}; expected one of {STRATEGIES}")
+    rng = np.random.default_rng(seed)
+    result = MigrationResult(strategy)
+    rounds = {"Pre-copy": config.max_rounds, "Post-copy": 0, "Hybrid": precopy_rounds}[strategy]
+    dirty, sent, clock, guest_clock = _precopy(result, model, config, encoding, rng, rounds)
+    switchover = config.device_state_bytes / config.bandwidth
+    if strategy == "Pre-copy":
+        # Stop the guest and send what is left
+        pages = _count(dirty)
+        wire, seconds = encoding.round_cost(pages, _count(dirty & sent), config.page_size, config.bandwidth)
+        result.rounds.append({"round": len(result.rounds), "phase": "stop-and-copy", "pages": pages,
+                              "wire_bytes": wire, "seconds": seconds, "dirtied": 0, "throttle": result.throttle})
+        result.wire_bytes += wire + config.device_state_bytes
+        result.downtime = seconds + switchover
+        result.total_time = clock + result.downtime
+    else:
+        result.wire_bytes += config.device_state_bytes
+        result.downtime = switchover
+        result.total_time = _postcopy(result, dirty, model, config, rng, clock + switchover, guest_clock)
+    return result
+
+
+def compare_strategies(model, config=MigrationConfig(), encoding=ENCODINGS["None"], precopy_rounds=1, seed=0):
+    """``MigrationResult.summary()`` rows of every strategy for the same guest."""
+    return [migrate(model, strategy, config, encoding, precopy_rounds, seed).summary() for strategy in STRATEGIES]
+
+
+def converges(model, config=MigrationConfig(), encoding=ENCODINGS["None"]):
+    """Whether pre-copy gets the rest below the downtime target within ``config.max_rounds``."""
+    return migrate(model, "Pre-copy", config, encoding).converged
@@ -0,0 +1,167 @@
+"""Two-dimensional page walks (nested paging) versus shadow paging.
+
+A guest virtual address is translated by the guest page table into a
+guest-physical address, which the host page table maps to host memory. With
+nested paging (Intel EPT, AMD NPT) the hardware walks both: every guest
+page-table entry sits at a guest-physical address that needs its own host
+walk, so a 4-level guest on a 4-level host costs up to 24 memory references
+per TLB miss. Shadow paging keeps the walk one-dimensional but has to trap
+guest page-table writes to keep the shadow table in sync.
+
+All modes share the engine in ``translation``: the guest translation and its
+TLB misses are computed once per page size, and the page-walk caches and the
+nested TLB are further ``TLB`` instances fed with the keys each walk looks up.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from vm_tutorial.translation import TLB, AddressTranslator, PagingConfig
+
+# x86-64 leaf sizes: larger pages end the walk one level earlier
+PAGE_SIZES = {
+    "4 KiB": PagingConfig(page_shift=12, levels=4, bits_per_level=9),
+    "2 MiB": PagingConfig(page_shift=21, levels=3, bits_per_level=9),
+    "1 GiB": PagingConfig(page_shift=30, levels=2, bits_per_level=9),
+}
+
+MODES = ("Native", "Shadow paging", "Nested paging")
+
+# Guest page-table pages are placed in their own guest-physical region
+_TABLE_REGION = np.uint64(1 << 46)
+
+
+@dataclass(frozen=True)
+class WalkCaches:
+    """Sizes of the translation caches (entries, ways)."""
+
+    tlb_entries: int = 1536
+    tlb_ways: int = 12
+    pwc_entries: int = 32
+    pwc_ways: int = 4
+    nested_tlb_entries: int = 64
+    nested_tlb_ways: int = 4
+
+
+@dataclass(frozen=True)
+class WalkCosts:
+    """Cycle costs used for the latency estimate."""
+
+    data_access: int = 40
+    tlb_hit: int = 1
+    walk_ref: int = 20
+    # Trap, emulate the guest PTE write and update the shadow entry
+    shadow_sync: int = 2500
+
+
+def max_nested_refs(guest_levels, host_levels):
+    """Worst-case references of a 2D walk: each guest level plus the final gPA need a host walk."""
+    return guest_levels * host_levels + guest_levels + host_levels
+
+
+def pwc_skipped_levels(vpns, config, caches=WalkCaches()):
+    """Guest levels whose entries the page-walk caches supply, for each walk in order.
+
+    There is one cache per non-leaf level, keyed by the VPN prefix that
+    selects that level's entry; the deepest hit decides where the walk
+    resumes. Every walk looks up and fills every level.
+    """
+    vpns = np.asarray(vpns, dtype=np.uint64)
+    skipped = np.zeros(len(vpns), dtype=np.int8)
+    for level in range(config.levels - 1):
+        prefixes = vpns >> np.uint64(config.bits_per_level * (config.levels - 1 - level))
+        hits = TLB(caches.pwc_entries, caches.pwc_ways).access(prefixes)
+        skipped[hits] = level + 1
+    return skipped
+
+
+def _table_pages(vpns, config):
+    """Guest-physical page of the table read at each level of each walk, root first."""
+    keys = np.empty((len(vpns), config.levels), dtype=np.uint64)
+    for level in range(config.levels):
+        # The table read at `level` is selected by the VPN bits above it
+        prefix = vpns >> np.uint64(config.bits_per_level * (config.levels - level))
+        keys[:, level] = (np.uint64(level) << np.uint64(56)) | prefix
+    _, table_ids = np.unique(keys, return_inverse=True)
+    return _TABLE_REGION + table_ids.reshape(keys.shape).astype(np.uint64) * np.uint64(4096)
+
+
+def nested_walk_refs(vpns, data_gpas, skipped, config, host_config=None, caches=WalkCaches()):
+    """Memory references of each 2D walk.
+
+    Every guest level that the page-walk caches did not supply costs one
+    guest read plus a host walk for the table page's guest-physical address,
+    and the final data gPA needs one more host walk. Host walks are avoided
+    when the nested TLB already holds the guest-physical page.
+    """
+    host_config = host_config or config
+    host_shift = np.uint64(host_config.page_shift)
+    gpas = np.column_stack((_table_pages(vpns, config), np.asarray(data_gpas, dtype=np.uint64)))
+    used = np.arange(config.levels + 1) >= skipped[:, None]
+    used[:, -1] = True
+    host_hits = TLB(caches.nested_tlb_entries, caches.nested_tlb_ways).access(gpas[used] >> host_shift)
+    walk_of = np.repeat(np.arange(len(vpns)), used.sum(axis=1))
+    host_walks = np.bincount(walk_of, weights=~host_hits, minlength=len(vpns))
+    guest_reads = config.levels - skipped
+    return (guest_reads + host_walks * host_config.levels).astype(np.int64)
+
+
+def compare_modes(vaddrs, page_sizes=None, caches=WalkCaches(), costs=WalkCosts(), pte_update_rate=1e-3):
+    """Walk counts and latency estimates of native, shadow and nested paging per page size.
+
+    Every page the trace touches is mapped beforehand; the guest then
+    updates ``pte_update_rate`` page-table entries per access, each of which
+    is a VM exit and shadow sync under shadow paging and free otherwise.
+    ``relative_latency`` is cycles per access relative to native execution
+    with the first page size.
+    """
+    vaddrs = np.asarray(vaddrs, dtype=np.uint64)
+    page_sizes = page_sizes or PAGE_SIZES
+    pte_writes = int(round(pte_update_rate * len(vaddrs)))
+    rows = []
+    for name, config in page_sizes.items():
+        translator = AddressTranslator(config, TLB(caches.tlb_entries, caches.tlb_ways), demand_paging=False)
+        touched = np.unique(vaddrs >> np.uint64(config.page_shift))
+        translator.page_table.map(touched, np.arange(len(touched), dtype=np.uint64))
+        result = translator.translate(vaddrs)
+        walks = ~result.hits
+        walk_vpns = vaddrs[walks] >> np.uint64(config.page_shift)
+        skipped = pwc_skipped_levels(walk_vpns, config, caches)
+        one_dimensional = config.levels - skipped.astype(np.int64)
+        refs = {
+            "Native": one_dimensional,
+            "Shadow paging": one_dimensional,
+            "Nested paging": nested_walk_refs(walk_vpns, result.paddrs[walks], skipped, config, caches=caches),
+        }
+        hits = int(result.hits.sum())
+        for mode in MODES:
+            exits = pte_writes if mode == "Shadow paging" else 0
+            cycles = (len(vaddrs) * costs.data_access + hits * costs.tlb_hit
+                      + int(refs[mode].sum()) * costs.walk_ref + exits * costs.shadow_sync)
+            rows.append({
+                "page_size": name,
+                "page_bytes": config.page_size,
+                "mode": mode,
+                "tlb_misses": int(walks.sum()),
+                "walk_refs": int(refs[mode].sum()),
+                "refs_per_walk": float(refs[mode].mean()) if len(refs[mode]) else 0.0,
+                "max_refs_per_walk": (max_nested_refs(config.levels, config.levels) if mode == "Nested paging"
+                                      else config.levels),
+                "vm_exits": exits,
+                "cycles_per_access": cycles / max(len(vaddrs), 1),
+            })
+    base = rows[0]["cycles_per_access"]
+    for row in rows:
+        row["relative_latency"] = row["cycles_per_access"] / base
+    return rows
+
+
+def random_access_trace(n, footprint_bytes=1 << 30, hot_pages=64, hot_fraction=0.5, seed=0):
+    """Uniform accesses over a large footprint mixed with a small hot set of 4 KiB pages."""
+    rng = np.random.default_rng(seed)
+    base = np.uint64(0x7F0000000000)
+    cold = rng.integers(0, footprint_bytes // 64, size=n).astype(np.uint64) * np.uint64(64)
+    hot = (rng.integers(0, hot_pages, size=n).astype(np.uint64) * np.uint64(4096)
+           + rng.integers(0, 64, size=n).astype(np.uint64) * np.uint64(64))
+    return base + np.where(rng.random(n) < hot_fraction, hot, cold)
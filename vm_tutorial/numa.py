@@ -0,0 +1,452 @@
+"""NUMA-aware placement of VMs' vCPUs and memory across a cluster of multi-socket hosts.
+
+Every host has the same ``Topology``: NUMA nodes with cores, memory and a
+memory controller of fixed bandwidth, and the ACPI SLIT distance matrix
+between them (10 is local, 21 a typical remote socket). A placement puts
+each VM on one host and splits its vCPUs and its memory over that host's
+nodes, as ``(VMs, nodes)`` arrays.
+
+Guests are taken to be NUMA-unaware, so every vCPU spreads its accesses
+over the VM's memory in proportion to where the memory is. For a VM with
+vCPU shares ``c`` and memory shares ``m`` over the nodes:
+
+* the remote access fraction is ``1 - sum(c * m)``;
+* the access latency relative to local memory is ``c @ D @ m`` with
+  ``D = distance / 10``;
+* each memory access is then stretched by the queueing delay of the
+  controller it goes to, ``1 / (1 - utilization)``, where utilization is
+  the memory bandwidth the node's VMs demand over the controller's
+  bandwidth.
+
+Members of an affinity group (the tiers of one application) exchange
+traffic that crosses the network when they land on different hosts.
+``network_cost`` weighs that traffic against memory traffic.
+
+Three strategies place VMs one at a time with vectorized scans over all
+hosts:
+
+* first-fit takes the first host with room and fills its nodes in order,
+  with memory local-first and spilling to the nearest node, as a
+  NUMA-unaware scheduler with Linux's default memory policy does;
+* balanced sends each VM to the emptiest host and node, and interleaves
+  VMs too wide for one node over all nodes;
+* affinity-aware keeps groups on one host, packs VMs into one node or the
+  fewest nearby nodes, then improves the result by local search.
+
+The local search evaluates the move of one VM to every node of every host
+at once. It uses the exact change in total latency-weighted memory
+traffic on the two controllers involved, plus the change in cross-host
+group traffic.
+"""
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+# Utilization above which the queueing delay grows linearly instead of without bound
+_RHO_MAX = 0.95
+CONTENDED = 0.8
+
+
+@dataclass(frozen=True)
+class Topology:
+    cores_per_node: int
+    memory_gb_per_node: float
+    # ACPI SLIT distances between the nodes, 10 for local memory
+    distance: tuple
+    bandwidth_gbs_per_node: float
+
+    @property
+    def nodes(self):
+        return len(self.distance)
+
+    @property
+    def distances(self):
+        return np.asarray(self.distance, dtype=np.float64)
+
+
+TOPOLOGIES = {
+    "2 sockets": Topology(32, 384, ((10, 21), (21, 10)), 150),
+    "2 sockets, sub-NUMA clustering": Topology(16, 192, ((10, 11, 21, 21), (11, 10, 21, 21),
+                                                         (21, 21, 10, 11), (21, 21, 11, 10)), 75),
+    "4 sockets, fully connected": Topology(24, 256, ((10, 21, 21, 21), (21, 10, 21, 21),
+                                                     (21, 21, 10, 21), (21, 21, 21, 10)), 100),
+    "8 sockets, twisted ladder": Topology(16, 192, tuple(tuple(10 if a == b else 21 if abs(a - b) in (1, 4, 7) else 31
+                                                               for b in range(8)) for a in range(8)), 70),
+}
+
+
+@dataclass(frozen=True)
+class Cluster:
+    topology: Topology
+    hosts: int
+    # vCPUs a core may carry
+    vcpu_ratio: float = 2.0
+    # Cost of a GB/s of group traffic between hosts, relative to a GB/s of local memory traffic
+    network_cost: float = 4.0
+
+    @property
+    def cores(self):
+        return self.topology.cores_per_node * self.vcpu_ratio
+
+
+@dataclass(frozen=True)
+class Workload:
+    """VM demands as parallel arrays; ``group`` is -1 for a VM outside any affinity group."""
+
+    vcpus: np.ndarray
+    memory_gb: np.ndarray
+    bandwidth_gbs: np.ndarray
+    group: np.ndarray
+    # Traffic between a VM and each other member of its group
+    group_traffic_gbs: np.ndarray
+
+    def __len__(self):
+        return len(self.vcpus)
+
+
+def random_workload(n, seed=0, grouped=0.6):
+    """``n`` VMs of 1 to 32 vCPUs, with ``grouped`` of them in affinity groups of two to six."""
+    rng = np.random.default_rng(seed)
+    vcpus = rng.choice([1, 2, 4, 8, 16, 32], size=n, p=[0.15, 0.3, 0.25, 0.17, 0.09, 0.04]).astype(np.float64)
+    memory_gb = vcpus * rng.choice([2, 4, 8], size=n, p=[0.3, 0.5, 0.2])
+    # Memory-bound VMs (databases, analytics) stream several times more per vCPU than the rest
+    bandwidth_gbs = vcpus * np.where(rng.random(n) < 0.2, rng.uniform(0.8, 1.6, n), rng.uniform(0.05, 0.4, n))
+    group = np.full(n, -1, dtype=np.int64)
+    members = rng.permutation(n)[:int(n * grouped)]
+    sizes = rng.integers(2, 7, size=len(members))
+    starts = np.cumsum(sizes) - sizes
+    starts = starts[starts < len(members)]
+    for number, start in enumerate(starts.tolist()):
+        group[members[start:start + sizes[number]]] = number
+    group_traffic_gbs = np.where(group >= 0, rng.uniform(0.05, 0.5, n), 0.0)
+    return Workload(vcpus, memory_gb, bandwidth_gbs, group, group_traffic_gbs)
+
+
+def hosts_for(topology, workload, load=0.7, vcpu_ratio=2.0):
+    """Hosts needed to run ``workload`` with memory, vCPUs and bandwidth at most ``load`` of capacity."""
+    nodes = topology.nodes
+    demand = max(workload.memory_gb.sum() / (topology.memory_gb_per_node * nodes),
+                 workload.vcpus.sum() / (topology.cores_per_node * vcpu_ratio * nodes),
+                 workload.bandwidth_gbs.sum() / (topology.bandwidth_gbs_per_node * nodes))
+    return int(np.ceil(demand / load))
+
+
+@dataclass
+class Placement:
+    """``host`` per VM (-1 when it did not fit anywhere) and its vCPUs and memory per node of that host."""
+
+    host: np.ndarray
+    cpus: np.ndarray
+    memory: np.ndarray
+
+    @classmethod
+    def empty(cls, vms, nodes):
+        return cls(np.full(vms, -1, dtype=np.int64), np.zeros((vms, nodes)), np.zeros((vms, nodes)))
+
+
+def _queueing(load, bandwidth):
+    """Access time stretch of a memory controller at ``load`` GB/s; linear past ``_RHO_MAX``."""
+    rho = load / bandwidth
+    q_max = 1 / (1 - _RHO_MAX)
+    return np.where(rho < _RHO_MAX, 1 / (1 - np.minimum(rho, _RHO_MAX)), q_max * (1 + (rho - _RHO_MAX) * q_max))
+
+
+class _State:
+    """Free capacity and per-node traffic of a cluster while VMs are placed and moved."""
+
+    def __init__(self, cluster, workload):
+        topology = cluster.topology
+        self.cluster = cluster
+        self.workload = workload
+        self.scaled = topology.distances / 10
+        shape = (cluster.hosts, topology.nodes)
+        self.free_cores = np.full(shape, cluster.cores)
+        self.free_memory = np.full(shape, float(topology.memory_gb_per_node))
+        # Memory traffic each controller serves (GB/s), and the same weighted by the distance it travels
+        self.load = np.zeros(shape)
+        self.weighted = np.zeros(shape)
+        groups = int(workload.group.max()) + 1
+        self.members = np.zeros((max(groups, 1), cluster.hosts), dtype=np.int64)
+        self.placement = Placement.empty(len(workload), topology.nodes)
+
+    def traffic(self, vm, cpus, memory):
+        """Controller load and distance-weighted load a VM adds to each node of its host."""
+        workload = self.workload
+        memory_share = memory / workload.memory_gb[vm]
+        load = workload.bandwidth_gbs[vm] * memory_share
+        return load, load * (cpus / workload.vcpus[vm] @ self.scaled)
+
+    def assign(self, vm, host, cpus, memory):
+        placement = self.placement
+        placement.host[vm], placement.cpus[vm], placement.memory[vm] = host, cpus, memory
+        self.free_cores[host] -= cpus
+        self.free_memory[host] -= memory
+        load, weighted = self.traffic(vm, cpus, memory)
+        self.load[host] += load
+        self.weighted[host] += weighted
+        if self.workload.group[vm] >= 0:
+            self.members[self.workload.group[vm], host] += 1
+
+    def release(self, vm):
+        placement = self.placement
+        host, cpus, memory = placement.host[vm], placement.cpus[vm].copy(), placement.memory[vm].copy()
+        self.free_cores[host] += cpus
+        self.free_memory[host] += memory
+        load, weighted = self.traffic(vm, cpus, memory)
+        self.load[host] -= load
+        self.weighted[host] -= weighted
+        if self.workload.group[vm] >= 0:
+            self.members[self.workload.group[vm], host] -= 1
+        placement.host[vm] = -1
+        placement.cpus[vm] = placement.memory[vm] = 0
+
+    def hosts_with_room(self, vm):
+        return ((self.free_cores.sum(axis=1) >= self.workload.vcpus[vm] - 1e-9)
+                & (self.free_memory.sum(axis=1) >= self.workload.memory_gb[vm] - 1e-9))
+
+
+def _local_first(state, vm, host, node_order):
+    """vCPUs filled into nodes in ``node_order``; memory next to them, spilling to the nearest nodes."""
+    vcpus, memory = state.workload.vcpus[vm], state.workload.memory_gb[vm]
+    free_cores, free_memory = state.free_cores[host], state.free_memory[host]
+    cpus = np.zeros_like(free_cores)
+    remaining = vcpus
+    for node in node_order:
+        cpus[node] = min(remaining, free_cores[node])
+        remaining -= cpus[node]
+    wanted = np.minimum(memory * cpus / vcpus, free_memory)
+    spill = memory - wanted.sum()
+    home = int(np.argmax(cpus))
+    for node in np.argsort(state.scaled[home], kind="stable"):
+        extra = min(spill, free_memory[node] - wanted[node])
+        wanted[node] += extra
+        spill -= extra
+    return cpus, wanted
+
+
+def _proportional(state, vm, host, nodes, weights):
+    """vCPUs and memory split over ``nodes`` in proportion to ``weights``, or None if a node overflows."""
+    if not weights.sum() > 0:
+        return None
+    share = np.zeros(state.cluster.topology.nodes)
+    share[nodes] = weights / weights.sum()
+    cpus = share * state.workload.vcpus[vm]
+    memory = share * state.workload.memory_gb[vm]
+    if (cpus > state.free_cores[host] + 1e-9).any() or (memory > state.free_memory[host] + 1e-9).any():
+        return None
+    return cpus, memory
+
+
+def _fitting_nodes(state, vm, host):
+    return ((state.free_cores[host] >= state.workload.vcpus[vm] - 1e-9)
+            & (state.free_memory[host] >= state.workload.memory_gb[vm] - 1e-9))
+
+
+def _single_node(state, vm, node):
+    nodes = state.cluster.topology.nodes
+    cpus, memory = np.zeros(nodes), np.zeros(nodes)
+    cpus[node], memory[node] = state.workload.vcpus[vm], state.workload.memory_gb[vm]
+    return cpus, memory
+
+
+def first_fit(state, order):
+    for vm in order:
+        room = state.hosts_with_room(vm)
+        if room.any():
+            host = int(np.argmax(room))
+            state.assign(vm, host, *_local_first(state, vm, host, range(state.cluster.topology.nodes)))
+
+
+def balanced(state, order):
+    order = sorted(order, key=lambda vm: -state.workload.memory_gb[vm])
+    for vm in order:
+        room = state.hosts_with_room(vm)
+        if not room.any():
+            continue
+        host = int(np.argmax(np.where(room, state.free_memory.sum(axis=1), -np.inf)))
+        fitting = _fitting_nodes(state, vm, host)
+        if fitting.any():
+            node = int(np.argmax(np.where(fitting, state.free_memory[host], -np.inf)))
+            state.assign(vm, host, *_single_node(state, vm, node))
+            continue
+        # Interleave over every node in proportion to its free memory
+        nodes = np.arange(state.cluster.topology.nodes)
+        split = _proportional(state, vm, host, nodes, state.free_memory[host])
+        state.assign(vm, host, *(split or _local_first(state, vm, host, np.argsort(-state.free_memory[host]))))
+
+
+def affinity_aware(state, order, passes=2, seed=0):
+    workload = state.workload
+    # Whole groups first, largest first, then the ungrouped VMs by size
+    grouped = workload.group >= 0
+    group_memory = np.bincount(workload.group[grouped], weights=workload.memory_gb[grouped], minlength=1)
+    key = np.where(workload.group >= 0, -group_memory[np.maximum(workload.group, 0)] * 1e6 - workload.group, 0.0)
+    order = sorted(order, key=lambda vm: (key[vm], -workload.memory_gb[vm]))
+    group_vcpus = np.bincount(workload.group[grouped], weights=workload.vcpus[grouped], minlength=1)
+    for vm in order:
+        room = state.hosts_with_room(vm)
+        if not room.any():
+            continue
+        group = workload.group[vm]
+        host = None
+        if group >= 0 and (state.members[group] * room).any():
+            host = int(np.argmax(np.where(room, state.members[group], -1)))
+        elif group >= 0:
+            # First member: best fit for the whole group, so the rest can follow
+            whole = ((state.free_memory.sum(axis=1) >= group_memory[group])
+                     & (state.free_cores.sum(axis=1) >= group_vcpus[group]))
+            if whole.any():
+                host = int(np.argmin(np.where(whole, state.free_memory.sum(axis=1), np.inf)))
+        if host is None:
+            host = int(np.argmin(np.where(room, state.free_memory.sum(axis=1), np.inf)))
+        state.assign(vm, host, *_packed(state, vm, host))
+    local_search(state, passes=passes, seed=seed)
+
+
+def _packed(state, vm, host):
+    """One node when the VM fits (the emptiest, to spread bandwidth), else the fewest nodes near each other."""
+    fitting = _fitting_nodes(state, vm, host)
+    if fitting.any():
+        return _single_node(state, vm, int(np.argmax(np.where(fitting, state.free_memory[host], -np.inf))))
+    start = int(np.argmax(state.free_memory[host]))
+    near = np.argsort(state.scaled[start], kind="stable")
+    cores = np.cumsum(state.free_cores[host][near])
+    memory = np.cumsum(state.free_memory[host][near])
+    count = int(np.argmax((cores >= state.workload.vcpus[vm]) & (memory >= state.workload.memory_gb[vm]))) + 1
+    nodes = near[:count]
+    split = _proportional(state, vm, host, nodes, np.minimum(state.free_memory[host][nodes] / state.workload.memory_gb[vm],
+                                                             state.free_cores[host][nodes] / state.workload.vcpus[vm]))
+    return split or _local_first(state, vm, host, near)
+
+
+def local_search(state, passes=2, seed=0):
+    """Move VMs, one at a time, to the single node that lowers the total cost most; returns the moves made."""
+    workload, cluster = state.workload, state.cluster
+    bandwidth = cluster.topology.bandwidth_gbs_per_node
+    rng = np.random.default_rng(seed)
+    moves = 0
+    for _ in range(passes):
+        moved = 0
+        for vm in rng.permutation(np.flatnonzero(state.placement.host >= 0)):
+            host = int(state.placement.host[vm])
+            cpus, memory = state.placement.cpus[vm], state.placement.memory[vm]
+            load, weighted = state.traffic(vm, cpus, memory)
+            before = (state.weighted[host] * _queueing(state.load[host], bandwidth)).sum()
+            # The VM's host as it would be without it
+            state.load[host] -= load
+            state.weighted[host] -= weighted
+            state.free_cores[host] += cpus
+            state.free_memory[host] += memory
+            removed = (state.weighted[host] * _queueing(state.load[host], bandwidth)).sum() - before
+            demand = workload.bandwidth_gbs[vm]
+            added = ((state.weighted + demand) * _queueing(state.load + demand, bandwidth)
+                     - state.weighted * _queueing(state.load, bandwidth))
+            delta = removed + added
+            group = workload.group[vm]
+            if group >= 0:
+                # Cross-host traffic counts once from each side of a pair
+                peers = state.members[group].astype(np.float64)
+                peers[host] -= 1
+                change = 2 * workload.group_traffic_gbs[vm] * cluster.network_cost * (peers[host] - peers)
+                change[host] = 0
+                delta += change[:, None]
+            fits = (state.free_cores >= workload.vcpus[vm] - 1e-9) & (state.free_memory >= workload.memory_gb[vm] - 1e-9)
+            delta = np.where(fits, delta, np.inf)
+            state.load[host] += load
+            state.weighted[host] += weighted
+            state.free_cores[host] -= cpus
+            state.free_memory[host] -= memory
+            target = np.unravel_index(int(np.argmin(delta)), delta.shape)
+            if delta[target] < -1e-9 * max(demand, 1e-9):
+                state.release(vm)
+                state.assign(vm, int(target[0]), *_single_node(state, vm, int(target[1])))
+                moved += 1
+        moves += moved
+        if not moved:
+            break
+    return moves
+
+
+STRATEGIES = {
+    "First-fit": first_fit,
+    "Balanced": balanced,
+    "Affinity-aware + local search": affinity_aware,
+}
+
+
+@dataclass
+class PlacementResult:
+    strategy: str
+    placement: Placement
+    remote_fraction: np.ndarray
+    latency: np.ndarray
+    utilization: np.ndarray
+    cross_host_traffic: float
+    group_traffic: float
+    bandwidth: np.ndarray
+    seconds: float
+
+    @property
+    def placed(self):
+        return self.placement.host >= 0
+
+    def summary(self):
+        placed = self.placed
+        weights = self.bandwidth[placed]
+        active = self.utilization[np.unique(self.placement.host[placed])]
+        return {
+            "strategy": self.strategy,
+            "remote_access": float(np.average(self.remote_fraction[placed], weights=weights)) if placed.any() else 0.0,
+            "relative_latency": float(np.average(self.latency[placed], weights=weights)) if placed.any() else 0.0,
+            "spanning_vms": int((np.count_nonzero(self.placement.memory[placed], axis=1) > 1).sum()),
+            "peak_utilization": float(active.max()) if active.size else 0.0,
+            "contended_nodes": float((active > CONTENDED).mean()) if active.size else 0.0,
+            "cross_host_traffic": self.cross_host_traffic / max(self.group_traffic, 1e-9),
+            "hosts_used": int(len(active)),
+            "unplaced": int((~placed).sum()),
+            "seconds": self.seconds,
+        }
+
+
+def evaluate(cluster, workload, placement, strategy="", seconds=0.0):
+    """Remote access fraction and contended latency of every VM, and the utilization of every node."""
+    topology = cluster.topology
+    placed = placement.host >= 0
+    host = placement.host[placed]
+    cpu_share = placement.cpus[placed] / workload.vcpus[placed, None]
+    memory_share = placement.memory[placed] / workload.memory_gb[placed, None]
+    load = np.zeros((cluster.hosts, topology.nodes))
+    np.add.at(load, host, workload.bandwidth_gbs[placed, None] * memory_share)
+    queueing = _queueing(load, topology.bandwidth_gbs_per_node)
+    remote = np.zeros(len(workload))
+    latency = np.zeros(len(workload))
+    remote[placed] = 1 - (cpu_share * memory_share).sum(axis=1)
+    latency[placed] = ((cpu_share @ (topology.distances / 10)) * memory_share * queueing[host]).sum(axis=1)
+
+    # Group traffic: each member talks to every other member
+    grouped = placed & (workload.group >= 0)
+    members = np.zeros((int(workload.group.max()) + 1, cluster.hosts))
+    np.add.at(members, (workload.group[grouped], placement.host[grouped]), 1)
+    sizes = np.bincount(workload.group[workload.group >= 0], minlength=len(members))
+    peers = sizes[workload.group[grouped]] - 1
+    same_host = members[workload.group[grouped], placement.host[grouped]] - 1
+    traffic = workload.group_traffic_gbs[grouped]
+    return PlacementResult(strategy, placement, remote, latency, load / topology.bandwidth_gbs_per_node,
+                           float((traffic * (peers - same_host)).sum()), float((traffic * peers).sum()),
+                           workload.bandwidth_gbs, seconds)
+
+
+def place(cluster, workload, strategy, **options):
+    """Place every VM of ``workload`` with the named strategy and evaluate the result."""
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy {strategy!r}; expected one of {tuple(STRATEGIES)}")
+    started = time.perf_counter()
+    state = _State(cluster, workload)
+    STRATEGIES[strategy](state, range(len(workload)), **options)
+    return evaluate(cluster, workload, state.placement, strategy, time.perf_counter() - started)
+
+
+def compare_strategies(cluster, workload):
+    return [place(cluster, workload, strategy) for strategy in STRATEGIES]
@@ -0,0 +1,302 @@
+"""Memory overcommit on a multi-VM host: ballooning, host swapping and the idle memory tax.
+
+A host with ``memory_mb`` of RAM runs VMs whose configured memory adds up
+to more than that. Every VM has a working set that changes over the day
+(``WorkingSets``, generated block by block as a time-by-VM array), and the
+host keeps a minimum of free memory by reclaiming from the VMs:
+
+* host swapping pages out memory the hypervisor picks blindly, so active
+  pages go too and come back as faults;
+* a balloon driver asks the guest for memory, and the guest gives up idle
+  pages first, but only at a limited rate per VM; what the balloons cannot
+  reclaim in time is swapped by the host;
+* the idle memory tax (Waldspurger, "Memory Resource Management in VMware
+  ESX Server") reclaims from idle memory before active memory.
+
+The host never maps more memory than it has: guests grow only into free
+memory, and what they cannot get is paged like a working set a balloon has
+squeezed. All paging, whether host swap-ins or guests paging inside a
+ballooned VM, shares the host's swap bandwidth; faults beyond it stall.
+
+The simulation steps through time once, with every step a few vectorized
+operations over all VMs, and records host-wide series per step.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+PAGE_MB = 4 / 1024
+DAY = 24 * 3600
+
+
+@dataclass(frozen=True)
+class Policy:
+    balloon: bool = True
+    # Share of each VM's idle memory reclaimed before any active memory (ESX defaults to 0.75)
+    idle_tax: float = 0.0
+
+
+POLICIES = {
+    "Host swapping": Policy(balloon=False),
+    "Ballooning": Policy(),
+    "Ballooning + idle tax": Policy(idle_tax=0.75),
+}
+
+
+@dataclass(frozen=True)
+class HostConfig:
+    memory_mb: float
+    # The host reclaims back up to this share of free memory, and is short of memory below
+    # ``hard_free`` (the "high" and "hard" free-memory states of ESX)
+    min_free: float = 0.06
+    hard_free: float = 0.02
+    # Balloon inflation or deflation per VM and second, and the largest balloon as a share of the VM
+    balloon_rate_mb: float = 32.0
+    max_balloon: float = 0.65
+    # Host-wide swap-out bandwidth
+    swap_rate_mb: float = 400.0
+    # Share of each working set touched per second
+    touch_rate: float = 0.02
+    # Guests fill otherwise unused memory with page cache at this rate per VM
+    cache_fill_mb: float = 1.0
+
+
+@dataclass(frozen=True)
+class WorkingSets:
+    """Working-set sizes of a set of VMs over a day, in MB.
+
+    A VM's working set is ``base`` plus a daily cycle of ``amplitude``
+    peaking at ``phase`` (radians of the day), plus a random level that
+    changes every ``segment`` seconds, all as fractions of its memory.
+    """
+
+    sizes: np.ndarray
+    base: np.ndarray
+    amplitude: np.ndarray
+    phase: np.ndarray
+    noise: float = 0.1
+    segment: int = 300
+    seed: int = 0
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def _levels(self, segment):
+        return np.random.default_rng((self.seed, segment)).standard_normal(len(self.sizes)) * self.noise
+
+    def block(self, start, stop, step=1):
+        """Working sets at times ``start, start + step, ... < stop`` as a ``(times, VMs)`` float32 array."""
+        times = np.arange(start, stop, step, dtype=np.float64)
+        angle = 2 * np.pi * times / DAY
+        # cos(angle - phase) expanded so that only the time axis needs trigonometry
+        fraction = np.cos(angle)[:, None] * (0.5 * self.amplitude * np.cos(self.phase))
+        fraction += np.sin(angle)[:, None] * (0.5 * self.amplitude * np.sin(self.phase))
+        fraction += self.base + 0.5 * self.amplitude
+        # Random load changes are interpolated linearly between segment boundaries
+        segments = (times // self.segment).astype(np.int64)
+        for segment in range(segments[0], segments[-1] + 1):
+            rows = slice(*np.searchsorted(segments, [segment, segment + 1]))
+            low, high = self._levels(segment), self._levels(segment + 1)
+            position = (times[rows] - segment * self.segment) / self.segment
+            fraction[rows] += low + position[:, None] * (high - low)
+        np.clip(fraction, 0.02, 1.0, out=fraction)
+        fraction *= self.sizes
+        return fraction.astype(np.float32)
+
+
+def random_vms(n, seed=0):
+    """``n`` VMs of 1 to 16 GB with a mix of busy, diurnal and mostly idle working sets."""
+    rng = np.random.default_rng(seed)
+    sizes = rng.choice([1024, 2048, 4096, 8192, 16384], size=n, p=[0.15, 0.3, 0.3, 0.15, 0.1]).astype(np.float64)
+    # A third of the VMs sit mostly idle, as in consolidated server farms
+    idle = rng.random(n) < 1 / 3
+    base = np.where(idle, rng.uniform(0.05, 0.15, n), rng.uniform(0.2, 0.5, n))
+    amplitude = np.where(idle, rng.uniform(0.0, 0.1, n), rng.uniform(0.1, 0.4, n))
+    # Peaks during working hours in a few time zones
+    phase = 2 * np.pi * rng.choice([10, 14, 18], size=n) / 24 + rng.normal(0, 0.2, n)
+    return WorkingSets(sizes, base, amplitude, phase, seed=seed)
+
+
+@dataclass
+class OvercommitResult:
+    policy: str
+    times: np.ndarray
+    free_mb: np.ndarray
+    balloon_mb: np.ndarray
+    swapped_mb: np.ndarray
+    faults: np.ndarray
+    stalled: np.ndarray
+    pressure: np.ndarray
+    vm_faults: np.ndarray
+    step: int
+
+    @property
+    def episodes(self):
+        """Lengths in seconds of the periods the host was short of memory."""
+        edges = np.diff(np.concatenate(([0], self.pressure.astype(np.int8), [0])))
+        return (np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)) * self.step
+
+    def summary(self):
+        episodes = self.episodes
+        return {
+            "policy": self.policy,
+            "faults_per_second": float(self.faults.mean()),
+            "peak_faults_per_second": float(self.faults.max()),
+            "stalled_per_second": float(self.stalled.mean()),
+            "vms_faulting": int((self.vm_faults > 0).sum()),
+            "reclaim_latency": float(episodes.mean()) if len(episodes) else 0.0,
+            "max_reclaim_latency": float(episodes.max()) if len(episodes) else 0.0,
+            "pressure_fraction": float(self.pressure.mean()),
+            "mean_balloon_mb": float(self.balloon_mb.mean()),
+            "mean_swapped_mb": float(self.swapped_mb.mean()),
+        }
+
+
+def _reclaim(state, need, demand, host, ballooning, idle_tax, seconds, swap_budget):
+    """Reclaim ``need`` MB per policy row by balloon, then host swapping; deflate balloons where it is negative.
+
+    ``swap_budget`` is the MB per row the host can swap out in this interval; returns the MB per row it did.
+    """
+    mapped, swapped, balloon = state
+    resident = mapped - swapped
+    used = resident.sum(axis=1)
+    reclaim = np.maximum(need, 0)
+    # Idle memory is taxed first, the rest is reclaimed in proportion to what each VM holds
+    idle = np.maximum(resident - demand, 0)
+    idle_total = idle.sum(axis=1)
+    taxed = np.minimum(reclaim, idle_tax * idle_total)
+    request = (idle * (taxed / np.maximum(idle_total, 1e-9))[:, None]
+               + resident * ((reclaim - taxed) / np.maximum(used, 1e-9))[:, None])
+    inflate = np.minimum(request, host.balloon_rate_mb * seconds)
+    np.minimum(inflate, np.maximum(host.max_balloon * state.sizes - balloon, 0), out=inflate)
+    np.minimum(inflate, resident, out=inflate)
+    inflate *= ballooning
+    balloon += inflate
+    mapped -= inflate
+    np.minimum(swapped, mapped, out=swapped)
+    request -= inflate
+    swap = request * np.minimum(1.0, swap_budget / np.maximum(request.sum(axis=1), 1e-9))[:, None]
+    np.minimum(swap, mapped - swapped, out=swap)
+    swapped += swap
+    # Spare memory lets the balloons deflate
+    spare = np.maximum(-need, 0)
+    release = balloon * np.minimum(1.0, spare / np.maximum(balloon.sum(axis=1), 1e-9))[:, None]
+    balloon -= np.minimum(release, host.balloon_rate_mb * seconds)
+    return swap.sum(axis=1)
+
+
+def _accumulate(ufunc, values):
+    """``ufunc.accumulate`` along the first axis, in place; a loop over rows is faster for short axes."""
+    for row in range(1, len(values)):
+        ufunc(values[row - 1], values[row], out=values[row])
+    return values
+
+
+class _State(tuple):
+    """``(mapped, swapped, balloon)`` arrays of shape ``(policies, VMs)``, plus the VM sizes."""
+
+    def __new__(cls, sizes, rows):
+        state = super().__new__(cls, tuple(np.zeros((rows, len(sizes)), dtype=np.float32) for _ in range(3)))
+        state.sizes = sizes
+        return state
+
+
+def simulate(working_sets, host, policies=None, duration=DAY, step=1, interval=15, block_seconds=3600):
+    """Run the host through ``duration`` seconds once per policy and record reclaim and faults.
+
+    Every ``step`` seconds the guests grow into their working sets and fill
+    the rest of their memory with page cache, and touched pages that were
+    host-swapped fault back in. Growth and swap-ins only take memory the host
+    has free at the start of an interval, working sets and swap-ins before
+    page cache; working-set pages that do not fit fault like the pages a
+    balloon has squeezed out of a guest. Those faults and the swap-ins share
+    the swap bandwidth. Faults beyond it, and swap-ins finding no free
+    memory, are counted in ``stalled`` and stay out of memory. Every
+    ``interval`` seconds the host reclaims up to its free target: by balloon
+    first when the policy has one, at the balloon rate, and by host swapping
+    for the rest; the swap-out goes first and the faults of the next interval
+    get the bandwidth it leaves. Between two decisions the balloons and the
+    swap-out stay put, so the steps of an interval are computed together
+    along the time axis (a running maximum for guest growth, a cumulative
+    product for swapped pages surviving being touched).
+
+    ``pressure`` marks the steps with free memory below ``host.hard_free``,
+    and ``reclaim_latency`` is how long such periods last on average. All
+    ``policies`` (default: every policy) run side by side as rows of the same
+    ``(policies, VMs)`` arrays; returns one ``OvercommitResult`` each.
+    """
+    policies = list(POLICIES) if policies is None else list(policies)
+    unknown = [policy for policy in policies if policy not in POLICIES]
+    if unknown:
+        raise ValueError(f"Unknown policies {unknown}; expected some of {tuple(POLICIES)}")
+    # Single precision halves the memory traffic of the per-step arrays
+    sizes = np.asarray(working_sets.sizes, dtype=np.float32)
+    ballooning = np.array([[POLICIES[policy].balloon] for policy in policies])
+    idle_tax = np.array([POLICIES[policy].idle_tax for policy in policies])
+    state = _State(sizes, len(policies))
+    mapped, swapped, balloon = state
+
+    n_steps = -(-duration // step)
+    steps_per_interval = max(interval // step, 1)
+    block_seconds = max(block_seconds // (steps_per_interval * step), 1) * steps_per_interval * step
+    series = {key: np.zeros((len(policies), n_steps), dtype=np.float32)
+              for key in ("free", "balloon", "swapped", "faults", "stalled")}
+    vm_faults = np.zeros(state[0].shape)
+    free_target = host.min_free * host.memory_mb
+    touched = min(host.touch_rate * step, 1.0)
+    swap_step = host.swap_rate_mb * step
+    fault_bandwidth = np.full(len(policies), swap_step)
+    fill = host.cache_fill_mb * step * np.arange(1, steps_per_interval + 1, dtype=np.float32)[:, None, None]
+
+    index = 0
+    for start in range(0, duration, block_seconds):
+        block = working_sets.block(start, min(start + block_seconds, duration), step)
+        for first in range(0, len(block), steps_per_interval):
+            demand = block[first:first + steps_per_interval, None, :]
+            steps = len(demand)
+            usable = sizes - balloon
+            active = np.minimum(demand, usable)
+            # What the guests would map with unlimited host memory: working sets first, then page cache
+            working = _accumulate(np.maximum, np.maximum(active, mapped))
+            wanted = _accumulate(np.maximum, np.maximum(working, np.minimum(mapped + fill[:steps], usable)))
+            # Share of the swapped pages that stay swapped after each step
+            survive = _accumulate(np.multiply, 1 - touched * active / np.maximum(wanted, 1))
+            swap_ins = np.diff(survive * swapped, axis=0, prepend=swapped[None]) * -1
+
+            # Scale growth down to the memory free at the start of the interval
+            free = np.maximum(host.memory_mb - (mapped - swapped).sum(axis=1), 0)
+            working -= mapped
+            wanted -= mapped + working
+            needed = working[-1].sum(axis=1) + swap_ins.sum(axis=(0, 2))
+            granted = np.minimum(1.0, free / np.maximum(needed, 1e-9))[:, None]
+            cached = np.minimum(1.0, np.maximum(free - needed, 0) / np.maximum(wanted[-1].sum(axis=1), 1e-9))[:, None]
+            # Paging: swap-ins, and working-set pages that did not fit or were squeezed out by a balloon
+            paging = swap_ins + touched * ((1 - granted) * working + np.maximum(demand - usable, 0))
+            served = np.minimum(1.0, fault_bandwidth / np.maximum(paging.sum(axis=2), 1e-9))[:, :, None]
+            grown = mapped + granted * working + cached * wanted
+            swapped_after = swapped - np.cumsum(granted * swap_ins * served, axis=0)
+            faults = paging / (PAGE_MB * step)
+            # Faults wait for swap bandwidth, and swap-ins also for a free page
+            stalled = (paging - served * (paging - (1 - granted) * swap_ins)) / (PAGE_MB * step)
+            vm_faults += faults.sum(axis=0)
+
+            steps_slice = slice(index, index + steps)
+            series["free"][:, steps_slice] = (host.memory_mb - (grown - swapped_after).sum(axis=2)).T
+            series["faults"][:, steps_slice] = faults.sum(axis=2).T
+            series["stalled"][:, steps_slice] = stalled.sum(axis=2).T
+            mapped[:] = grown[-1]
+            swapped[:] = np.maximum(swapped_after[-1], 0)
+            need = free_target - host.memory_mb + (mapped - swapped).sum(axis=1)
+            # The host blocks on its swap-out when short of memory, so the next interval's faults get the rest
+            swapped_out = _reclaim(state, need, demand[-1], host, ballooning, idle_tax, steps * step, swap_step * steps)
+            fault_bandwidth = np.maximum(swap_step - swapped_out / steps, 0)
+            series["balloon"][:, steps_slice] = balloon.sum(axis=1)[:, None]
+            series["swapped"][:, steps_slice] = swapped.sum(axis=1)[:, None]
+            index += steps
+
+    times = np.arange(n_steps) * step
+    pressure = series["free"] < host.hard_free * host.memory_mb
+    return [OvercommitResult(policy, times, series["free"][row], series["balloon"][row], series["swapped"][row],
+                             series["faults"][row], series["stalled"][row], pressure[row], vm_faults[row], step)
+            for row, policy in enumerate(policies)]
@@ -0,0 +1,150 @@
+"""Quiz question bank and per-session adaptive question selection.
+
+The bank is the curated questions in ``data/questions.json`` plus questions
+generated from the terminology, loaded once per process. A learner's progress
+is a ``QuizState``: one Leitner box and one last-seen round per question in
+small NumPy arrays, so a session costs a few bytes per question. Missed
+questions come back after one round and each correct answer doubles the wait,
+while new questions are picked near the difficulty the learner is managing.
+"""
+
+import functools
+import json
+import os
+import random
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from vm_tutorial.content import TERM_CATEGORIES, TERMINOLOGY, term_category
+
+QUESTIONS_PATH = os.path.join(os.path.dirname(__file__), "data", "questions.json")
+BOXES = 5
+
+
+@dataclass(frozen=True)
+class Question:
+    prompt: str
+    options: tuple
+    answer: str
+    topic: str
+    difficulty: int = 1
+
+
+def generated_questions(seed=0):
+    """Definition, category and odd-one-out questions built from the terminology."""
+    rng = random.Random(seed)
+    terms = list(TERMINOLOGY)
+    questions = []
+    for term, definition in TERMINOLOGY.items():
+        category = term_category(term)
+        siblings = [other for other in TERM_CATEGORIES[category] if other != term]
+        strangers = [other for other in terms if other not in TERM_CATEGORIES[category]]
+        # Distractors from the same category make the harder variant
+        questions.append(Question(f"Which term is defined as: \"{definition}\"", (term, *rng.sample(siblings, 3)),
+                                  term, category, 3))
+        questions.append(Question(f"Which term is defined as: \"{definition}\"", (term, *rng.sample(strangers, 3)),
+                                  term, category, 1))
+        others = rng.sample([TERMINOLOGY[other] for other in terms if other != term], 3)
+        questions.append(Question(f"What is {term}?", (definition, *others), definition, category, 2))
+        questions.append(Question(f"Which topic does {term} belong to?", tuple(TERM_CATEGORIES), category, category, 1))
+    for category, members in TERM_CATEGORIES.items():
+        for stranger in (term for term in terms if term not in members):
+            questions.append(Question(f"Which of these is not a {category} term?",
+                                      (stranger, *rng.sample(members, 3)), stranger, category, 2))
+    return questions
+
+
+@functools.lru_cache(maxsize=1)
+def load_question_bank(path=QUESTIONS_PATH):
+    """Curated plus generated questions; the tuple is shared by every session."""
+    with open(path) as stream:
+        curated = [
+            Question(item["question"], tuple(item["options"]), item["answer"], item["topic"], item.get("difficulty", 1))
+            for item in json.load(stream)
+        ]
+    bank = tuple(curated + generated_questions())
+    for question in bank:
+        if question.answer not in question.options:
+            raise ValueError(f"Answer missing from options: {question.prompt!r}")
+    return bank
+
+
+@dataclass
+class QuizState:
+    """One learner's progress: Leitner boxes and last-seen rounds, one entry per question."""
+
+    boxes: np.ndarray
+    last_seen: np.ndarray
+    round: int = 0
+    current: int = -1
+    choice: int = -1
+    correct: int = 0
+    answered: int = 0
+    # Questions drawn so far, so that every draw gets fresh randomness
+    draws: int = 0
+    seed: int = field(default_factory=lambda: random.getrandbits(32))
+
+    @classmethod
+    def new(cls, n_questions):
+        return cls(np.zeros(n_questions, dtype=np.uint8), np.zeros(n_questions, dtype=np.uint32))
+
+    @property
+    def accuracy(self):
+        # Starts at 50% and follows the learner's answers
+        return (self.correct + 1) / (self.answered + 2)
+
+    @property
+    def mastered(self):
+        return int((self.boxes == BOXES - 1).sum())
+
+
+def next_question(state, bank):
+    """Pick the next question index, other than the current one, and make it current."""
+    rng = np.random.default_rng((state.seed, state.draws))
+    state.draws += 1
+    seen = state.last_seen > 0
+    # A question in box b is due again 2**b rounds after it was answered
+    due = seen & (state.round - state.last_seen.astype(np.int64) >= (1 << state.boxes.astype(np.int64)))
+    available = np.ones(len(seen), dtype=bool)
+    if state.current >= 0 and len(seen) > 1:
+        available[state.current] = False
+    due &= available
+    if due.any():
+        # Lowest box first, then the one waiting longest
+        candidates = np.flatnonzero(due)
+        order = np.lexsort((state.last_seen[candidates], state.boxes[candidates]))
+        index = int(candidates[order[0]])
+    elif (available & ~seen).any():
+        unseen = np.flatnonzero(available & ~seen)
+        difficulty = np.array([bank[i].difficulty for i in unseen])
+        target = 1 + round(2 * state.accuracy)
+        matching = unseen[difficulty == min(target, 3)]
+        index = int(rng.choice(matching if len(matching) else unseen))
+    else:
+        index = int(np.flatnonzero(available)[np.argmin(state.last_seen[available])])
+    state.current = index
+    state.choice = -1
+    return index
+
+
+def shuffled_options(state, bank):
+    """Options of the current question in a per-session order that is stable across reruns."""
+    options = list(bank[state.current].options)
+    random.Random(state.seed ^ state.current).shuffle(options)
+    return options
+
+
+def record_answer(state, bank, choice):
+    """Grade the first answer to the current question and move it between boxes."""
+    if state.choice >= 0:
+        return state.choice == bank[state.current].options.index(bank[state.current].answer)
+    question = bank[state.current]
+    state.choice = question.options.index(choice)
+    correct = choice == question.answer
+    state.round += 1
+    state.answered += 1
+    state.correct += correct
+    state.boxes[state.current] = min(state.boxes[state.current] + 1, BOXES - 1) if correct else 0
+    state.last_seen[state.current] = state.round
+    return correct
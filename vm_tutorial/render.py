@@ -0,0 +1,248 @@
+"""Headless export of every figure and table to static files.
+
+Each task is one view (see ``figures.VIEWS``) with one combination of its
+data options: the worker runs the model once and draws every display
+variant from the result, so expensive simulations are never repeated for
+a different slider position. Tasks run in a process pool whose workers use
+matplotlib's Agg backend; only the view's slug and parameters cross the
+process boundary.
+
+A task's content hash covers the sources of the modules that produce it
+(this one included), its parameters, the output formats and the size and
+modification time of any input files (benchmark results, memory images).
+``manifest.json`` in the output directory records the hash of every
+rendered task, and tasks whose hash and files are unchanged are skipped.
+The manifest is written even when a task fails, so a rerun skips what did
+finish. Finally an HTML bundle, an ``index.html`` with the tutorial text and
+one page per view, is written next to the figures.
+"""
+
+import functools
+import hashlib
+import html
+import inspect
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from vm_tutorial import content, figures
+
+FORMATS = ("svg", "png", "pdf")
+MANIFEST = "manifest.json"
+# The image format the HTML pages embed, in order of preference
+_PAGE_FORMATS = ("svg", "png")
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def variant_stem(params):
+    """File name stem for a set of view parameters, e.g. ``footprint-1-gb_pte-updates-per-10k-10``."""
+    if not params:
+        return "default"
+    parts = (f"{name}-{value}" for name, value in params.items())
+    return "_".join(re.sub(r"[^a-z0-9.]+", "-", part.lower()).strip("-") for part in parts)
+
+
+@functools.lru_cache(maxsize=None)
+def _source_digest(module):
+    return hashlib.sha256(inspect.getsource(module).encode()).hexdigest()
+
+
+def task_hash(view, params, formats):
+    """Content hash of everything that decides the files a task writes."""
+    digest = hashlib.sha256()
+    for module in (sys.modules[__name__], figures, content, *view.modules):
+        digest.update(_source_digest(module).encode())
+    digest.update(json.dumps([view.slug, params, list(formats)], sort_keys=True, default=str).encode())
+    for path in view.inputs() if view.inputs else ():
+        # Size and mtime rather than contents: memory images can be many gigabytes
+        stat = os.stat(path)
+        digest.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+def _save_figure(fig, paths):
+    import matplotlib.pyplot as plt
+    try:
+        for fmt, path in paths.items():
+            fig.savefig(path, format=fmt, dpi=200, bbox_inches="tight")
+    finally:
+        plt.close(fig)
+
+
+def _render_task(slug, params, formats, out):
+    """Run one view's model and write every display variant; returns the variants and the time taken."""
+    view = figures.VIEWS[slug]
+    started = time.perf_counter()
+    data = view.data(**params)
+    os.makedirs(os.path.join(out, slug), exist_ok=True)
+    variants = []
+    for display in view.display_variants():
+        combined = {**params, **display}
+        stem = f"{slug}/{variant_stem(combined)}"
+        files = {}
+        if view.figure:
+            files.update((fmt, f"{stem}.{fmt}") for fmt in formats)
+            _save_figure(view.figure(data, **combined), {fmt: os.path.join(out, files[fmt]) for fmt in formats})
+        if view.table:
+            table = view.table(data, **combined)
+            files["csv"], files["table"] = f"{stem}.csv", f"{stem}.table.html"
+            table.to_csv(os.path.join(out, files["csv"]))
+            table.to_html(os.path.join(out, files["table"]), classes="data-table", border=0)
+        variants.append({"params": combined, "files": files})
+    return variants, time.perf_counter() - started
+
+
+def _load_manifest(out):
+    try:
+        with open(os.path.join(out, MANIFEST), encoding="utf-8") as stream:
+            return json.load(stream)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"tasks": {}}
+
+
+def _up_to_date(entry, digest, out):
+    return (entry is not None and entry["hash"] == digest
+            and all(os.path.exists(os.path.join(out, path)) for variant in entry["variants"]
+                    for path in variant["files"].values()))
+
+
+def render_all(out, formats=("svg", "png"), processes=None, only=None, force=False, progress=None):
+    """Render the selected views (all by default) into ``out`` and write the HTML bundle.
+
+    ``progress`` is called as ``progress(key, seconds)`` for every task
+    rendered, with ``seconds`` None for a task skipped as up to date.
+    Returns the numbers of rendered and skipped tasks.
+    """
+    unknown = [fmt for fmt in formats if fmt not in FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown output format {unknown[0]!r}; expected one of {FORMATS}")
+    unknown = [slug for slug in only or () if slug not in figures.VIEWS]
+    if unknown:
+        raise ValueError(f"Unknown view {unknown[0]!r}; expected one of {tuple(figures.VIEWS)}")
+    formats = tuple(formats)
+    os.makedirs(out, exist_ok=True)
+    manifest = _load_manifest(out)
+    tasks = {}
+    skipped = 0
+    for slug in only or figures.VIEWS:
+        view = figures.VIEWS[slug]
+        for params in view.data_variants():
+            key = f"{slug}/{variant_stem(params)}"
+            digest = task_hash(view, params, formats)
+            if not force and _up_to_date(manifest["tasks"].get(key), digest, out):
+                skipped += 1
+                if progress:
+                    progress(key, None)
+            else:
+                tasks[key] = (slug, params, digest)
+
+    def finished(key, variants, seconds):
+        slug, params, digest = tasks[key]
+        manifest["tasks"][key] = {"view": slug, "params": params, "hash": digest, "variants": variants}
+        if progress:
+            progress(key, seconds)
+
+    processes = min(len(tasks), os.cpu_count() or 1) if processes is None else processes
+    # The other tasks still finish and are recorded before the first failure is raised
+    failures = []
+    if processes <= 1:
+        _init_worker()
+        for key, (slug, params, _) in tasks.items():
+            try:
+                finished(key, *_render_task(slug, params, formats, out))
+            except Exception as error:
+                failures.append(error)
+    elif tasks:
+        # Spawned workers start without the parent's pyplot state and import only what the views need
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker) as pool:
+            futures = {pool.submit(_render_task, slug, params, formats, out): key
+                       for key, (slug, params, _) in tasks.items()}
+            for future in as_completed(futures):
+                if future.exception() is None:
+                    finished(futures[future], *future.result())
+                else:
+                    failures.append(future.exception())
+
+    with open(os.path.join(out, MANIFEST), "w", encoding="utf-8") as stream:
+        json.dump(manifest, stream, indent=1, default=str)
+    if failures:
+        raise failures[0]
+    write_bundle(out, manifest)
+    return len(tasks), skipped
+
+
+# Static HTML bundle
+
+def _page(title, body):
+    return (f"<!DOCTYPE html>\n<html lang='en'>\n<head>\n<meta charset='utf-8'>\n<title>{html.escape(title)}</title>\n"
+            f"<link rel='stylesheet' href='style.css'>\n</head>\n<body>\n{body}\n</body>\n</html>\n")
+
+
+def _variant_html(variant, out):
+    files = variant["files"]
+    parts = []
+    image = next((files[fmt] for fmt in _PAGE_FORMATS if fmt in files), None)
+    if image:
+        parts.append(f"<img src='{image}' alt='{html.escape(_variant_label(variant['params']))}' style='max-width: 100%'>")
+    if "table" in files:
+        with open(os.path.join(out, files["table"]), encoding="utf-8") as stream:
+            parts.append(stream.read())
+    downloads = " · ".join(f"<a href='{path}'>{key}</a>" for key, path in files.items() if key != "table")
+    if downloads:
+        parts.append(f"<p class='references'>{downloads}</p>")
+    return "\n".join(parts)
+
+
+def _variant_label(params):
+    return ", ".join(f"{name.replace('_', ' ')}: {value}" for name, value in params.items()) or "Default"
+
+
+def _view_variants(slug, manifest):
+    entries = [entry for entry in manifest["tasks"].values() if entry["view"] == slug]
+    return [variant for entry in entries for variant in entry["variants"]]
+
+
+def write_bundle(out, manifest):
+    """Write ``index.html`` and one page per rendered view, linking the files in ``manifest``."""
+    shutil.copyfile(content.STYLE_PATH, os.path.join(out, "style.css"))
+    rendered = {slug: _view_variants(slug, manifest) for slug in figures.VIEWS}
+    body = ["<h1 class='main-header'>Virtual Machines and Memory Virtualization</h1>"]
+    for tab in content.TABS:
+        body.append(f"<h2 class='section-header'>{html.escape(tab)}</h2>")
+        for section in content.SECTIONS.values():
+            if section.tab == tab:
+                body.append(f"<h3 class='subsection-header'>{section.heading}</h3>")
+                body.append(f"<p class='text-content'>{section.html}</p>")
+        for slug, view in figures.VIEWS.items():
+            if view.tab != tab or not rendered[slug]:
+                continue
+            count = len(rendered[slug])
+            body.append(f"<h3 class='subsection-header'><a href='{slug}.html'>{html.escape(view.name)}</a></h3>")
+            body.append(_variant_html(rendered[slug][0], out))
+            if count > 1:
+                body.append(f"<p class='text-content'><a href='{slug}.html'>All {count} variants</a></p>")
+    with open(os.path.join(out, "index.html"), "w", encoding="utf-8") as stream:
+        stream.write(_page("Virtual Machines and Memory Virtualization", "\n".join(body)))
+
+    for slug, view in figures.VIEWS.items():
+        if not rendered[slug]:
+            continue
+        body = [f"<p><a href='index.html'>Back to the tutorial</a></p>",
+                f"<h1 class='main-header'>{html.escape(view.name)}</h1>"]
+        if view.name in content.VISUALIZATION_TEXT:
+            body.append(f"<p class='text-content'>{content.VISUALIZATION_TEXT[view.name]}</p>")
+        for variant in sorted(rendered[slug], key=lambda variant: variant_stem(variant["params"])):
+            body.append(f"<h3 class='subsection-header'>{html.escape(_variant_label(variant['params']))}</h3>")
+            body.append(_variant_html(variant, out))
+        with open(os.path.join(out, f"{slug}.html"), "w", encoding="utf-8") as stream:
+            stream.write(_page(view.name, "\n".join(body)))
@@ -0,0 +1,360 @@
+"""Page-replacement workbench: LRU, CLOCK, 2Q, ARC, LIRS and Belady's OPT.
+
+A reference string is an array of page numbers. LRU is a stack algorithm:
+memory of ``C`` frames hits exactly when the LRU stack distance is below
+``C``, so one pass of Mattson's analysis (the wavelet-matrix kernels in
+``stack_distance``, O(N log N)) gives the miss-ratio curve for every memory
+size at once. CLOCK, 2Q, ARC and LIRS do not have the inclusion property,
+and OPT's own stack needs work proportional to the stack depth on every
+reference, so those policies are simulated reference by reference at each
+memory size of interest and drawn as points against the LRU curve.
+"""
+
+import heapq
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+from vm_tutorial.stack_distance import COLD, previous_occurrence, stack_distances
+
+POLICIES = ("LRU", "CLOCK", "2Q", "ARC", "LIRS", "OPT")
+
+
+@dataclass
+class MissRatioCurve:
+    """LRU misses for every memory size from 0 frames up to the number of distinct pages."""
+
+    misses: np.ndarray
+    references: int
+
+    @property
+    def cold_misses(self):
+        return int(self.misses[-1])
+
+    @property
+    def distinct_pages(self):
+        return len(self.misses) - 1
+
+    @property
+    def miss_ratios(self):
+        return self.misses / max(self.references, 1)
+
+    def miss_ratio(self, frames):
+        """Miss ratio with ``frames`` frames of memory (array or scalar)."""
+        return self.miss_ratios[np.minimum(frames, self.distinct_pages)]
+
+    def frames_for(self, miss_ratio):
+        """Smallest memory size whose miss ratio is at most ``miss_ratio``."""
+        return int(np.argmax(self.miss_ratios <= miss_ratio + 1e-12))
+
+
+def lru_curve(keys=None, distances=None):
+    """Miss-ratio curve of LRU for all memory sizes from one stack-distance pass."""
+    if distances is None:
+        distances = stack_distances(keys)
+    reuses = distances[distances != COLD]
+    cold = len(distances) - len(reuses)
+    # hits(C) counts the reuses with distance below C
+    hits = np.zeros(cold + 1, dtype=np.int64)
+    np.cumsum(np.bincount(reuses, minlength=cold)[:cold], out=hits[1:])
+    return MissRatioCurve(misses=len(distances) - hits, references=len(distances))
+
+
+def next_occurrence(keys):
+    """Index of the next access to the same key, or ``len(keys)`` if there is none."""
+    reversed_prev = previous_occurrence(np.asarray(keys)[::-1])[::-1]
+    n = len(keys)
+    return np.where(reversed_prev >= 0, n - 1 - reversed_prev, n)
+
+
+def _clock(keys, frames):
+    hits = bytearray(len(keys))
+    slot_of = {}
+    pages = [None] * frames
+    referenced = bytearray(frames)
+    hand = 0
+    for i, key in enumerate(keys):
+        slot = slot_of.get(key)
+        if slot is not None:
+            referenced[slot] = 1
+            hits[i] = 1
+            continue
+        # Second chance: clear reference bits until an unreferenced frame comes round
+        while referenced[hand]:
+            referenced[hand] = 0
+            hand = hand + 1 if hand + 1 < frames else 0
+        if pages[hand] is not None:
+            del slot_of[pages[hand]]
+        pages[hand] = key
+        slot_of[key] = hand
+        hand = hand + 1 if hand + 1 < frames else 0
+    return hits
+
+
+def _two_queue(keys, frames, in_fraction=0.25, out_fraction=0.5):
+    # Full 2Q: new pages wait in the A1in FIFO, and only pages re-referenced
+    # after leaving it (found in the A1out ghost list) are promoted to the Am LRU
+    hits = bytearray(len(keys))
+    k_in = max(1, int(frames * in_fraction))
+    k_out = max(1, int(frames * out_fraction))
+    a1in, a1out, am = OrderedDict(), OrderedDict(), OrderedDict()
+    for i, key in enumerate(keys):
+        if key in am:
+            am.move_to_end(key)
+            hits[i] = 1
+            continue
+        if key in a1in:
+            hits[i] = 1
+            continue
+        if len(a1in) + len(am) >= frames:
+            if len(a1in) > k_in or not am:
+                victim, _ = a1in.popitem(last=False)
+                a1out[victim] = None
+                if len(a1out) > k_out:
+                    a1out.popitem(last=False)
+            else:
+                am.popitem(last=False)
+        if key in a1out:
+            del a1out[key]
+            am[key] = None
+        else:
+            a1in[key] = None
+    return hits
+
+
+def _arc(keys, frames):
+    # Megiddo and Modha's ARC: T1/T2 hold pages seen once/several times
+    # recently, B1/B2 remember their evictions and steer the T1 target p
+    hits = bytearray(len(keys))
+    t1, t2, b1, b2 = OrderedDict(), OrderedDict(), OrderedDict(), OrderedDict()
+    p = 0.0
+
+    def replace(in_b2):
+        if t1 and (len(t1) > p or (in_b2 and len(t1) == p)):
+            victim, _ = t1.popitem(last=False)
+            b1[victim] = None
+        else:
+            victim, _ = t2.popitem(last=False)
+            b2[victim] = None
+
+    for i, key in enumerate(keys):
+        if key in t1:
+            del t1[key]
+            t2[key] = None
+            hits[i] = 1
+        elif key in t2:
+            t2.move_to_end(key)
+            hits[i] = 1
+        elif key in b1:
+            p = min(frames, p + max(len(b2) / len(b1), 1))
+            replace(False)
+            del b1[key]
+            t2[key] = None
+        elif key in b2:
+            p = max(0.0, p - max(len(b1) / len(b2), 1))
+            replace(True)
+            del b2[key]
+            t2[key] = None
+        else:
+            l1 = len(t1) + len(b1)
+            if l1 == frames:
+                if len(t1) < frames:
+                    b1.popitem(last=False)
+                    replace(False)
+                else:
+                    t1.popitem(last=False)
+            elif l1 < frames:
+                total = l1 + len(t2) + len(b2)
+                if total >= frames:
+                    if total == 2 * frames:
+                        b2.popitem(last=False)
+                    replace(False)
+            t1[key] = None
+    return hits
+
+
+_LIR, _HIR, _GHOST = 0, 1, 2
+
+
+def _lirs(keys, frames, hir_fraction=0.01):
+    # Jiang and Zhang's LIRS: pages with a short reuse distance (LIR) stay
+    # resident; the few HIR frames hold the rest in the FIFO queue q, and the
+    # stack s keeps recency, including for evicted HIR pages (ghosts)
+    hits = bytearray(len(keys))
+    hir_frames = max(1, int(frames * hir_fraction))
+    lir_frames = frames - hir_frames
+    status = {}
+    s, q = OrderedDict(), OrderedDict()
+    lir_count = 0
+
+    def prune():
+        while s:
+            bottom = next(iter(s))
+            if status[bottom] == _LIR:
+                return
+            del s[bottom]
+            if status[bottom] == _GHOST:
+                del status[bottom]
+
+    def demote_bottom():
+        bottom, _ = s.popitem(last=False)
+        status[bottom] = _HIR
+        q[bottom] = None
+        prune()
+
+    for i, key in enumerate(keys):
+        state = status.get(key)
+        if state == _LIR:
+            hits[i] = 1
+            s.move_to_end(key)
+            prune()
+            continue
+        if state == _HIR:
+            hits[i] = 1
+            if key in s:
+                # Reused within the LIR set's recency: swap with the coldest LIR page
+                status[key] = _LIR
+                del q[key]
+                s.move_to_end(key)
+                demote_bottom()
+            else:
+                s[key] = None
+                q.move_to_end(key)
+            continue
+        if lir_count < lir_frames:
+            status[key] = _LIR
+            lir_count += 1
+            s[key] = None
+            continue
+        if len(q) >= hir_frames:
+            victim, _ = q.popitem(last=False)
+            if victim in s:
+                status[victim] = _GHOST
+            else:
+                del status[victim]
+        if state == _GHOST:
+            status[key] = _LIR
+            s.move_to_end(key)
+            demote_bottom()
+        else:
+            status[key] = _HIR
+            s[key] = None
+            q[key] = None
+    return hits
+
+
+def _opt(keys, frames, upcoming):
+    # Belady's MIN: on a miss with memory full, evict the resident page whose
+    # next use is furthest away. Stale heap entries are skipped when popped.
+    hits = bytearray(len(keys))
+    resident = {}
+    heap = []
+    for i, key in enumerate(keys):
+        nxt = upcoming[i]
+        if key in resident:
+            hits[i] = 1
+        elif len(resident) >= frames:
+            while True:
+                negative, victim = heapq.heappop(heap)
+                if resident.get(victim) == -negative:
+                    break
+            del resident[victim]
+        resident[key] = nxt
+        heapq.heappush(heap, (-nxt, key))
+    return hits
+
+
+def simulate(policy, keys, frames, distances=None, upcoming=None):
+    """Hit mask of ``keys`` under ``policy`` with ``frames`` frames of memory.
+
+    ``distances`` (LRU) and ``upcoming`` (OPT) can be passed in when the same
+    reference string is simulated at several sizes.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown replacement policy {policy!r}; expected one of {POLICIES}")
+    if frames < 1:
+        return np.zeros(len(keys), dtype=bool)
+    if frames == 1:
+        # One frame hits only on an immediate repeat, whatever the policy
+        keys = np.asarray(keys)
+        return np.concatenate(([False], keys[1:] == keys[:-1]))[:len(keys)]
+    if policy == "LRU":
+        distances = stack_distances(keys) if distances is None else distances
+        return (distances != COLD) & (distances < frames)
+    as_list = np.asarray(keys).tolist()
+    if policy == "CLOCK":
+        hits = _clock(as_list, frames)
+    elif policy == "2Q":
+        hits = _two_queue(as_list, frames)
+    elif policy == "ARC":
+        hits = _arc(as_list, frames)
+    elif policy == "LIRS":
+        hits = _lirs(as_list, frames)
+    else:
+        upcoming = next_occurrence(keys) if upcoming is None else upcoming
+        hits = _opt(as_list, frames, upcoming.tolist())
+    return np.frombuffer(bytes(hits), dtype=bool)
+
+
+def compare_policies(keys, sizes, policies=POLICIES):
+    """LRU curve for every size plus the miss ratio of each policy at ``sizes``."""
+    keys = np.asarray(keys)
+    distances = stack_distances(keys)
+    curve = lru_curve(distances=distances)
+    upcoming = next_occurrence(keys) if "OPT" in policies else None
+    ratios = {}
+    for policy in policies:
+        if policy == "LRU":
+            ratios[policy] = curve.miss_ratio(np.asarray(sizes))
+            continue
+        ratios[policy] = np.array([1 - simulate(policy, keys, frames, upcoming=upcoming).mean() if len(keys) else 0.0
+                                   for frames in sizes])
+    return curve, ratios
+
+
+def curve_sizes(distinct_pages, points=8):
+    """Roughly log-spaced memory sizes between 1 frame and the distinct page count."""
+    return np.unique(np.geomspace(1, max(distinct_pages, 1), points).round().astype(np.int64))
+
+
+def page_references(records, page_size=4096, include_instructions=True):
+    """Page numbers referenced by trace ``records``, in order."""
+    if not include_instructions:
+        records = records[records["kind"] != 0]
+    return (records["addr"] >> np.uint64(page_size.bit_length() - 1)).astype(np.int64)
+
+
+def looping(n, loop_pages=1200, seed=0):
+    """A loop over more pages than memory holds, where LRU misses every time."""
+    return np.arange(n, dtype=np.int64) % loop_pages
+
+
+def zipf_hot_set(n, pages=4000, skew=0.9, seed=0):
+    """Independent references with Zipf popularity over ``pages`` pages."""
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, pages + 1) ** skew
+    return rng.permutation(pages)[rng.choice(pages, n, p=weights / weights.sum())]
+
+
+def scan_and_hot_set(n, hot_pages=400, scan_pages=20000, hot_fraction=0.7, seed=0):
+    """A hot working set disturbed by a long one-time sequential scan (a backup, a table scan)."""
+    rng = np.random.default_rng(seed)
+    hot = rng.integers(0, hot_pages, n)
+    scan = hot_pages + np.arange(n) % scan_pages
+    return np.where(rng.random(n) < hot_fraction, hot, scan)
+
+
+def phase_change(n, pages=800, phases=4, seed=0):
+    """Working sets that move to different pages every ``n / phases`` references."""
+    rng = np.random.default_rng(seed)
+    phase = np.arange(n) * phases // max(n, 1)
+    return phase * pages // 2 + (rng.zipf(1.3, n) - 1) % pages
+
+
+REFERENCE_PATTERNS = {
+    "Loop larger than memory": looping,
+    "Zipf hot set": zipf_hot_set,
+    "Scan + hot set": scan_and_hot_set,
+    "Shifting phases": phase_change,
+}
@@ -0,0 +1,475 @@
+"""Discrete-event simulator of VMs sharing a host's CPUs and memory.
+
+Each vCPU alternates between CPU bursts and idle (think) periods. A pluggable
+scheduler decides which runnable vCPU gets a free physical CPU, for how long
+and whether a waking vCPU preempts a running one, and a balloon driver
+periodically redistributes host memory when the VMs' working sets overcommit
+it. Per-vCPU state lives in flat lists indexed by
+vCPU number and events are plain tuples on a ``heapq`` so the loop stays cheap
+enough for thousands of VMs and millions of events.
+"""
+
+import heapq
+import math
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+
+import numpy as np
+
+# Event kinds
+_WAKE, _SLICE_END, _TICK, _BALLOON = range(4)
+
+
+@dataclass
+class VMSpec:
+    """Configuration and workload of one VM."""
+
+    vcpus: int = 1
+    memory_mb: int = 1024
+    reservation_mb: int = 0
+    weight: int = 256
+    burst_ms: float = 5.0
+    think_ms: float = 20.0
+    working_set_mb: float = None
+
+    @property
+    def working_set(self):
+        return self.working_set_mb if self.working_set_mb is not None else 0.6 * self.memory_mb
+
+
+# Burst/think profiles offered by the app's simulator
+WORKLOAD_PRESETS = {
+    "Interactive": {"burst_ms": 2.0, "think_ms": 40.0},
+    "Batch": {"burst_ms": 50.0, "think_ms": 2.0},
+    "Mixed": {"burst_ms": 10.0, "think_ms": 10.0},
+}
+
+
+@dataclass
+class HostSpec:
+    pcpus: int = 8
+    memory_mb: int = 16384
+
+
+class RoundRobinScheduler:
+    """Single FIFO run queue with a fixed timeslice."""
+
+    name = "Round-robin"
+    tick_ms = None
+
+    def __init__(self, timeslice_ms=10.0):
+        self.timeslice_ms = timeslice_ms
+        self._queue = deque()
+
+    def setup(self, simulation):
+        self._queue.clear()
+
+    def enqueue(self, vcpu, now, woke):
+        self._queue.append(vcpu)
+
+    def pick(self, now):
+        return self._queue.popleft() if self._queue else None
+
+    def preempt(self, vcpu, running):
+        return None
+
+    def timeslice(self, vcpu):
+        return self.timeslice_ms
+
+    def charge(self, vcpu, ran_ms):
+        pass
+
+    def tick(self, now):
+        pass
+
+
+class CreditScheduler:
+    """Xen-style credit scheduler.
+
+    Every accounting period each VM earns credits in proportion to its weight
+    and spends them while its vCPUs run. vCPUs with credit left (UNDER) run
+    before those that overdrew (OVER). A vCPU waking with credit gets BOOST
+    priority and, like in Xen, preempts a pCPU running an UNDER or OVER vCPU,
+    so I/O-bound guests stay responsive.
+
+    Credits are refilled lazily: a VM's balance is brought up to date from
+    the number of periods since it was last touched, and a VM that overdraws
+    is filed under the period in which it will be back in credit. Queued
+    vCPUs move between UNDER and OVER only when their VM crosses zero, so an
+    accounting tick costs in proportion to the VMs that recover in it rather
+    than to every VM on the host.
+    """
+
+    name = "Credit (Xen)"
+
+    def __init__(self, timeslice_ms=30.0, accounting_ms=30.0):
+        self.timeslice_ms = timeslice_ms
+        self.tick_ms = accounting_ms
+
+    def setup(self, simulation):
+        self._vm_of = simulation.vcpu_vm
+        starts = np.cumsum([0] + [spec.vcpus for spec in simulation.vms])
+        self._vcpus_of = [range(start, stop) for start, stop in zip(starts[:-1], starts[1:])]
+        weights = np.array([spec.weight for spec in simulation.vms], dtype=float)
+        self._earn = list(weights / weights.sum() * simulation.host.pcpus * self.tick_ms)
+        self._credits = list(self._earn)
+        # Period each balance was last brought up to date, and the VMs due to recover credit per period
+        self._stamp = [0] * len(self._earn)
+        self._period = 0
+        self._recovering = {}
+        self._boost, self._under, self._over = deque(), deque(), deque()
+        # Queue entries are (vcpu, token); moving a vCPU bumps its token so the old entry is skipped
+        self._queue_of = [None] * len(self._vm_of)
+        self._token = [0] * len(self._vm_of)
+        self._boosted = [False] * len(self._vm_of)
+
+    def _credit(self, vm):
+        periods = self._period - self._stamp[vm]
+        if periods:
+            # Unused credit is capped at one period so idle VMs cannot hoard it
+            self._credits[vm] = min(self._credits[vm] + periods * self._earn[vm], self._earn[vm])
+            self._stamp[vm] = self._period
+        return self._credits[vm]
+
+    def _push(self, vcpu, queue):
+        self._token[vcpu] += 1
+        queue.append((vcpu, self._token[vcpu]))
+        self._queue_of[vcpu] = queue
+
+    def _move(self, vm, source, target):
+        for vcpu in self._vcpus_of[vm]:
+            if self._queue_of[vcpu] is source:
+                self._push(vcpu, target)
+
+    def enqueue(self, vcpu, now, woke):
+        if self._credit(self._vm_of[vcpu]) > 0:
+            self._push(vcpu, self._boost if woke else self._under)
+        else:
+            self._push(vcpu, self._over)
+
+    def pick(self, now):
+        for queue in (self._boost, self._under, self._over):
+            while queue:
+                vcpu, token = queue.popleft()
+                if token == self._token[vcpu]:
+                    self._queue_of[vcpu] = None
+                    self._boosted[vcpu] = queue is self._boost
+                    return vcpu
+        return None
+
+    def preempt(self, vcpu, running):
+        """The pCPU whose vCPU a waking ``vcpu`` preempts, if it was boosted."""
+        if self._queue_of[vcpu] is not self._boost:
+            return None
+        for pcpu, current in enumerate(running):
+            if current is not None and not self._boosted[current]:
+                return pcpu
+        return None
+
+    def timeslice(self, vcpu):
+        return self.timeslice_ms
+
+    def charge(self, vcpu, ran_ms):
+        vm = self._vm_of[vcpu]
+        before = self._credit(vm)
+        credit = self._credits[vm] = before - ran_ms
+        if credit <= 0:
+            if before > 0:
+                self._move(vm, self._under, self._over)
+            # Back in credit after this many more periods; earlier entries for the VM turn stale
+            due = self._period + int(-credit // self._earn[vm]) + 1
+            self._recovering.setdefault(due, []).append(vm)
+
+    def tick(self, now):
+        self._period += 1
+        for vm in self._recovering.pop(self._period, ()):
+            if self._credit(vm) > 0:
+                self._move(vm, self._over, self._under)
+
+
+class FairShareScheduler:
+    """CFS-like scheduler: run the vCPU with the smallest weighted virtual runtime.
+
+    A VM's weight is split across its vCPUs, so shares are fair per VM. The
+    timeslice is the scheduling latency divided by the runnable weight, with a
+    minimum granularity, and waking vCPUs are placed near the current minimum
+    virtual runtime so sleepers neither starve nor monopolize the CPU.
+    """
+
+    name = "Fair share (CFS-like)"
+    tick_ms = None
+
+    def __init__(self, latency_ms=24.0, min_granularity_ms=3.0):
+        self.latency_ms = latency_ms
+        self.min_granularity_ms = min_granularity_ms
+
+    def setup(self, simulation):
+        self._weight = [simulation.vms[vm].weight / simulation.vms[vm].vcpus for vm in simulation.vcpu_vm]
+        self._vruntime = [0.0] * len(self._weight)
+        self._heap = []
+        self._queued_weight = 0.0
+        self._min_vruntime = 0.0
+        self._seq = 0
+
+    def enqueue(self, vcpu, now, woke):
+        if woke:
+            self._vruntime[vcpu] = max(self._vruntime[vcpu], self._min_vruntime - self.latency_ms / 2)
+        self._seq += 1
+        heapq.heappush(self._heap, (self._vruntime[vcpu], self._seq, vcpu))
+        self._queued_weight += self._weight[vcpu]
+
+    def pick(self, now):
+        if not self._heap:
+            return None
+        vruntime, _, vcpu = heapq.heappop(self._heap)
+        self._queued_weight -= self._weight[vcpu]
+        self._min_vruntime = max(self._min_vruntime, vruntime)
+        return vcpu
+
+    def preempt(self, vcpu, running):
+        return None
+
+    def timeslice(self, vcpu):
+        share = self._weight[vcpu] / (self._queued_weight + self._weight[vcpu])
+        return max(self.latency_ms * share, self.min_granularity_ms)
+
+    def charge(self, vcpu, ran_ms):
+        self._vruntime[vcpu] += ran_ms * 256.0 / self._weight[vcpu]
+
+    def tick(self, now):
+        pass
+
+
+SCHEDULERS = {
+    "Round-robin": RoundRobinScheduler,
+    "Credit (Xen)": CreditScheduler,
+    "Fair share (CFS-like)": FairShareScheduler,
+}
+
+
+def balloon_targets(host_memory_mb, demand_mb, reservation_mb, weights, configured_mb):
+    """Split host memory across VMs by weighted water-filling.
+
+    Every VM first gets its reservation, then the remainder is shared out by
+    weight up to each VM's demand; whatever is left fills VMs up to their
+    configured size. Returns the per-VM allocation in MB.
+    """
+    demand = np.minimum(demand_mb, configured_mb)
+    allocation = np.minimum(reservation_mb, configured_mb).astype(float)
+    for ceiling in (demand, configured_mb):
+        remaining = host_memory_mb - allocation.sum()
+        for _ in range(64):
+            want = np.maximum(ceiling - allocation, 0)
+            active = want > 1e-9
+            if remaining <= 1e-9 or not active.any():
+                break
+            share = remaining * weights * active / (weights * active).sum()
+            grant = np.minimum(share, want)
+            allocation += grant
+            remaining -= grant.sum()
+    return allocation
+
+
+@dataclass
+class SchedulerResult:
+    """Per-VM metrics of one simulation run (arrays indexed by VM)."""
+
+    scheduler: str
+    sim_ms: float
+    events: int
+    wall_s: float
+    throughput: np.ndarray
+    cpu_ms: np.ndarray
+    steal_ms: np.ndarray
+    latency_p50: np.ndarray
+    latency_p95: np.ndarray
+    latency_p99: np.ndarray
+    balloon_mb: np.ndarray
+    memory_pressure: np.ndarray
+    host_utilization: float
+
+    @property
+    def steal_fraction(self):
+        return self.steal_ms / np.maximum(self.steal_ms + self.cpu_ms, 1e-9)
+
+    @property
+    def events_per_second(self):
+        return self.events / max(self.wall_s, 1e-9)
+
+
+def _group_percentiles(groups, values, n_groups, quantiles):
+    # Sort by (group, value) once and index each group's quantile positions
+    order = np.lexsort((values, groups))
+    sorted_values = values[order]
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    result = []
+    for q in quantiles:
+        index = starts + np.floor(q * np.maximum(counts - 1, 0)).astype(np.int64)
+        picked = sorted_values[np.minimum(index, max(len(sorted_values) - 1, 0))] if len(sorted_values) else np.zeros(n_groups)
+        result.append(np.where(counts > 0, picked, np.nan))
+    return result
+
+
+class HostSimulation:
+    """Event-driven model of ``vms`` sharing ``host`` under ``scheduler``.
+
+    ``swap_penalty`` scales how much a VM slows down when its working set does
+    not fit in its memory allocation; working sets oscillate by
+    ``working_set_swing`` around their base size with a random phase per VM.
+    """
+
+    def __init__(self, host, vms, scheduler=None, balloon_interval_ms=1000.0, swap_penalty=4.0,
+                 working_set_swing=0.25, working_set_period_ms=60_000.0, seed=0):
+        self.host = host
+        self.vms = list(vms)
+        self.scheduler = scheduler if scheduler is not None else CreditScheduler()
+        self.balloon_interval_ms = balloon_interval_ms
+        self.swap_penalty = swap_penalty
+        self.working_set_swing = working_set_swing
+        self.working_set_period_ms = working_set_period_ms
+        self.seed = seed
+        self.vcpu_vm = [vm for vm, spec in enumerate(self.vms) for _ in range(spec.vcpus)]
+
+    def run(self, duration_ms=10_000.0, max_events=None):
+        vms, host, scheduler = self.vms, self.host, self.scheduler
+        n_vms, n_vcpus = len(vms), len(self.vcpu_vm)
+        vcpu_vm = self.vcpu_vm
+        scheduler.setup(self)
+        # Exponential draws are inlined as -mean * log(1 - U) in the hot loop
+        uniform = random.Random(self.seed).random
+        log = math.log
+        burst_mean = [spec.burst_ms for spec in vms]
+        think_mean = [spec.think_ms for spec in vms]
+
+        # Memory model inputs, evaluated vectorized at each balloon event
+        configured = np.array([spec.memory_mb for spec in vms], dtype=float)
+        reserved = np.array([spec.reservation_mb for spec in vms], dtype=float)
+        weights = np.array([spec.weight for spec in vms], dtype=float)
+        base_ws = np.array([spec.working_set for spec in vms], dtype=float)
+        phase = np.random.default_rng(self.seed).uniform(0, 2 * math.pi, n_vms)
+        balloon_total = np.zeros(n_vms)
+        pressure_total = np.zeros(n_vms)
+        balloon_samples = 0
+        dilation = [1.0] * n_vms
+
+        remaining = [0.0] * n_vcpus
+        ready_since = [0.0] * n_vcpus
+        run_start = [0.0] * n_vcpus
+        woke_at = [0.0] * n_vcpus
+        cpu_ms = [0.0] * n_vcpus
+        steal_ms = [0.0] * n_vcpus
+        completed = [0] * n_vms
+        latency_vm, latency = [], []
+        idle = list(range(host.pcpus))
+        # The vCPU on each pCPU and the seq of its slice-end event; a preempted slice's event is skipped
+        running = [None] * host.pcpus
+        slice_seq = [0] * host.pcpus
+        heap = []
+        seq = 0
+        for vcpu in range(n_vcpus):
+            seq += 1
+            heap.append((-think_mean[vcpu_vm[vcpu]] * log(1.0 - uniform()), seq, _WAKE, vcpu, 0))
+        heapq.heapify(heap)
+        if scheduler.tick_ms:
+            seq += 1
+            heapq.heappush(heap, (scheduler.tick_ms, seq, _TICK, 0, 0))
+        heapq.heappush(heap, (0.0, 0, _BALLOON, 0, 0))
+
+        push, pop = heapq.heappush, heapq.heappop
+        events = 0
+        limit = max_events if max_events is not None else math.inf
+        started = time.perf_counter()
+        now = 0.0
+
+        def dispatch(pcpu, now):
+            nonlocal seq
+            vcpu = scheduler.pick(now)
+            running[pcpu] = vcpu
+            if vcpu is None:
+                idle.append(pcpu)
+                return
+            steal_ms[vcpu] += now - ready_since[vcpu]
+            run_start[vcpu] = now
+            run_ms = min(scheduler.timeslice(vcpu), remaining[vcpu] * dilation[vcpu_vm[vcpu]])
+            seq += 1
+            slice_seq[pcpu] = seq
+            push(heap, (now + run_ms, seq, _SLICE_END, pcpu, vcpu))
+
+        while heap and events < limit:
+            now, event_seq, kind, a, b = pop(heap)
+            if now > duration_ms:
+                now = duration_ms
+                break
+            if kind == _SLICE_END and event_seq != slice_seq[a]:
+                continue
+            events += 1
+            if kind == _SLICE_END:
+                pcpu, vcpu = a, b
+                vm = vcpu_vm[vcpu]
+                ran = now - run_start[vcpu]
+                cpu_ms[vcpu] += ran
+                scheduler.charge(vcpu, ran)
+                remaining[vcpu] -= ran / dilation[vm]
+                if remaining[vcpu] <= 1e-9:
+                    completed[vm] += 1
+                    latency_vm.append(vm)
+                    latency.append(now - woke_at[vcpu])
+                    seq += 1
+                    push(heap, (now - think_mean[vm] * log(1.0 - uniform()), seq, _WAKE, vcpu, 0))
+                else:
+                    ready_since[vcpu] = now
+                    scheduler.enqueue(vcpu, now, False)
+                dispatch(pcpu, now)
+            elif kind == _WAKE:
+                remaining[a] = -burst_mean[vcpu_vm[a]] * log(1.0 - uniform())
+                woke_at[a] = ready_since[a] = now
+                scheduler.enqueue(a, now, True)
+                if idle:
+                    dispatch(idle.pop(), now)
+                else:
+                    pcpu = scheduler.preempt(a, running)
+                    if pcpu is not None:
+                        # End the victim's slice now; its handler requeues it and dispatches the waker
+                        seq += 1
+                        slice_seq[pcpu] = seq
+                        push(heap, (now, seq, _SLICE_END, pcpu, running[pcpu]))
+            elif kind == _TICK:
+                scheduler.tick(now)
+                seq += 1
+                push(heap, (now + scheduler.tick_ms, seq, _TICK, 0, 0))
+            else:
+                swing = 1 + self.working_set_swing * np.sin(2 * math.pi * now / self.working_set_period_ms + phase)
+                demand = base_ws * swing
+                allocation = balloon_targets(host.memory_mb, demand, reserved, weights, configured)
+                shortfall = np.clip(demand - allocation, 0, None) / np.maximum(demand, 1e-9)
+                dilation = list(1 + self.swap_penalty * shortfall)
+                balloon_total += configured - allocation
+                pressure_total += shortfall > 0
+                balloon_samples += 1
+                seq += 1
+                push(heap, (now + self.balloon_interval_ms, seq, _BALLOON, 0, 0))
+        wall_s = time.perf_counter() - started
+
+        sim_ms = max(now, 1e-9)
+        per_vm = np.array(vcpu_vm, dtype=np.int64)
+        cpu = np.bincount(per_vm, weights=cpu_ms, minlength=n_vms)
+        steal = np.bincount(per_vm, weights=steal_ms, minlength=n_vms)
+        p50, p95, p99 = _group_percentiles(np.array(latency_vm, dtype=np.int64), np.array(latency), n_vms, (0.5, 0.95, 0.99))
+        return SchedulerResult(
+            scheduler=scheduler.name,
+            sim_ms=sim_ms,
+            events=events,
+            wall_s=wall_s,
+            throughput=np.array(completed) / (sim_ms / 1000.0),
+            cpu_ms=cpu,
+            steal_ms=steal,
+            latency_p50=p50,
+            latency_p95=p95,
+            latency_p99=p99,
+            balloon_mb=balloon_total / max(balloon_samples, 1),
+            memory_pressure=pressure_total / max(balloon_samples, 1),
+            host_utilization=float(cpu.sum() / (host.pcpus * sim_ms)),
+        )
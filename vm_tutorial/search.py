@@ -0,0 +1,116 @@
+"""In-memory full-text search over the tutorial content.
+
+The index is an inverted map from token to ``{document: weight}`` built once
+from ``content.documents()``. Query tokens are matched exactly, as prefixes
+of indexed tokens (through a sorted vocabulary and ``bisect``) and with one
+typo (candidates come from a symmetric-deletion table), so every lookup is a
+handful of dictionary probes rather than a scan over the text.
+"""
+
+import bisect
+import math
+import re
+from collections import defaultdict
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Title words count more than body words
+TITLE_WEIGHT = 3.0
+# Score multipliers for the kinds of token match
+EXACT, PREFIX, FUZZY = 1.0, 0.6, 0.4
+MAX_EXPANSIONS = 30
+
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower())
+
+
+def _deletes(token):
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def _one_edit(a, b):
+    """True if ``b`` is one insertion, deletion, substitution or adjacent swap away from ``a``."""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    prefix = 0
+    while prefix < min(len(a), len(b)) and a[prefix] == b[prefix]:
+        prefix += 1
+    a, b = a[prefix:], b[prefix:]
+    if len(a) == len(b):
+        return a[1:] == b[1:] or (len(a) > 1 and a[0] == b[1] and a[1] == b[0] and a[2:] == b[2:])
+    return a[1:] == b or b[1:] == a
+
+
+class SearchIndex:
+    def __init__(self, documents):
+        self.documents = list(documents)
+        frequencies = defaultdict(lambda: defaultdict(float))
+        for index, document in enumerate(self.documents):
+            for token in tokenize(document.title):
+                frequencies[token][index] += TITLE_WEIGHT
+            for token in tokenize(document.text):
+                frequencies[token][index] += 1.0
+
+        n = len(self.documents)
+        self._postings = {}
+        for token, counts in frequencies.items():
+            idf = math.log(1 + n / len(counts))
+            # Dampened term frequency so long paragraphs do not drown out titles
+            self._postings[token] = {index: (1 + math.log(count)) * idf for index, count in counts.items()}
+        self._vocabulary = sorted(self._postings)
+        self._by_deletion = defaultdict(set)
+        for token in self._vocabulary:
+            if len(token) > 3:
+                for variant in _deletes(token):
+                    self._by_deletion[variant].add(token)
+
+    def _expand(self, token):
+        """Indexed tokens matching ``token`` with their match weight."""
+        matches = {}
+        if token in self._postings:
+            matches[token] = EXACT
+        start = bisect.bisect_left(self._vocabulary, token)
+        for candidate in self._vocabulary[start:start + MAX_EXPANSIONS]:
+            if not candidate.startswith(token):
+                break
+            matches.setdefault(candidate, PREFIX)
+        if len(token) > 3:
+            # One insertion, deletion or substitution (or a transposition)
+            variants = _deletes(token)
+            candidates = set(self._by_deletion.get(token, ()))
+            for variant in variants:
+                candidates |= self._by_deletion.get(variant, set())
+                if variant in self._postings:
+                    candidates.add(variant)
+            for candidate in candidates:
+                if _one_edit(token, candidate):
+                    matches.setdefault(candidate, FUZZY)
+        return matches
+
+    def search(self, query, limit=8):
+        """Return up to ``limit`` ``(score, document)`` pairs, best first."""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        scores = defaultdict(float)
+        matched = defaultdict(int)
+        for token in tokens:
+            best = {}
+            for candidate, weight in self._expand(token).items():
+                for index, score in self._postings[candidate].items():
+                    best[index] = max(best.get(index, 0.0), weight * score)
+            for index, score in best.items():
+                scores[index] += score
+                matched[index] += 1
+        phrase = " ".join(tokens)
+        ranked = []
+        for index, score in scores.items():
+            document = self.documents[index]
+            # Favour documents that match every query word, then whole-phrase titles
+            score *= matched[index] / len(tokens)
+            if phrase in " ".join(tokenize(document.title)):
+                score *= 2
+            ranked.append((score, index))
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+        return [(score, self.documents[index]) for score, index in ranked[:limit]]
@@ -0,0 +1,68 @@
+"""Per-session objects kept outside Streamlit's session state, evicted when idle.
+
+Streamlit keeps a session's state for as long as its browser tab stays
+connected, so a tab left open overnight pins everything it ever stored.
+The app therefore keeps only small values (indices, settings, a few
+integers) in ``st.session_state`` and puts the objects that grow, such as
+a warmed-up MMU model, in a process-wide ``SessionStore``. The store drops
+every object of a session that has not rerun for ``idle_seconds`` and,
+beyond ``max_sessions``, those of the least recently active sessions. An
+evicted object is rebuilt by its factory on the session's next rerun, so
+eviction costs a cold start, never an error.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class SessionStore:
+    """Bounded, thread-safe map of session id to that session's objects."""
+
+    def __init__(self, idle_seconds=1800.0, max_sessions=500, clock=time.monotonic):
+        self.idle_seconds = idle_seconds
+        self.max_sessions = max_sessions
+        self.clock = clock
+        self.evicted = 0
+        # Least recently active first: session id -> (last active, {name: (params, object)})
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, session_id, name, params, factory):
+        """The session's object ``name``, built by ``factory()`` when missing or built for other ``params``."""
+        with self._lock:
+            objects = self._touch(session_id)
+            entry = objects.get(name)
+            if entry is not None and entry[0] == params:
+                return entry[1]
+        value = factory()
+        with self._lock:
+            self._touch(session_id)[name] = (params, value)
+        return value
+
+    def touch(self, session_id):
+        """Mark the session active and evict the idle ones."""
+        with self._lock:
+            self._touch(session_id)
+
+    def forget(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _touch(self, session_id):
+        now = self.clock()
+        _, objects = self._sessions.pop(session_id, (None, {}))
+        self._sessions[session_id] = (now, objects)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+        while self._sessions:
+            oldest, (last_active, _) = next(iter(self._sessions.items()))
+            if now - last_active <= self.idle_seconds:
+                break
+            del self._sessions[oldest]
+            self.evicted += 1
+        return objects
@@ -0,0 +1,105 @@
+"""Vectorized LRU stack-distance kernels.
+
+The stack distance of an access is the number of distinct keys referenced
+since the previous access to the same key. An LRU structure holding ``C``
+entries hits exactly when that distance is below ``C``, so one pass over a
+trace answers the hit/miss question for every capacity at once.
+"""
+
+import numpy as np
+
+# Stack distance reported for the first reference to a key
+COLD = -1
+# ``stack_distances(within=w)`` scans up to this many times ``w`` accesses back before counting exactly
+_SCAN_FACTOR = 8
+
+
+def previous_occurrence(keys):
+    """Index of the previous access to the same key, or -1 for a first touch."""
+    keys = np.asarray(keys)
+    prev = np.full(len(keys), -1, dtype=np.int64)
+    if len(keys) < 2:
+        return prev
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    same = sorted_keys[1:] == sorted_keys[:-1]
+    prev[order[1:][same]] = order[:-1][same]
+    return prev
+
+
+def count_less_before(values, ends, bounds):
+    """For each query ``q`` count ``j < ends[q]`` with ``values[j] < bounds[q]``.
+
+    ``values`` must be non-negative integers. The counts are answered together
+    with a wavelet matrix, one stable bit partition per value bit, so the cost
+    is O((N + Q) log N) array operations with no per-element Python work.
+    """
+    dtype = np.int32 if len(values) < np.iinfo(np.int32).max else np.int64
+    values = np.asarray(values, dtype=dtype)
+    ends = np.asarray(ends, dtype=dtype)
+    bounds = np.asarray(bounds, dtype=dtype)
+    starts = np.zeros(len(ends), dtype=dtype)
+    counts = np.zeros(len(ends), dtype=dtype)
+    nbits = int(max(values.max(initial=0), bounds.max(initial=0))).bit_length()
+    ones_before = np.zeros(len(values) + 1, dtype=dtype)
+    for level in range(nbits - 1, -1, -1):
+        bits = (values >> level) & 1
+        np.cumsum(bits, out=ones_before[1:])
+        n_zeros = len(values) - ones_before[-1]
+        ones_start = ones_before[starts]
+        ones_end = ones_before[ends]
+        zeros_start = starts - ones_start
+        zeros_end = ends - ones_end
+        # Queries with a 1 here count every value with a 0 and the same higher
+        # bits, then follow the ones; the others follow the zeros
+        go_right = (bounds >> level) & 1
+        counts += go_right * (zeros_end - zeros_start)
+        starts = zeros_start + go_right * (n_zeros + ones_start - zeros_start)
+        ends = zeros_end + go_right * (n_zeros + ones_end - zeros_end)
+        mask = bits.astype(bool)
+        values = np.concatenate((values[~mask], values[mask]))
+    return counts.astype(np.int64)
+
+
+def stack_distances(keys, prev=None, within=None):
+    """LRU stack distance of every access in ``keys`` (``COLD`` for first touches).
+
+    ``within`` optionally restricts the exact computation to accesses whose
+    stack distance could reach it: shorter reuse windows are reported as their
+    window length, which is an upper bound on the true distance, and windows
+    found to hold ``within`` distinct keys are reported as ``within``, a lower
+    bound. Callers that only compare distances against a capacity pass the
+    capacity here.
+    """
+    if prev is None:
+        prev = previous_occurrence(keys)
+    distances = np.full(len(prev), COLD, dtype=np.int64)
+    reused = np.flatnonzero(prev >= 0)
+    windows = reused - prev[reused] - 1
+    if within is not None:
+        short = windows < within
+        distances[reused[short]] = windows[short]
+        reused = reused[~short]
+        # Scanning a few accesses back settles most of the rest: either the
+        # window ends or ``within`` distinct keys have turned up in it
+        following = np.full(len(prev), len(prev), dtype=np.int64)
+        following[prev[prev >= 0]] = np.flatnonzero(prev >= 0)
+        positions, before = reused - 1, prev[reused]
+        distinct = np.zeros(len(reused), dtype=np.int64)
+        for _ in range(_SCAN_FACTOR * within):
+            # Seen from the end of the window, a new key is one not accessed again before it ends
+            distinct += following[positions] >= reused
+            positions -= 1
+            open_ = (positions > before) & (distinct < within)
+            settled = ~open_
+            distances[reused[settled]] = distinct[settled]
+            reused, positions, before, distinct = reused[open_], positions[open_], before[open_], distinct[open_]
+            if not len(reused):
+                break
+    if len(reused):
+        before = prev[reused]
+        # Every j <= prev(i) has prev(j) < prev(i); the rest of the count is
+        # exactly the first touches of distinct keys inside the reuse window
+        less = count_less_before(prev + 1, reused, before + 1)
+        distances[reused] = less - (before + 1)
+    return distances
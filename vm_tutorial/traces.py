@@ -0,0 +1,195 @@
+"""Streaming memory-trace readers and the compact binary trace format.
+
+Text traces (Valgrind lackey, Pin pinatrace) are parsed in fixed-size byte
+blocks; binary traces are read through ``numpy.memmap``. Both produce chunks
+of ``RECORD_DTYPE`` records, so a whole trace can be piped through the
+translator without ever holding more than one chunk in memory.
+"""
+
+import gzip
+import os
+import re
+
+import numpy as np
+
+MAGIC = b"VMTRACE\0"
+FORMAT_VERSION = 1
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("version", "<u2"), ("record_size", "<u2"), ("reserved", "<u4")])
+RECORD_DTYPE = np.dtype([("addr", "<u8"), ("kind", "u1"), ("size", "u1")])
+
+# Access kinds: instruction fetch, load, store, modify (load + store)
+KIND_CODES = {b"I": 0, b"L": 1, b"S": 2, b"M": 3, b"R": 1, b"W": 2}
+KIND_NAMES = ("I", "L", "S", "M")
+
+TEXT_FORMATS = {
+    # " L 04222cac,8" / "I  0400d7d4,8"; "==" lines are Valgrind banners
+    "lackey": re.compile(rb"^ ?([ILSM]) +([0-9A-Fa-f]+),(\d+)", re.MULTILINE),
+    # "0x7f1c2a4b: W 0x7ffd4a3c" as written by Pin's pinatrace tool
+    "pin": re.compile(rb"^0x[0-9A-Fa-f]+: ([RW]) 0x([0-9A-Fa-f]+)()", re.MULTILINE),
+}
+
+_HEX_DIGITS = np.zeros(256, dtype=np.uint64)
+for _digit, _char in enumerate("0123456789abcdef"):
+    _HEX_DIGITS[ord(_char)] = _HEX_DIGITS[ord(_char.upper())] = _digit
+
+_KIND_LOOKUP = np.zeros(256, dtype=np.uint8)
+for _name, _code in KIND_CODES.items():
+    _KIND_LOOKUP[_name[0]] = _code
+
+
+def _parse_hex(fields):
+    """Decode a sequence of ASCII hex strings into uint64 values, column by column."""
+    raw = np.asarray(fields, dtype="S16")
+    digits = raw.view(np.uint8).reshape(len(raw), raw.itemsize)
+    values = np.zeros(len(raw), dtype=np.uint64)
+    for column in range(raw.itemsize):
+        # Shorter strings are NUL padded, which ends their number early
+        present = digits[:, column] != 0
+        values = np.where(present, (values << np.uint64(4)) | _HEX_DIGITS[digits[:, column]], values)
+    return values
+
+
+def _parse_block(block, pattern):
+    matches = pattern.findall(block)
+    records = np.zeros(len(matches), dtype=RECORD_DTYPE)
+    if not matches:
+        return records
+    kinds, addrs, sizes = zip(*matches)
+    records["addr"] = _parse_hex(addrs)
+    records["kind"] = _KIND_LOOKUP[np.frombuffer(b"".join(kinds), dtype=np.uint8)]
+    sized = np.asarray(sizes)
+    records["size"] = np.where(sized == b"", b"8", sized).astype(np.int64).clip(0, 255)
+    return records
+
+
+def _open_text(source):
+    if hasattr(source, "read"):
+        return source
+    if str(source).endswith(".gz"):
+        return gzip.open(source, "rb")
+    return open(source, "rb")
+
+
+def iter_text_chunks(source, fmt="lackey", block_bytes=16 << 20):
+    """Yield record arrays parsed from a text trace, one byte block at a time.
+
+    ``source`` is a path (``.gz`` is decompressed on the fly) or a binary file
+    object. Lines that do not match the format, such as tool banners, are
+    skipped.
+    """
+    pattern = TEXT_FORMATS[fmt]
+    stream = _open_text(source)
+    try:
+        carry = b""
+        while True:
+            block = stream.read(block_bytes)
+            if not block:
+                break
+            block = carry + block
+            # Hold back the trailing partial line for the next block
+            cut = block.rfind(b"\n") + 1
+            carry = block[cut:]
+            records = _parse_block(block[:cut], pattern)
+            if len(records):
+                yield records
+        if carry:
+            records = _parse_block(carry, pattern)
+            if len(records):
+                yield records
+    finally:
+        if stream is not source:
+            stream.close()
+
+
+def open_binary_trace(source):
+    """Map a binary trace as a read-only record array without loading it."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        header = np.frombuffer(source, dtype=HEADER_DTYPE, count=1)[0]
+        _check_header(header)
+        return np.frombuffer(source, dtype=RECORD_DTYPE, offset=HEADER_DTYPE.itemsize)
+    header = np.fromfile(source, dtype=HEADER_DTYPE, count=1)
+    if not len(header):
+        raise ValueError(f"{source} is not a binary trace: file is empty")
+    _check_header(header[0])
+    if os.path.getsize(source) == HEADER_DTYPE.itemsize:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(source, dtype=RECORD_DTYPE, mode="r", offset=HEADER_DTYPE.itemsize)
+
+
+def _check_header(header):
+    if header["magic"] != MAGIC.rstrip(b"\0"):
+        raise ValueError("Not a binary trace: bad magic")
+    if header["version"] != FORMAT_VERSION or header["record_size"] != RECORD_DTYPE.itemsize:
+        raise ValueError(f"Unsupported binary trace version {header['version']}")
+
+
+def iter_binary_chunks(source, chunk_records=1 << 20):
+    """Yield consecutive slices of a binary trace; pages are faulted in lazily."""
+    records = open_binary_trace(source)
+    for start in range(0, len(records), chunk_records):
+        yield records[start:start + chunk_records]
+
+
+def is_binary_trace(path):
+    with open(path, "rb") as stream:
+        return stream.read(len(MAGIC)) == MAGIC
+
+
+def iter_trace(source, fmt="lackey", chunk_records=1 << 20):
+    """Yield record chunks from a binary trace or a text trace in ``fmt``."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        if bytes(source[:len(MAGIC)]) == MAGIC:
+            return iter_binary_chunks(source, chunk_records)
+        return iter_text_chunks(_BytesReader(source), fmt)
+    if not hasattr(source, "read") and is_binary_trace(source):
+        return iter_binary_chunks(source, chunk_records)
+    return iter_text_chunks(source, fmt)
+
+
+class _BytesReader:
+    def __init__(self, data):
+        self._data = memoryview(data)
+        self._pos = 0
+
+    def read(self, size):
+        chunk = bytes(self._data[self._pos:self._pos + size])
+        self._pos += len(chunk)
+        return chunk
+
+
+def write_binary_header(stream):
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header["magic"] = MAGIC
+    header["version"] = FORMAT_VERSION
+    header["record_size"] = RECORD_DTYPE.itemsize
+    stream.write(header.tobytes())
+
+
+def convert_to_binary(source, destination, fmt="lackey", block_bytes=16 << 20):
+    """Parse a text trace once and write it in the binary format; returns the record count."""
+    count = 0
+    with open(destination, "wb") as stream:
+        write_binary_header(stream)
+        for records in iter_text_chunks(source, fmt, block_bytes):
+            stream.write(records.tobytes())
+            count += len(records)
+    return count
+
+
+def translate_stream(translator, chunks, include_instructions=True):
+    """Feed record chunks through a translator, yielding one result per chunk."""
+    for records in chunks:
+        if not include_instructions:
+            records = records[records["kind"] != KIND_CODES[b"I"]]
+        yield translator.translate(records["addr"])
+
+
+def summarize(results):
+    """Fold per-chunk translation summaries into trace totals."""
+    totals = {"accesses": 0, "tlb_hits": 0, "tlb_misses": 0, "page_faults": 0, "walk_refs": 0}
+    for result in results:
+        for key, value in result.summary().items():
+            if key in totals:
+                totals[key] += value
+    totals["hit_rate"] = totals["tlb_hits"] / max(totals["accesses"], 1)
+    return totals